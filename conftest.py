@@ -1,33 +1,423 @@
-from collections.abc import Generator
+# Модули UI (selenium, пул браузеров, PageObject) импортируются внутри
+# фикстур: прогон только API-тестов их не загружает
+from __future__ import annotations
+
+import asyncio
+import functools
+import inspect
+import json
+import tempfile
+import time
+from collections.abc import Callable, Generator
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
 
 import allure
 import pytest
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.remote.webdriver import WebDriver
+
+from data.config import get_settings
+from utils.benchmark import BaselineStore, BenchmarkResult, BenchmarkSession, measure
+from utils.movie_index import MovieIndex, open_for_tests
+from utils.scheduler import DurationScheduling, DurationStore
+from utils.startup import StartupProfile, is_test_module, may_select
+from utils.stub_server import StubApiServer
+
+if TYPE_CHECKING:
+    from selenium.webdriver.remote.webdriver import WebDriver
+
+    from utils.driver_pool import WebDriverPool
+    from utils.network_filter import NetworkFilter
+
+startup_profile = StartupProfile()
+# Файл признака блокировки сайта, общий для воркеров xdist одного прогона
+_site_blocked_path: Path | None = None
+# Длительности тестов копятся в основном процессе (без xdist или в контроллере)
+_durations: DurationStore | None = None
+_scheduler: DurationScheduling | None = None
+# Время запуска пула браузеров, ещё не переданное в отчёт теста
+_driver_startup_s: float | None = None
+
+
+def pytest_addoption(parser: pytest.Parser) -> None:
+    group = parser.getgroup("kinopoisk", "Кинопоиск: бенчмарки")
+    group.addoption(
+        "--bench-update",
+        action="store_true",
+        default=False,
+        help="перезаписать базовые значения бенчмарков свежими замерами",
+    )
+    group.addoption(
+        "--bench-threshold",
+        type=float,
+        default=None,
+        help="допустимое ухудшение лучшего времени относительно базы (0.2 — 20%%); "
+        "по умолчанию KINOPOISK_BENCHMARK_THRESHOLD",
+    )
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_configure(config: pytest.Config) -> None:
+    global _site_blocked_path
+    # Воркеры xdist одного прогона делят признак блокировки сайта через файл
+    workerinput = getattr(config, "workerinput", None)
+    if workerinput is not None:
+        _site_blocked_path = Path(tempfile.gettempdir()) / f"kinopoisk-blocked-{workerinput['testrunuid']}"
+    # До pytest_configure плагина allure: он создаст фоновую запись вместо штатной
+    if getattr(config.option, "allure_report_dir", None) and get_settings().allure_async:
+        from utils import allure_writer
+
+        allure_writer.install()
+        config.add_cleanup(functools.partial(_close_allure_writers, config))
+
+
+def _close_allure_writers(config: pytest.Config) -> None:
+    """
+    Дописать очередь результатов allure и сохранить статистику записи
+    в reports/allure_writer.json.
+    """
+    from utils import allure_writer
+
+    stats = allure_writer.close_writers()
+    if not stats:
+        return
+    worker = getattr(config, "workerinput", {}).get("workerid")
+    suffix = f"-{worker}" if worker else ""
+    reports_dir = get_settings().reports_dir
+    reports_dir.mkdir(parents=True, exist_ok=True)
+    (reports_dir / f"allure_writer{suffix}.json").write_text(
+        json.dumps(stats, ensure_ascii=False, indent=2), encoding="utf-8"
+    )
+
+
+def pytest_ignore_collect(collection_path: Path, config: pytest.Config) -> bool | None:
+    """
+    Не импортировать модули тестов из testpaths, в которых по исходному
+    коду ни один тест не подходит под -m (см. utils/startup.py).
+    """
+    markexpr = config.getoption("markexpr", "")
+    if not markexpr:
+        return None
+    roots = [config.rootpath / path for path in config.getini("testpaths")]
+    if not is_test_module(collection_path, config.getini("python_files"), roots):
+        return None
+    if may_select(collection_path, markexpr):
+        return None
+    startup_profile.module_skipped(collection_path, config.rootpath)
+    return True
+
+
+def pytest_collection(session: pytest.Session) -> None:
+    startup_profile.collection_start()
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_make_collect_report(collector: pytest.Collector) -> Generator[None, Any, Any]:
+    started = time.perf_counter()
+    try:
+        return (yield)
+    finally:
+        if isinstance(collector, pytest.Module):
+            startup_profile.module_collected(collector.nodeid, time.perf_counter() - started)
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_collection_finish(session: pytest.Session) -> None:
+    startup_profile.collection_finish()
+    worker = getattr(session.config, "workerinput", {}).get("workerid")
+    suffix = f"-{worker}" if worker else ""
+    reports_dir = get_settings().reports_dir
+    startup_profile.write(reports_dir / f"startup{suffix}.json", reports_dir / f"startup{suffix}.jsonl")
+
+
+def pytest_sessionstart(session: pytest.Session) -> None:
+    global _durations
+    if not hasattr(session.config, "workerinput"):
+        _durations = DurationStore(getattr(session.config, "cache", None), session.config.rootpath)
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_xdist_make_scheduler(config: pytest.Config, log: Any) -> DurationScheduling | None:
+    """
+    Раздавать тесты воркерам xdist по длительностям прошлых прогонов
+    вместо `--dist load` (см. utils/scheduler.py).
+    """
+    global _scheduler
+    if config.getvalue("dist") != "load" or _durations is None or not get_settings().xdist_duration_scheduler:
+        return None
+    _scheduler = DurationScheduling(config, _durations, log)
+    return _scheduler
+
+
+def pytest_runtest_logreport(report: pytest.TestReport) -> None:
+    if _durations is not None:
+        _durations.add_report(report)
+
+
+def pytest_sessionfinish(session: pytest.Session) -> None:
+    if _durations is not None:
+        _durations.save()
+    if _scheduler is not None and _scheduler.collection is not None:
+        reports_dir = get_settings().reports_dir
+        reports_dir.mkdir(parents=True, exist_ok=True)
+        (reports_dir / "xdist_schedule.json").write_text(
+            json.dumps(_scheduler.report(), ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+
+
+def pytest_terminal_summary(terminalreporter: Any) -> None:
+    if _scheduler is None or _scheduler.collection is None:
+        return
+    data = _scheduler.report()
+    terminalreporter.write_line(
+        f"Раздача xdist по длительностям: воркеров {data['workers']}, с браузером {data['ui_workers']}; "
+        f"нижняя граница {data['lower_bound_s']:.1f} с, по плану {data['planned_s']:.1f} с, "
+        f"фактически {data['actual_s']:.1f} с"
+    )
+
+
+def pytest_report_collectionfinish(config: pytest.Config) -> str:
+    data = startup_profile.to_dict()
+    seconds = {
+        name: "—" if data[name] is None else f"{data[name]:.3f}"
+        for name in ("conftest_loaded_s", "config_resolve_s", "collection_s")
+    }
+    skipped = f", не импортировано модулей по -m: {len(data['skipped_modules'])}" if data["skipped_modules"] else ""
+    heavy = ", ".join(data["heavy_modules_loaded"]) or "нет"
+    return (
+        f"Запуск: до conftest {seconds['conftest_loaded_s']} с, настройки {seconds['config_resolve_s']} с, "
+        f"сбор {seconds['collection_s']} с{skipped}; загружены UI-модули: {heavy}"
+    )
 
 
 @pytest.fixture(scope="session")
-def driver() -> Generator[WebDriver, None, None]:
+def network_filter() -> NetworkFilter:
     """
-    Сессионная фикстура WebDriver для UI-тестов.
+    Правила блокировки запросов браузера для UI-тестов.
 
-    Создаёт экземпляр Chrome в headless-режиме и закрывает его по завершении
-    всех тестов.
+    По умолчанию берутся из KINOPOISK_UI_BLOCKED_TYPES и
+    KINOPOISK_UI_BLOCKED_URLS; набор тестов может переопределить фикстуру.
     """
-    options = Options()
-    options.add_argument("--headless")
-    options.add_argument("--window-size=1920,1080")
-    options.add_argument("--disable-gpu")
-    options.add_argument("--no-sandbox")
+    from utils.network_filter import NetworkFilter
+
+    return NetworkFilter()
+
+
+@pytest.fixture(scope="session")
+def driver_pool(
+    request: pytest.FixtureRequest, network_filter: NetworkFilter
+) -> Generator[WebDriverPool, None, None]:
+    """
+    Сессионный пул прогретых экземпляров Chrome в headless-режиме.
+
+    У каждого процесса pytest (и каждого воркера xdist) свой пул; размер
+    задаётся KINOPOISK_UI_POOL_SIZE. Браузеры открывают страницы со
+    стратегией KINOPOISK_UI_PAGE_LOAD_STRATEGY и блокировкой запросов
+    из network_filter. Время запуска браузеров выводится в начале сессии
+    и пишется в reports/ui_startup.json. Браузеры закрываются по
+    завершении всех тестов процесса.
+    """
+    from utils.driver_factory import create_chrome_driver, prepare_startup
+    from utils.driver_pool import WebDriverPool
+    from utils.page_metrics import get_page_metrics_recorder
+    from utils.site_guard import site_guard
+    from utils.waits import wait_recorder
+
+    if _site_blocked_path is not None:
+        site_guard.state_path = _site_blocked_path
+    site_guard.ensure_open()
+    global _driver_startup_s
+    settings = get_settings()
+    pool = WebDriverPool(
+        functools.partial(
+            create_chrome_driver,
+            page_load_strategy=settings.ui_page_load_strategy,
+            network_filter=network_filter,
+            remote_url=settings.ui_remote_url,
+            profile_template=settings.ui_profile_template_dir,
+        ),
+        size=settings.ui_pool_size,
+        max_uses=settings.ui_driver_max_uses,
+        max_heap_growth_mb=settings.ui_driver_max_heap_growth_mb,
+        ping_timeout=settings.ui_driver_ping_timeout,
+    )
+    started = time.perf_counter()
+    with allure.step("Инициализация пула WebDriver"):
+        startup = prepare_startup(settings.ui_remote_url, settings.ui_profile_template_dir)
+        pool.warm_up()
+        startup["browser_startup_s"] = [round(value, 3) for value in pool.startup_times]
+        report_startup(request.config, startup)
+    _driver_startup_s = time.perf_counter() - started
 
-    service = Service()  # chromedriver берётся из PATH
-    driver_instance: WebDriver = webdriver.Chrome(service=service, options=options)
-    driver_instance.implicitly_wait(10)
+    yield pool
+
+    with allure.step("Закрытие пула WebDriver"):
+        allure.attach(
+            json.dumps(pool.stats(), ensure_ascii=False, indent=2),
+            name="Статистика пула WebDriver",
+            attachment_type=allure.attachment_type.JSON,
+        )
+        pool.close()
+    wait_recorder.report(settings.reports_dir / "ui_waits.json")
+    page_metrics_recorder = get_page_metrics_recorder()
+    if page_metrics_recorder is not None:
+        page_metrics_recorder.report(settings.reports_dir / "ui_page_metrics.json")
+
+
+def report_startup(config: pytest.Config, startup: dict) -> None:
+    """
+    Вывести время запуска браузеров в терминал, файл отчёта и allure.
+    """
+    text = json.dumps(startup, ensure_ascii=False, indent=2)
+    reports_dir = get_settings().reports_dir
+    reports_dir.mkdir(parents=True, exist_ok=True)
+    (reports_dir / "ui_startup.json").write_text(text, encoding="utf-8")
+    allure.attach(text, name="Запуск браузеров", attachment_type=allure.attachment_type.JSON)
+    terminal = config.pluginmanager.get_plugin("terminalreporter")
+    if terminal is not None:
+        times = ", ".join(f"{value:.2f}" for value in startup["browser_startup_s"]) or "—"
+        terminal.write_line(
+            f"WebDriver ({startup['mode']}): подготовка {startup['prepare_s']:.2f} с, запуск браузеров {times} с"
+        )
+
+
+@pytest.fixture
+def driver(request: pytest.FixtureRequest, driver_pool: WebDriverPool) -> Generator[WebDriver, None, None]:
+    """
+    WebDriver для одного UI-теста.
+
+    Браузер берётся из пула уже проверенным и после теста возвращается
+    в пул либо пересоздаётся (см. WebDriverPool.release). Все ожидания
+    элементов в тесте укладываются в общий бюджет KINOPOISK_UI_TEST_WAIT_BUDGET.
+    Если сайт уже показал капчу в этом прогоне, тест пропускается сразу.
+    """
+    from utils.site_guard import site_guard
+    from utils.waits import wait_budget
+
+    global _driver_startup_s
+    # Запуск пула достаётся первому UI-тесту процесса: в истории длительностей
+    # (utils/scheduler.py) он учитывается отдельно от самого теста
+    if _driver_startup_s is not None:
+        request.node.user_properties.append(("driver_startup_s", round(_driver_startup_s, 3)))
+        _driver_startup_s = None
+    site_guard.ensure_open()
+    driver_instance = driver_pool.acquire()
+    try:
+        with wait_budget(get_settings().ui_test_wait_budget) as budget:
+            yield driver_instance
+        allure.attach(
+            json.dumps({"budget_s": budget.total, "spent_s": round(budget.spent, 3)}),
+            name="Время ожиданий теста",
+            attachment_type=allure.attachment_type.JSON,
+        )
+    finally:
+        driver_pool.release(driver_instance)
+
+
+@pytest.fixture(scope="session")
+def session_event_loop() -> Generator[asyncio.AbstractEventLoop, None, None]:
+    """
+    Сессионный цикл событий для асинхронных тестов и фикстур.
+
+    Один цикл на сессию позволяет держать общий асинхронный API-клиент
+    с открытыми соединениями между тестами. Имя отличается от `event_loop`
+    pytest-asyncio, чтобы не конфликтовать с ним, если плагин установлен.
+    """
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_pyfunc_call(pyfuncitem: pytest.Function) -> bool | None:
+    """
+    Запуск тестов, объявленных как `async def`.
+
+    Тест выполняется в сессионном цикле событий, если он (напрямую или
+    через фикстуры) зависит от `session_event_loop`, иначе — в новом цикле.
+    """
+    if not inspect.iscoroutinefunction(pyfuncitem.obj):
+        return None
+
+    funcargs = pyfuncitem.funcargs
+    kwargs = {name: funcargs[name] for name in inspect.signature(pyfuncitem.obj).parameters if name in funcargs}
+    loop: asyncio.AbstractEventLoop | None = funcargs.get("session_event_loop")
+    if loop is None:
+        asyncio.run(pyfuncitem.obj(**kwargs))
+    else:
+        loop.run_until_complete(pyfuncitem.obj(**kwargs))
+    return True
+
+
+@pytest.fixture(scope="session")
+def stub_api() -> Generator[StubApiServer, None, None]:
+    """
+    Локальная заглушка API Кинопоиска на свободном порту.
+
+    Для тестов HTTP-клиента, которым нужен предсказуемый сервер без лимитов
+    настоящего API. Токен заглушки — `stub_api.api_key`.
+    """
+    with StubApiServer() as server:
+        yield server
+
+
+@pytest.fixture(scope="session")
+def movie_index() -> Generator[MovieIndex, None, None]:
+    """
+    Локальный индекс фильмов для проверки поисковой выдачи (utils/movie_index.py).
+
+    Берётся файл KINOPOISK_MOVIE_INDEX, если он собран
+    (`python -m utils.movie_index harvest`) с того же API, что и
+    KINOPOISK_API_URL; иначе пустой индекс — выдача проверяется по
+    названиям из неё самой.
+    """
+    index = open_for_tests(get_settings().movie_index_path)
+    yield index
+    index.close()
+
+
+@pytest.fixture(scope="session")
+def benchmark_session(request: pytest.FixtureRequest) -> Generator[BenchmarkSession, None, None]:
+    """
+    Замеры бенчмарков за сессию.
+
+    Отчёт пишется в reports/benchmarks.json; базовые значения
+    benchmarks/baselines.json перезаписываются только с --bench-update.
+    """
+    settings = get_settings()
+    threshold = request.config.getoption("--bench-threshold")
+    session = BenchmarkSession(
+        BaselineStore(settings.benchmark_baselines),
+        threshold=settings.benchmark_threshold if threshold is None else threshold,
+        update=request.config.getoption("--bench-update"),
+    )
+    yield session
+    session.write_report(settings.reports_dir / "benchmarks.json")
+
+
+@pytest.fixture
+def bench(benchmark_session: BenchmarkSession) -> Callable[..., BenchmarkResult]:
+    """
+    Замерить операцию и упасть, если она стала медленнее базы больше порога.
+
+    Использование:
+        bench("api.request_key", lambda: request_key(...), number=1000)
+    """
 
-    with allure.step("Инициализация WebDriver"):
-        yield driver_instance
+    def run(name: str, func: Callable[[], Any], **kwargs: Any) -> BenchmarkResult:
+        result = measure(name, func, **kwargs)
+        allure.attach(
+            json.dumps(result.to_dict(), ensure_ascii=False, indent=2),
+            name=f"Бенчмарк {name}",
+            attachment_type=allure.attachment_type.JSON,
+        )
+        problem = benchmark_session.check(result)
+        if problem:
+            pytest.fail(f"Регрессия производительности: {problem}")
+        if benchmark_session.missing_baseline(name):
+            pytest.skip(
+                f"Нет базового значения {name} в {get_settings().benchmark_baselines}: "
+                "запишите его через pytest -m benchmark --bench-update"
+            )
+        return result
 
-    with allure.step("Закрытие WebDriver"):
-        driver_instance.quit()
+    return run
@@ -1,25 +1,265 @@
+"""
+Настройки тестов из переменных окружения и файла .env.
+
+Все настройки — поля Settings. get_settings() читает их один раз, при
+первом вызове; модули проекта вызывают её внутри функций, а не при
+импорте, поэтому импорт data.config и модулей utils ничего не читает
+из окружения, пока настройки не понадобились.
+"""
+
 import os
+import time
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-
-from dotenv import load_dotenv
+from typing import Optional, Tuple
 
 ROOT_DIR = Path(__file__).resolve().parents[1]
-load_dotenv(ROOT_DIR / ".env")
 
-BASE_API_URL: str = "https://api.kinopoisk.dev/v1.4"
-BASE_UI_URL: str = "https://www.kinopoisk.ru/"
+# Сколько заняло чтение настроек; None — ещё не читались
+resolve_time_s: Optional[float] = None
+
+
+def _flag(name: str, default: str) -> bool:
+    return os.getenv(name, default) == "1"
+
+
+def _optional_path(name: str) -> Optional[Path]:
+    value = os.getenv(name)
+    return Path(value) if value else None
+
+
+def _items(name: str, default: str) -> Tuple[str, ...]:
+    return tuple(filter(None, os.getenv(name, default).split(",")))
+
+
+@dataclass(frozen=True)
+class Settings:
+    """
+    Настройки тестов. Переменные окружения и значения по умолчанию —
+    в Settings.from_env.
+    """
+
+    # Можно направить на локальную заглушку: см. utils/stub_server.py
+    base_api_url: str
+    # Можно направить на локальные снимки страниц: см. utils/snapshots.py
+    base_ui_url: str
+    # Страница результатов поиска; {query} — поисковый запрос
+    ui_search_url_template: str
+
+    api_key: str
+
+    # Каталог машиночитаемых отчётов (метрики, бенчмарки)
+    reports_dir: Path
+
+    # Базовые значения бенчмарков (utils/benchmark.py)
+    benchmark_baselines: Path
+    benchmark_threshold: float
+
+    # Параметры HTTP-клиента: пул соединений и политика повторов
+    api_timeout: float
+    api_pool_connections: int
+    api_pool_maxsize: int
+    api_max_retries: int
+    api_backoff_factor: float
+    # Максимум одновременных запросов асинхронного клиента
+    api_concurrency: int
+
+    # Кеш ответов API (utils/response_cache.py), по умолчанию выключен
+    api_cache_enabled: bool
+    api_cache_max_entries: int
+    api_cache_max_bytes: int
+    # Каталог дискового уровня кеша; None — кеш только в памяти
+    api_cache_dir: Optional[Path]
+
+    # Клиентский лимит частоты запросов (utils/rate_limiter.py); 0 — выключен
+    api_rate_limit: float
+    api_rate_burst: int
+    api_daily_quota: Optional[int]
+    # Каталог общего для всех процессов состояния лимита; None — системный temp
+    api_rate_state_dir: Optional[Path]
 
-API_KEY: str = os.getenv("KINOPOISK_API_KEY", "").strip()
+    # Дубли медленных GET (utils/resilience.py), по умолчанию выключены: дубль
+    # уходит, если ответа нет дольше перцентиля задержки эндпоинта; дублей
+    # не больше доли api_hedge_max_ratio от всех запросов
+    api_hedge_enabled: bool
+    api_hedge_quantile: float
+    api_hedge_max_ratio: float
+    # Размыкатель цепи, по умолчанию выключен (0): после стольких сбоев подряд
+    # запросы к эндпоинту сразу завершаются ошибкой на api_breaker_reset секунд
+    api_breaker_threshold: int
+    api_breaker_reset: float
 
+    # Раздача тестов воркерам xdist по длительностям прошлых прогонов
+    # (utils/scheduler.py) при `-n N` с раздачей load; False — штатная раздача xdist
+    xdist_duration_scheduler: bool
 
-def get_auth_headers() -> dict:
+    # Пул WebDriver для UI-тестов (utils/driver_pool.py), на каждый процесс pytest
+    ui_pool_size: int
+    # Браузер пересоздаётся после стольких тестов или при таком росте кучи JS, МБ
+    ui_driver_max_uses: int
+    ui_driver_max_heap_growth_mb: float
+    ui_driver_ping_timeout: float
+
+    # Таймаут одного ожидания элемента и общий лимит ожиданий одного UI-теста, секунды
+    ui_wait_timeout: float
+    ui_test_wait_budget: float
+    # Запуск Chrome: путь к chromedriver (None — найти и закешировать через
+    # webdriver-manager), каталог кеша драйверов, шаблон профиля браузера
+    # (None — без шаблона) и адрес долгоживущего сервиса WebDriver
+    # (python -m utils.driver_factory serve), к которому подключаются тесты
+    ui_chromedriver_path: Optional[str]
+    ui_driver_cache_dir: Path
+    ui_profile_template_dir: Optional[Path]
+    ui_remote_url: Optional[str]
+
+    # Стратегия загрузки страниц Chrome: normal | eager | none. При eager/none
+    # готовность страницы определяют явные условия PageObject
+    ui_page_load_strategy: str
+    # Блокировка запросов браузера (utils/network_filter.py): типы ресурсов
+    # и шаблоны адресов; пусто — ничего не блокировать. ui_blocked_bytes —
+    # оценивать размер заблокированного HEAD-запросами (лишний трафик)
+    ui_blocked_resource_types: Tuple[str, ...]
+    ui_blocked_url_patterns: Tuple[str, ...]
+    ui_blocked_bytes: bool
+
+    # Метрики производительности страниц из браузера (utils/page_metrics.py):
+    # сводка — reports/ui_page_metrics.json, временной ряд — JSONL
+    ui_page_metrics: bool
+    ui_page_metrics_series: Path
+
+    # Фоновая запись результатов allure (utils/allure_writer.py), по умолчанию
+    # выключена. Сверх allure_collapse_after повторов одного шага на уровне
+    # шаги сворачиваются в сводку (0 — не сворачивать), из свёрнутых
+    # сохраняется каждый allure_sample_every-й (0 — ни одного)
+    allure_async: bool
+    allure_collapse_after: int
+    allure_sample_every: int
+
+    # Локальный индекс фильмов (utils/movie_index.py): файл sqlite и сколько
+    # байт файла отображать в память
+    movie_index_path: Path
+    movie_index_mmap_size: int
+
+    # Каталог снимков страниц сайта (utils/snapshots.py)
+    snapshot_dir: Path
+
+    # Запись/воспроизведение ответов API: off | record | replay
+    cassette_mode: str
+    cassette_dir: Path
+    # В строгом режиме запрос без записи завершается ошибкой, а не уходит в сеть
+    cassette_strict: bool
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        """
+        Прочитать настройки из окружения и файла .env, если он есть.
+
+        Returns:
+            Settings: Настройки.
+        """
+        env_file = ROOT_DIR / ".env"
+        if env_file.exists():
+            from dotenv import load_dotenv
+
+            load_dotenv(env_file)
+
+        base_ui_url = os.getenv("KINOPOISK_UI_URL", "https://www.kinopoisk.ru/").rstrip("/") + "/"
+        reports_dir = Path(os.getenv("KINOPOISK_REPORTS_DIR", str(ROOT_DIR / "reports")))
+        profile_template = os.getenv("KINOPOISK_UI_PROFILE_TEMPLATE", str(ROOT_DIR / ".cache" / "chrome-profile"))
+        return cls(
+            base_api_url=os.getenv("KINOPOISK_API_URL", "https://api.kinopoisk.dev/v1.4").rstrip("/"),
+            base_ui_url=base_ui_url,
+            ui_search_url_template=os.getenv("KINOPOISK_UI_SEARCH_URL", base_ui_url + "index.php?kp_query={query}"),
+            api_key=os.getenv("KINOPOISK_API_KEY", "").strip(),
+            reports_dir=reports_dir,
+            benchmark_baselines=Path(
+                os.getenv("KINOPOISK_BENCHMARK_BASELINES", str(ROOT_DIR / "benchmarks" / "baselines.json"))
+            ),
+            benchmark_threshold=float(os.getenv("KINOPOISK_BENCHMARK_THRESHOLD", "0.2")),
+            api_timeout=float(os.getenv("KINOPOISK_API_TIMEOUT", "15")),
+            api_pool_connections=int(os.getenv("KINOPOISK_API_POOL_CONNECTIONS", "4")),
+            api_pool_maxsize=int(os.getenv("KINOPOISK_API_POOL_MAXSIZE", "16")),
+            api_max_retries=int(os.getenv("KINOPOISK_API_MAX_RETRIES", "3")),
+            api_backoff_factor=float(os.getenv("KINOPOISK_API_BACKOFF_FACTOR", "0.5")),
+            api_concurrency=int(os.getenv("KINOPOISK_API_CONCURRENCY", "50")),
+            api_cache_enabled=_flag("KINOPOISK_API_CACHE", "0"),
+            api_cache_max_entries=int(os.getenv("KINOPOISK_API_CACHE_MAX_ENTRIES", "1024")),
+            api_cache_max_bytes=int(os.getenv("KINOPOISK_API_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+            api_cache_dir=_optional_path("KINOPOISK_API_CACHE_DIR"),
+            api_rate_limit=float(os.getenv("KINOPOISK_API_RATE_LIMIT", "0")),
+            api_rate_burst=int(os.getenv("KINOPOISK_API_RATE_BURST", "5")),
+            api_daily_quota=(
+                int(os.environ["KINOPOISK_API_DAILY_QUOTA"]) if os.getenv("KINOPOISK_API_DAILY_QUOTA") else None
+            ),
+            api_rate_state_dir=_optional_path("KINOPOISK_API_RATE_STATE_DIR"),
+            api_hedge_enabled=_flag("KINOPOISK_API_HEDGE", "0"),
+            api_hedge_quantile=float(os.getenv("KINOPOISK_API_HEDGE_QUANTILE", "95")),
+            api_hedge_max_ratio=float(os.getenv("KINOPOISK_API_HEDGE_MAX_RATIO", "0.1")),
+            api_breaker_threshold=int(os.getenv("KINOPOISK_API_BREAKER_THRESHOLD", "0")),
+            api_breaker_reset=float(os.getenv("KINOPOISK_API_BREAKER_RESET", "30")),
+            xdist_duration_scheduler=_flag("KINOPOISK_XDIST_SCHEDULER", "1"),
+            ui_pool_size=int(os.getenv("KINOPOISK_UI_POOL_SIZE", "1")),
+            ui_driver_max_uses=int(os.getenv("KINOPOISK_UI_DRIVER_MAX_USES", "50")),
+            ui_driver_max_heap_growth_mb=float(os.getenv("KINOPOISK_UI_DRIVER_MAX_HEAP_GROWTH_MB", "256")),
+            ui_driver_ping_timeout=float(os.getenv("KINOPOISK_UI_DRIVER_PING_TIMEOUT", "2")),
+            ui_wait_timeout=float(os.getenv("KINOPOISK_UI_WAIT_TIMEOUT", "10")),
+            ui_test_wait_budget=float(os.getenv("KINOPOISK_UI_TEST_WAIT_BUDGET", "60")),
+            ui_chromedriver_path=os.getenv("KINOPOISK_CHROMEDRIVER") or None,
+            ui_driver_cache_dir=Path(os.getenv("KINOPOISK_DRIVER_CACHE_DIR", str(ROOT_DIR / ".cache" / "webdriver"))),
+            ui_profile_template_dir=Path(profile_template) if profile_template else None,
+            ui_remote_url=os.getenv("KINOPOISK_UI_REMOTE_URL") or None,
+            ui_page_load_strategy=os.getenv("KINOPOISK_UI_PAGE_LOAD_STRATEGY", "eager").strip().lower(),
+            ui_blocked_resource_types=_items("KINOPOISK_UI_BLOCKED_TYPES", "image,media,font"),
+            ui_blocked_url_patterns=_items(
+                "KINOPOISK_UI_BLOCKED_URLS",
+                "*mc.yandex.ru/*,*an.yandex.ru/*,*yandex.ru/ads/*,*ads.adfox.ru/*,"
+                "*googletagmanager.com/*,*google-analytics.com/*,*top-fwz1.mail.ru/*",
+            ),
+            ui_blocked_bytes=_flag("KINOPOISK_UI_BLOCKED_BYTES", "0"),
+            ui_page_metrics=_flag("KINOPOISK_UI_PAGE_METRICS", "0"),
+            ui_page_metrics_series=Path(
+                os.getenv("KINOPOISK_UI_PAGE_METRICS_SERIES", str(reports_dir / "ui_page_metrics.jsonl"))
+            ),
+            allure_async=_flag("KINOPOISK_ALLURE_ASYNC", "0"),
+            allure_collapse_after=int(os.getenv("KINOPOISK_ALLURE_COLLAPSE_AFTER", "50")),
+            allure_sample_every=int(os.getenv("KINOPOISK_ALLURE_SAMPLE_EVERY", "0")),
+            movie_index_path=Path(os.getenv("KINOPOISK_MOVIE_INDEX", str(ROOT_DIR / ".cache" / "movie_index.sqlite"))),
+            movie_index_mmap_size=int(os.getenv("KINOPOISK_MOVIE_INDEX_MMAP_SIZE", str(256 * 1024 * 1024))),
+            snapshot_dir=Path(os.getenv("KINOPOISK_SNAPSHOT_DIR", str(ROOT_DIR / "snapshots"))),
+            cassette_mode=os.getenv("KINOPOISK_CASSETTE_MODE", "off").strip().lower(),
+            cassette_dir=Path(os.getenv("KINOPOISK_CASSETTE_DIR", str(ROOT_DIR / "cassettes"))),
+            cassette_strict=_flag("KINOPOISK_CASSETTE_STRICT", "0"),
+        )
+
+
+@lru_cache(maxsize=None)
+def get_settings() -> Settings:
+    """
+    Настройки процесса: читаются из окружения при первом вызове.
+
+    Returns:
+        Settings: Настройки.
+    """
+    global resolve_time_s
+    started = time.perf_counter()
+    settings = Settings.from_env()
+    resolve_time_s = time.perf_counter() - started
+    return settings
+
+
+def get_auth_headers(api_key: Optional[str] = None) -> dict:
     """
     Сформировать заголовки авторизации для запросов к API Кинопоиска.
 
+    Args:
+        api_key: Токен API; по умолчанию — KINOPOISK_API_KEY из окружения.
+
     Returns:
         dict: Словарь HTTP-заголовков с токеном, если он задан.
     """
+    token = get_settings().api_key if api_key is None else api_key
     headers: dict = {"Accept": "application/json"}
-    if API_KEY:
-        headers["x-api-key"] = API_KEY
+    if token:
+        headers["x-api-key"] = token
     return headers
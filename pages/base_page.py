@@ -1,9 +1,76 @@
-from typing import Optional
+import json
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
+import allure
+from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.chrome.webdriver import WebDriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.support.ui import WebDriverWait
+
+from data.config import get_settings
+from utils.network_filter import NavigationTraffic, collect_traffic
+from utils.page_metrics import collect_page_metrics, get_page_metrics_recorder
+from utils.site_guard import CAPTCHA_MARKER, site_guard
+from utils.waits import STATE_CLICKABLE, STATE_PRESENT, STATE_VISIBLE, WaitEngine, locator_to_selector
+
+# Поля, которые extract умеет читать у элемента; "attr:<имя>" — атрибут
+EXTRACT_FIELDS: Tuple[str, ...] = ("text", "href", "visible")
+
+# Чтение полей элемента на стороне страницы (см. EXTRACT_FIELDS)
+_READ_JS = """
+function isVisible(el) {
+    if (!el.getClientRects().length) return false;
+    const style = window.getComputedStyle(el);
+    return style.visibility !== "hidden" && style.display !== "none" && style.opacity !== "0";
+}
+function read(el, field) {
+    if (field === "text") return (el.innerText || el.textContent || "").trim();
+    if (field === "href") return el.href || el.getAttribute("href");
+    if (field === "visible") return isVisible(el);
+    return el.getAttribute(field.slice(5));
+}
+"""
+
+# Один запрос к браузеру на все локаторы: элементы ищутся и читаются
+# на стороне страницы, обратно возвращаются только данные
+_EXTRACT_SCRIPT = _READ_JS + """
+const queries = arguments[0];
+const result = {};
+function find(query) {
+    if (query.xpath) {
+        const snapshot = document.evaluate(
+            query.selector, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+        const nodes = [];
+        for (let i = 0; i < snapshot.snapshotLength; i++) nodes.push(snapshot.snapshotItem(i));
+        return nodes;
+    }
+    return Array.from(document.querySelectorAll(query.selector));
+}
+for (const query of queries) {
+    const nodes = find(query);
+    const limit = query.limit === null ? nodes.length : Math.min(query.limit, nodes.length);
+    const items = [];
+    if (query.fields.length) {
+        for (let i = 0; i < limit; i++) {
+            const item = {};
+            for (const field of query.fields) item[field] = read(nodes[i], field);
+            items.push(item);
+        }
+    }
+    result[query.name] = {count: nodes.length, items: items};
+}
+return result;
+"""
+
+# Поля одного элемента, уже найденного WebDriver
+_READ_ELEMENT_SCRIPT = _READ_JS + """
+const el = arguments[0], fields = arguments[1];
+const item = {};
+for (const field of fields) item[field] = read(el, field);
+return item;
+"""
+
+# Запрос на извлечение: локатор и поля (предел элементов — аргумент limit у extract)
+ExtractQuery = Tuple[Tuple[str, str], Sequence[str]]
 
 
 class BasePage:
@@ -13,18 +80,79 @@ class BasePage:
     Содержит общие методы работы с WebDriver.
     """
 
-    def __init__(self, driver: WebDriver, timeout: int = 10) -> None:
+    def __init__(self, driver: WebDriver, timeout: Optional[float] = None) -> None:
+        """
+        Args:
+            driver: WebDriver.
+            timeout: Таймаут одного ожидания, секунды; по умолчанию —
+                KINOPOISK_UI_WAIT_TIMEOUT.
+        """
         self.driver: WebDriver = driver
-        self.wait: WebDriverWait = WebDriverWait(driver, timeout)
+        self.waits: WaitEngine = WaitEngine(driver, get_settings().ui_wait_timeout if timeout is None else timeout)
+        self.last_traffic: Optional[NavigationTraffic] = None
 
-    def open(self, url: str) -> None:
+    def open(self, url: str, ready: Sequence[tuple[By, str]] = ()) -> None:
         """
         Открыть указанный URL в браузере.
 
+        При стратегии загрузки eager/none driver.get не ждёт картинок
+        и скриптов, поэтому готовность страницы проверяется явно
+        (см. wait_ready). Трафик навигации и, при KINOPOISK_UI_PAGE_METRICS=1,
+        метрики Performance API страницы прикладываются к allure-отчёту.
+
         Args:
             url: Полный адрес страницы.
+            ready: Локаторы, появление любого из которых означает
+                готовность страницы.
+
+        Raises:
+            SiteBlockedError: Сайт показал капчу (тест пропускается).
         """
+        site_guard.ensure_open()
+        previous = self.waits.navigation_marker()
         self.driver.get(url)
+        self.wait_ready(ready, previous)
+        self.last_traffic = collect_traffic(self.driver, url, estimate_saved=get_settings().ui_blocked_bytes)
+        allure.attach(
+            json.dumps(self.last_traffic.to_dict(), ensure_ascii=False, indent=2),
+            name=f"Трафик: {url}",
+            attachment_type=allure.attachment_type.JSON,
+        )
+        page_metrics_recorder = get_page_metrics_recorder()
+        if page_metrics_recorder is not None:
+            metrics = collect_page_metrics(self.driver)
+            pattern = page_metrics_recorder.record(url, metrics)
+            allure.attach(
+                json.dumps(metrics, ensure_ascii=False, indent=2),
+                name=f"Метрики страницы {pattern}",
+                attachment_type=allure.attachment_type.JSON,
+            )
+
+    def wait_ready(self, ready: Sequence[tuple[By, str]] = (), previous: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Дождаться разбора документа и, если заданы, появления любого
+        из элементов готовности.
+
+        Если передан маркер документа до навигации, ожидание начинается
+        только на новом документе: элементы готовности на предыдущей
+        странице (например, выдача прошлого поиска) её не завершают.
+
+        Страница капчи проверяется сразу после разбора документа, а её
+        элементы входят в условие готовности: на капче ожидание
+        заканчивается сразу, а не по таймауту.
+
+        Args:
+            ready: Локаторы элементов готовности.
+            previous: Маркер документа до навигации (WaitEngine.navigation_marker).
+
+        Raises:
+            SiteBlockedError: Сайт показал капчу (тест пропускается).
+        """
+        self.waits.until_document_ready(previous=previous)
+        site_guard.check(self.driver)
+        if ready:
+            self.waits.until([*ready, CAPTCHA_MARKER], STATE_PRESENT)
+            site_guard.check(self.driver)
 
     def click(self, locator: tuple[By, str]) -> None:
         """
@@ -33,9 +161,42 @@ class BasePage:
         Args:
             locator: Кортеж (By, locator_string).
         """
-        element = self.wait.until(EC.element_to_be_clickable(locator))
+        element = self.waits.until([locator], STATE_CLICKABLE)
         element.click()
 
+    def click_and_wait(
+        self,
+        locator: tuple[By, str],
+        ready: Sequence[tuple[By, str]] = (),
+        fields: Sequence[str] = (),
+    ) -> Dict[str, Any]:
+        """
+        Клик по ссылке и ожидание открывшейся страницы.
+
+        Кликается первый кликабельный элемент локатора; его поля читаются
+        до клика, пока элемент ещё на странице.
+
+        Args:
+            locator: Кортеж (By, locator_string).
+            ready: Локаторы элементов готовности новой страницы.
+            fields: Поля кликнутого элемента (см. EXTRACT_FIELDS).
+
+        Returns:
+            dict: Поле -> значение у кликнутого элемента.
+
+        Raises:
+            SiteBlockedError: Сайт показал капчу (тест пропускается).
+        """
+        previous = self.waits.navigation_marker()
+        element = self.waits.until([locator], STATE_CLICKABLE)
+        item: Dict[str, Any] = (
+            self.driver.execute_script(_READ_ELEMENT_SCRIPT, element, list(fields)) if fields else {}
+        )
+        element.click()
+        self.waits.until_url_changes(previous["href"])
+        self.wait_ready(ready, previous)
+        return item
+
     def type(self, locator: tuple[By, str], value: str, clear: bool = True) -> None:
         """
         Ввести текст в поле ввода.
@@ -45,7 +206,7 @@ class BasePage:
             value: Текст, который нужно ввести.
             clear: Нужно ли предварительно очищать поле.
         """
-        element = self.wait.until(EC.visibility_of_element_located(locator))
+        element = self.waits.until([locator], STATE_VISIBLE)
         if clear:
             element.clear()
         element.send_keys(value)
@@ -53,7 +214,7 @@ class BasePage:
     def get_text(
         self,
         locator: tuple[By, str],
-        timeout: Optional[int] = None,
+        timeout: Optional[float] = None,
     ) -> str:
         """
         Получить текст элемента.
@@ -65,10 +226,26 @@ class BasePage:
         Returns:
             str: Текст элемента.
         """
-        wait = self.wait if timeout is None else WebDriverWait(self.driver, timeout)
-        element = wait.until(EC.visibility_of_element_located(locator))
+        element = self.waits.until([locator], STATE_VISIBLE, timeout=timeout)
         return element.text
 
+    def is_visible(self, locator: tuple[By, str], timeout: Optional[float] = None) -> bool:
+        """
+        Проверить, что элемент появился и виден.
+
+        Args:
+            locator: Кортеж (By, locator_string).
+            timeout: Переопределить таймаут ожидания.
+
+        Returns:
+            bool: True, если элемент стал видимым за время ожидания.
+        """
+        try:
+            self.waits.until([locator], STATE_VISIBLE, timeout=timeout)
+            return True
+        except TimeoutException:
+            return False
+
     def elements_count(self, locator: tuple[By, str]) -> int:
         """
         Подсчитать количество элементов по локатору.
@@ -79,5 +256,35 @@ class BasePage:
         Returns:
             int: Количество элементов.
         """
-        elements = self.driver.find_elements(*locator)
-        return len(elements)
+        return self.extract({"elements": (locator, ())})["elements"]["count"]
+
+    def extract(
+        self,
+        queries: Dict[str, ExtractQuery],
+        limit: Optional[int] = None,
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Прочитать данные элементов по нескольким локаторам за один вызов
+        execute_script вместо отдельного запроса на каждый элемент и поле.
+
+        Пример:
+            page.extract({"links": ((By.CSS_SELECTOR, "a"), ("text", "href"))})
+
+        Args:
+            queries: Имя результата -> (локатор, поля). Поля — из
+                EXTRACT_FIELDS или "attr:<имя атрибута>"; без полей
+                возвращается только количество.
+            limit: Сколько первых элементов каждого локатора читать
+                (количество считается по всем).
+
+        Returns:
+            dict: Имя результата -> {"count": int, "items": [dict, ...]}.
+        """
+        payload: List[Dict[str, Any]] = []
+        for name, (locator, fields) in queries.items():
+            for field in fields:
+                if field not in EXTRACT_FIELDS and not field.startswith("attr:"):
+                    raise ValueError(f"Неизвестное поле для извлечения: {field}")
+            payload.append({"name": name, "limit": limit, "fields": list(fields), **locator_to_selector(locator)})
+        return self.driver.execute_script(_EXTRACT_SCRIPT, payload)
+
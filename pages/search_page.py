@@ -1,11 +1,33 @@
-from typing import Tuple
+import re
+from typing import Dict, List, NamedTuple, Optional, Tuple
 
 import allure
 from selenium.webdriver.common.by import By
 from selenium.webdriver.remote.webdriver import WebDriver
-from selenium.webdriver.support import expected_conditions as EC  # type: ignore[import]
 
+from data.config import get_settings
 from pages.base_page import BasePage
+from utils.movie_index import MovieIndex
+
+_MOVIE_ID = re.compile(r"/(?:film|series)/(\d+)")
+
+
+class ResultCard(NamedTuple):
+    """
+    Карточка фильма/сериала в поисковой выдаче.
+    """
+
+    title: str
+    href: str
+    visible: bool
+
+    @property
+    def movie_id(self) -> Optional[int]:
+        """
+        Id фильма/сериала из адреса карточки (/film/<id>/) или None.
+        """
+        match = _MOVIE_ID.search(self.href)
+        return int(match.group(1)) if match else None
 
 
 class SearchPage(BasePage):
@@ -13,8 +35,10 @@ class SearchPage(BasePage):
     PageObject для главной страницы и страницы поиска Кинопоиска.
     """
 
-    # Главная страница
-    URL = "https://www.kinopoisk.ru/"
+    # Главная страница и страница результатов поиска ({query} — запрос)
+    # по умолчанию; экземпляр открывает self.url / self.search_url_template
+    URL: str = "https://www.kinopoisk.ru/"
+    SEARCH_URL_TEMPLATE: str = URL + "index.php?kp_query={query}"
 
     # Очень общий локатор для любого input на странице
     SEARCH_INPUT: Tuple[str, str] = (By.XPATH, "//input")
@@ -30,15 +54,33 @@ class SearchPage(BasePage):
         'a[href*="/film/"], a[href*="/series/"]',
     )
 
-    def __init__(self, driver: WebDriver) -> None:
+    # Сообщение о пустой выдаче
+    EMPTY_RESULTS: Tuple[str, str] = (By.XPATH, "//*[contains(text(), 'ничего не найдено')]")
+
+    def __init__(self, driver: WebDriver, base_url: Optional[str] = None) -> None:
+        """
+        Args:
+            driver: WebDriver.
+            base_url: Адрес другого экземпляра сайта (например, сервера
+                снимков utils/snapshots.py) вместо KINOPOISK_UI_URL.
+        """
         super().__init__(driver)
+        # Адреса этого экземпляра: из KINOPOISK_UI_URL / KINOPOISK_UI_SEARCH_URL
+        # (по умолчанию — URL / SEARCH_URL_TEMPLATE) или от base_url
+        if base_url is None:
+            settings = get_settings()
+            self.url: str = settings.base_ui_url
+            self.search_url_template: str = settings.ui_search_url_template
+        else:
+            self.url = base_url.rstrip("/") + "/"
+            self.search_url_template = self.url + "index.php?kp_query={query}"
 
     @allure.step("Открыть главную страницу Кинопоиска")
     def open_main_page(self) -> None:
         """
         Открывает главную страницу Кинопоиска.
         """
-        self.open(self.URL)
+        self.open(self.url, ready=[self.SEARCH_INPUT])
 
     @allure.step('Открыть страницу поиска по запросу: "{query}"')
     def search(self, query: str) -> None:
@@ -49,8 +91,10 @@ class SearchPage(BasePage):
         Args:
             query (str): поисковый запрос.
         """
-        search_url = f"https://www.kinopoisk.ru/index.php?kp_query={query}"
-        self.open(search_url)
+        search_url = self.search_url_template.format(query=query)
+        # Страница готова, когда отрисована выдача или сообщение о том,
+        # что ничего не найдено
+        self.open(search_url, ready=[self.RESULTS_TITLES, self.EMPTY_RESULTS])
 
     @allure.step("Получить количество результатов в выдаче")
     def get_results_count(self) -> int:
@@ -60,8 +104,72 @@ class SearchPage(BasePage):
         Returns:
             int: число найденных элементов.
         """
-        elements = self.driver.find_elements(*self.RESULTS_TITLES)
-        return len(elements)
+        return self.elements_count(self.RESULTS_TITLES)
+
+    @allure.step("Получить карточки результатов поиска")
+    def get_result_cards(self, limit: Optional[int] = None) -> List[ResultCard]:
+        """
+        Прочитать все карточки выдачи за один запрос к браузеру.
+
+        На одну карточку в выдаче приходится несколько ссылок (постер,
+        название), поэтому ссылки объединяются по адресу, а названием
+        карточки считается первый непустой текст.
+
+        Args:
+            limit: Сколько первых ссылок выдачи читать.
+
+        Returns:
+            list: Карточки в порядке выдачи.
+        """
+        data = self.extract({"results": (self.RESULTS_TITLES, ("text", "href", "visible"))}, limit=limit)
+        cards: Dict[str, ResultCard] = {}
+        for item in data["results"]["items"]:
+            href = item["href"] or ""
+            card = cards.get(href)
+            if card is None:
+                cards[href] = ResultCard(item["text"], href, item["visible"])
+            elif not card.title and item["text"]:
+                cards[href] = card._replace(title=item["text"])
+            elif item["visible"] and not card.visible:
+                cards[href] = card._replace(visible=True)
+        return list(cards.values())
+
+    @allure.step('Сверить выдачу по запросу "{query}" с индексом фильмов')
+    def get_plausible_results(self, query: str, index: MovieIndex, limit: Optional[int] = None) -> List[ResultCard]:
+        """
+        Карточки выдачи, правдоподобные для запроса по локальному индексу
+        фильмов (utils/movie_index.py): название на карточке должно
+        содержать слова запроса, а фильм из индекса ещё и его названия в индексе.
+
+        Args:
+            query: Поисковый запрос.
+            index: Индекс фильмов.
+            limit: Сколько первых ссылок выдачи читать.
+
+        Returns:
+            list: Правдоподобные карточки в порядке выдачи.
+        """
+        return [
+            card
+            for card in self.get_result_cards(limit=limit)
+            if index.is_plausible(query, card.movie_id, card.title)
+        ]
+
+    @allure.step("Открыть первый результат поиска")
+    def open_first_result(self) -> Optional[ResultCard]:
+        """
+        Кликнуть по первому фильму/сериалу из выдачи и дождаться его страницы.
+
+        Returns:
+            ResultCard | None: Карточка, по которой кликнули (первая
+            кликабельная в выдаче), или None, если выдача пуста.
+        """
+        cards = self.get_result_cards()
+        if not cards:
+            return None
+        clicked = self.click_and_wait(self.FIRST_RESULT_TITLE, fields=("text", "href"))
+        href = clicked["href"] or ""
+        return next((card for card in cards if card.href == href), ResultCard(clicked["text"], href, True))
 
     @allure.step("Проверить, что поле поиска отображается")
     def is_search_input_visible(self) -> bool:
@@ -71,8 +179,4 @@ class SearchPage(BasePage):
         Returns:
             bool: True, если найден и виден хотя бы один input.
         """
-        try:
-            self.wait.until(EC.visibility_of_element_located(self.SEARCH_INPUT))
-            return True
-        except Exception:
-            return False
+        return self.is_visible(self.SEARCH_INPUT)
@@ -0,0 +1,96 @@
+import json
+
+import pytest
+
+from data.config import get_auth_headers
+from data.test_data import CYRILLIC_QUERY, DIGIT_QUERY, GENRE_FANTASY
+from utils.api_client import KinopoiskApiClient
+from utils.http_records import request_key
+from utils.metrics import StreamingHistogram
+from utils.models import MoviePage
+from utils.movie_index import MovieIndex
+from utils.schemas import validate_payload
+from utils.stub_server import StubApiServer, build_movies
+
+# Бенчмарки запускаются отдельно: pytest -m benchmark
+pytestmark = pytest.mark.benchmark
+
+
+def test_bench_request_key(bench) -> None:
+    """
+    Микробенчмарк: построение ключа запроса для кеша и cassette.
+    """
+    url = f"https://api.kinopoisk.dev/v1.4/movie?genres.name={GENRE_FANTASY}&page=3&limit=250"
+    headers = get_auth_headers()
+    bench("micro.request_key", lambda: request_key("GET", url, headers), number=2000)
+
+
+def test_bench_histogram_add(bench) -> None:
+    """
+    Микробенчмарк: добавление замера в потоковую гистограмму задержек.
+    """
+    histogram = StreamingHistogram()
+    bench("micro.histogram_add", lambda: histogram.add(0.0421), number=10000)
+
+
+def test_bench_movie_page_parse(bench, stub_api: StubApiServer) -> None:
+    """
+    Микробенчмарк: разбор страницы из 250 фильмов в модели MoviePage.
+    """
+    client = KinopoiskApiClient(base_url=stub_api.url, api_key=stub_api.api_key)
+    raw = client._fetch_page("/movie", {}, page=1, limit=250)
+    payload = json.dumps(raw, ensure_ascii=False).encode("utf-8")
+    bench("micro.movie_page_parse_250", lambda: MoviePage.from_payload(json.loads(payload)), number=20)
+
+
+def test_bench_schema_validation(bench) -> None:
+    """
+    Микробенчмарк: проверка по схеме страницы из 10 тыс. полных документов.
+    """
+    docs = build_movies(10000)
+    payload = {"docs": docs, "total": len(docs), "limit": len(docs), "page": 1, "pages": 1}
+    bench("micro.schema_validate_10k", lambda: validate_payload("/movie", payload), number=5)
+
+
+def test_bench_movie_index_lookup(bench, tmp_path) -> None:
+    """
+    Микробенчмарк: проверка фильма из выдачи по индексу из 20 тыс. фильмов.
+    """
+    with MovieIndex(tmp_path / "movies.sqlite") as index:
+        index.upsert(build_movies(20000))
+        bench("micro.movie_index_plausible", lambda: index.is_plausible(CYRILLIC_QUERY, 1000), number=2000)
+
+
+def test_bench_search_with_connection_reuse(bench, stub_api: StubApiServer) -> None:
+    """
+    Макробенчмарк: поиск через общий клиент с пулом keep-alive соединений.
+    """
+    client = KinopoiskApiClient(base_url=stub_api.url, api_key=stub_api.api_key)
+    bench("macro.search_reuse", lambda: client.search_movie_by_query(DIGIT_QUERY), number=50)
+    client.close()
+
+
+def test_bench_search_without_connection_reuse(bench, stub_api: StubApiServer) -> None:
+    """
+    Макробенчмарк: поиск с новым клиентом (и новым соединением) на каждый запрос.
+    """
+
+    def search_with_fresh_client() -> None:
+        client = KinopoiskApiClient(base_url=stub_api.url, api_key=stub_api.api_key)
+        client.search_movie_by_query(DIGIT_QUERY)
+        client.close()
+
+    bench("macro.search_no_reuse", search_with_fresh_client, number=50)
+
+
+def test_bench_iter_genre_pages(bench, stub_api: StubApiServer) -> None:
+    """
+    Макробенчмарк: перебор всех фильмов жанра страницами с предзагрузкой.
+    """
+    client = KinopoiskApiClient(base_url=stub_api.url, api_key=stub_api.api_key)
+    bench(
+        "macro.iter_genre_pages",
+        lambda: sum(1 for _ in client.iter_movies_by_genre(GENRE_FANTASY, limit=50)),
+        repeat=5,
+    )
+    client.close()
@@ -0,0 +1,76 @@
+from pathlib import Path
+from typing import Generator
+
+import pytest
+
+from data.test_data import CYRILLIC_QUERY
+from pages.search_page import SearchPage
+from utils.snapshots import SnapshotServer, SnapshotStore, snapshot_key
+
+# Бенчмарки запускаются отдельно: pytest -m benchmark
+pytestmark = pytest.mark.benchmark
+
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+
+
+@pytest.fixture(scope="module")
+def local_site(tmp_path_factory: pytest.TempPathFactory) -> Generator[SnapshotServer, None, None]:
+    """
+    Сервер снимков, отдающий локальную копию страницы результатов поиска
+    на главной странице и по запросу CYRILLIC_QUERY.
+    """
+    store = SnapshotStore(tmp_path_factory.mktemp("snapshots"))
+    html = (FIXTURES_DIR / "search_results.html").read_bytes()
+    for key in ("/", snapshot_key(f"/index.php?kp_query={CYRILLIC_QUERY}")):
+        store.put(key, html, "text/html; charset=utf-8")
+    with SnapshotServer(store) as server:
+        yield server
+
+
+@pytest.fixture
+def results_page(driver, local_site: SnapshotServer) -> SearchPage:
+    """
+    SearchPage на сервере снимков, открытая на странице результатов поиска.
+    """
+    page = SearchPage(driver, base_url=local_site.url)
+    page.search(CYRILLIC_QUERY)
+    return page
+
+
+def test_bench_open_local_results(bench, results_page: SearchPage) -> None:
+    """
+    Макробенчмарк: поиск (SearchPage.search) на локальном сервере снимков.
+    """
+    bench("ui.open_local_results", lambda: results_page.search(CYRILLIC_QUERY), repeat=5)
+
+
+def test_bench_results_count(bench, results_page: SearchPage) -> None:
+    """
+    Микробенчмарк: подсчёт карточек в выдаче (SearchPage.get_results_count).
+    """
+    bench("ui.get_results_count", results_page.get_results_count, number=10)
+
+
+def test_bench_search_input_visible(bench, results_page: SearchPage) -> None:
+    """
+    Микробенчмарк: проверка видимости поля поиска.
+    """
+    bench("ui.is_search_input_visible", results_page.is_search_input_visible, number=10)
+
+
+def test_bench_elements_count(bench, results_page: SearchPage) -> None:
+    """
+    Микробенчмарк: BasePage.elements_count по локатору результатов.
+    """
+    bench(
+        "ui.elements_count",
+        lambda: results_page.elements_count(results_page.RESULTS_TITLES),
+        number=10,
+    )
+
+
+def test_bench_result_cards(bench, results_page: SearchPage) -> None:
+    """
+    Микробенчмарк: чтение всех карточек выдачи одним вызовом execute_script.
+    """
+    bench("ui.get_result_cards", results_page.get_result_cards, number=10)
@@ -0,0 +1,64 @@
+import json
+from pathlib import Path
+
+import allure
+from allure_commons import model2
+
+from utils.allure_writer import BackgroundAllureWriter
+
+
+@allure.feature("Отчёт allure")
+@allure.title("Фоновая запись результатов allure сворачивает повторяющиеся шаги")
+@allure.description("Результат и вложения пишутся из очереди; сверх порога повторы шага сворачиваются в сводку.")
+def test_background_allure_writer_collapses_repeated_steps(tmp_path: Path) -> None:
+    """
+    Из 10 шагов перебора страниц остаются первые 3, каждый 4-й сверх
+    порога и упавший шаг; остальные сворачиваются в один шаг-сводку
+    со ссылками на их вложения. После close все файлы уже на диске.
+    """
+    writer = BackgroundAllureWriter(tmp_path, collapse_after=3, sample_every=4)
+    steps = []
+    for page in range(1, 11):
+        attachment = model2.Attachment(
+            name=f"Ответ {page}", source=f"{page}-attachment.json", type=allure.attachment_type.JSON.mime_type
+        )
+        writer.report_attached_data(json.dumps({"page": page}), attachment.source)
+        steps.append(
+            model2.TestStepResult(
+                name=f"GET /movie страница {page} (limit=50)",
+                status=model2.Status.FAILED if page == 6 else model2.Status.PASSED,
+                start=page * 100,
+                stop=page * 100 + 50,
+                attachments=[attachment],
+            )
+        )
+    steps.append(model2.TestStepResult(name="Проверить выдачу", status=model2.Status.PASSED))
+    result = model2.TestResult(uuid="1", name="перебор страниц", status=model2.Status.FAILED, steps=steps)
+    writer.report_result(result)
+    writer.close()
+
+    with allure.step("Проверить, что результат и все вложения записаны"):
+        results = list(tmp_path.glob("*-result.json"))
+        assert len(results) == 1
+        assert len(list(tmp_path.glob("*-attachment.json"))) == 10
+        assert not list(tmp_path.glob("*.tmp"))
+        stats = writer.stats()
+        assert stats["written"] == 11 and stats["errors"] == 0 and stats["queued"] == 0
+
+    with allure.step("Проверить свёрнутые шаги"):
+        written = json.loads(results[0].read_text(encoding="utf-8"))["steps"]
+        names = [step["name"] for step in written]
+        assert names == [
+            "GET /movie страница 1 (limit=50)",
+            "GET /movie страница 2 (limit=50)",
+            "GET /movie страница 3 (limit=50)",
+            "GET /movie страница 4 (limit=50)",
+            "GET /movie страница … (limit=…) — ещё 4 шага свёрнуто",
+            "GET /movie страница 6 (limit=50)",
+            "GET /movie страница 8 (limit=50)",
+            "Проверить выдачу",
+        ]
+        summary = written[4]
+        assert (summary["start"], summary["stop"]) == (500, 1050)
+        assert [item["name"] for item in summary["attachments"]] == [f"Ответ {page}" for page in (5, 7, 9, 10)]
+        assert stats["collapsed_steps"] == 4 and stats["sampled_steps"] == 2
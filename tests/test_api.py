@@ -1,6 +1,11 @@
+import asyncio
+import json
+from collections.abc import Generator
+
 import allure
 import pytest
 
+from data.config import get_settings
 from data.test_data import (
     CYRILLIC_QUERY,
     DIGIT_QUERY,
@@ -8,6 +13,15 @@ from data.test_data import (
     SYMBOL_QUERY,
 )
 from utils.api_client import KinopoiskApiClient
+from utils.async_api_client import AsyncApiResponse, AsyncKinopoiskApiClient
+from utils.metrics import LatencyRecorder
+from utils.models import Movie, MoviePage
+from utils.movie_index import MovieIndex
+from utils.rate_limiter import build_default_rate_limiter
+from utils.resilience import build_default_breaker, build_default_hedge
+from utils.response_cache import build_default_cache
+from utils.schemas import validate_payload
+from utils.stub_server import StubApiServer
 
 
 # По заданию должны быть режимы запуска: отдельно API, отдельно UI, все вместе.
@@ -16,14 +30,94 @@ pytestmark = pytest.mark.api
 
 
 @pytest.fixture(scope="session")
-def api_client() -> KinopoiskApiClient:
+def api_client() -> Generator[KinopoiskApiClient, None, None]:
     """
     Фикстура для создания экземпляра API-клиента Кинопоиска.
 
+    Клиент общий на всю сессию, поэтому соединения из его пула
+    переиспользуются всеми API-тестами. Кеш ответов подключается
+    переменной окружения KINOPOISK_API_CACHE=1, лимит частоты —
+    KINOPOISK_API_RATE_LIMIT, дубли медленных запросов — KINOPOISK_API_HEDGE=1,
+    размыкатель цепи — KINOPOISK_API_BREAKER_THRESHOLD. По завершении
+    сессии статистика пула, кеша, использования квоты, задержек по
+    эндпоинтам, дублей и размыкателя прикладывается к allure-отчёту;
+    задержки пишутся в reports/api_latency.json, дубли и размыкатель —
+    в reports/api_resilience.json.
+
     Returns:
         KinopoiskApiClient: инициализированный клиент.
     """
-    return KinopoiskApiClient()
+    latency = LatencyRecorder()
+    client = KinopoiskApiClient(
+        cache=build_default_cache(),
+        rate_limiter=build_default_rate_limiter(get_settings().api_key),
+        hedge=build_default_hedge(latency),
+        breaker=build_default_breaker(),
+    )
+    client.add_hook(latency)
+    yield client
+
+    reports_dir = get_settings().reports_dir
+    latency.report(reports_dir / "api_latency.json")
+    resilience = {
+        "hedging": client.hedge.stats() if client.hedge is not None else None,
+        "circuit_breaker": client.breaker.stats() if client.breaker is not None else None,
+    }
+    resilience_text = json.dumps(resilience, ensure_ascii=False, indent=2)
+    (reports_dir / "api_resilience.json").write_text(resilience_text, encoding="utf-8")
+    allure.attach(
+        resilience_text,
+        name="Дубли запросов и размыкатель цепи",
+        attachment_type=allure.attachment_type.JSON,
+    )
+    allure.attach(
+        json.dumps(client.pool_stats(), ensure_ascii=False, indent=2),
+        name="Статистика пула HTTP-соединений",
+        attachment_type=allure.attachment_type.JSON,
+    )
+    if client.cache is not None:
+        allure.attach(
+            json.dumps(client.cache.stats(), ensure_ascii=False, indent=2),
+            name="Статистика кеша ответов",
+            attachment_type=allure.attachment_type.JSON,
+        )
+    if client.rate_limiter is not None:
+        allure.attach(
+            json.dumps(client.rate_limiter.usage(), ensure_ascii=False, indent=2),
+            name="Использование квоты API",
+            attachment_type=allure.attachment_type.JSON,
+        )
+    client.close()
+
+
+@pytest.fixture(scope="session")
+def async_api_client(
+    session_event_loop: asyncio.AbstractEventLoop,
+) -> Generator[AsyncKinopoiskApiClient, None, None]:
+    """
+    Фикстура асинхронного API-клиента, общего на всю сессию.
+
+    Клиент живёт в сессионном цикле событий `session_event_loop`, в нём же
+    выполняются `async def`-тесты.
+
+    Returns:
+        AsyncKinopoiskApiClient: инициализированный клиент.
+    """
+    client = AsyncKinopoiskApiClient()
+    yield client
+    session_event_loop.run_until_complete(client.close())
+
+
+def check_schema(endpoint: str, data: dict) -> None:
+    """
+    Проверить ответ эндпоинта по схеме; при нарушениях приложить сводку
+    к allure и упасть со списком всех нарушений.
+    """
+    with allure.step(f"Проверить ответ {endpoint} по схеме"):
+        report = validate_payload(endpoint, data)
+        if not report.ok:
+            report.attach()
+        assert report.ok, report.format()
 
 
 @allure.feature("API: поиск фильмов")
@@ -40,17 +134,19 @@ def test_search_movie_by_digits(api_client: KinopoiskApiClient) -> None:
         assert response.status_code == 200
 
     data = response.json()
+    check_schema("/movie/search", data)
     with allure.step("Проверить, что в ответе есть хотя бы один фильм"):
-        assert len(data.get("docs", [])) > 0
+        assert len(data["docs"]) > 0
 
 
 @allure.feature("API: поиск фильмов")
 @allure.title("Поиск фильма на кириллице")
 @allure.description("Позитивный кейс: GET /movie/search?query=Нэчжа.")
-def test_search_movie_by_cyrillic(api_client: KinopoiskApiClient) -> None:
+def test_search_movie_by_cyrillic(api_client: KinopoiskApiClient, movie_index: MovieIndex) -> None:
     """
     Позитивный тест: поиск фильма по запросу на кириллице.
-    Проверяем, что в выдаче присутствует фильм с названием, содержащим 'нэчжа'.
+    Проверяем, что в выдаче присутствует фильм с названием, содержащим 'нэчжа',
+    и (если индекс фильмов собран) что такой фильм сходится с индексом.
     """
     response = api_client.search_movie_by_query(CYRILLIC_QUERY)
 
@@ -58,11 +154,15 @@ def test_search_movie_by_cyrillic(api_client: KinopoiskApiClient) -> None:
         assert response.status_code == 200
 
     data = response.json()
-    titles = [doc.get("name", "").lower() for doc in data.get("docs", [])]
+    check_schema("/movie/search", data)
+    titles = [(doc.get("name") or "").lower() for doc in data["docs"]]
 
     with allure.step("Проверить, что в ответе есть фильм с названием на кириллице"):
         assert any("нэчжа" in title for title in titles)
 
+    with allure.step("Проверить найденный фильм по индексу фильмов"):
+        assert any(movie_index.is_plausible(CYRILLIC_QUERY, doc.get("id"), doc.get("name")) for doc in data["docs"])
+
 
 @allure.feature("API: поиск фильмов")
 @allure.title("Поиск фильмов по жанру")
@@ -78,8 +178,9 @@ def test_get_movies_by_genre(api_client: KinopoiskApiClient) -> None:
         assert response.status_code == 200
 
     data = response.json()
+    check_schema("/movie", data)
     with allure.step("Проверить, что в ответе есть хотя бы один фильм"):
-        assert len(data.get("docs", [])) > 0
+        assert len(data["docs"]) > 0
 
 
 @allure.feature("API: поиск фильмов")
@@ -92,7 +193,7 @@ def test_search_movie_empty_query(api_client: KinopoiskApiClient) -> None:
     """
     Негативный (по задумке) кейс: поиск с пустым query.
     Реальное поведение API: может возвращать 200 и дефолтный набор фильмов.
-    Поэтому проверяем, что код ответа 200 или 404, и тело корректно парсится.
+    Поэтому проверяем, что код ответа 200 или 404, а ответ 200 соответствует схеме.
     """
     response = api_client.search_movie_empty_query()
 
@@ -100,9 +201,7 @@ def test_search_movie_empty_query(api_client: KinopoiskApiClient) -> None:
         assert response.status_code in (200, 404)
 
     if response.status_code == 200:
-        with allure.step("Проверить, что в ответе есть поле docs со списком"):
-            data = response.json()
-            assert isinstance(data.get("docs", []), list)
+        check_schema("/movie/search", response.json())
 
 
 @allure.feature("API: поиск фильмов")
@@ -123,9 +222,7 @@ def test_search_movie_by_symbols(api_client: KinopoiskApiClient) -> None:
         assert response.status_code in (200, 404)
 
     if response.status_code == 200:
-        with allure.step("Проверить, что docs — это список (формат ответа корректный)"):
-            data = response.json()
-            assert isinstance(data.get("docs", []), list)
+        check_schema("/movie/search", response.json())
 
 
 @allure.feature("API: поиск фильмов")
@@ -146,9 +243,7 @@ def test_search_movie_with_wrong_method(api_client: KinopoiskApiClient) -> None:
         assert response.status_code in (200, 401, 405)
 
     if response.status_code == 200:
-        with allure.step("Проверить, что в ответе есть поле docs"):
-            data = response.json()
-            assert "docs" in data
+        check_schema("/movie/search", response.json())
 
 
 @allure.feature("API: поиск фильмов")
@@ -177,3 +272,101 @@ def test_search_movie_with_invalid_token(api_client: KinopoiskApiClient) -> None
 
     with allure.step("Проверить, что код ответа 401"):
         assert response.status_code == 401
+
+
+@allure.feature("API: HTTP-клиент")
+@allure.title("Переиспользование соединений из пула")
+@allure.description("Повторные запросы идут через уже открытое keep-alive соединение.")
+def test_connection_reused_between_requests(api_client: KinopoiskApiClient) -> None:
+    """
+    Два последовательных запроса к одному хосту не должны открывать
+    новое соединение: второй запрос обслуживается соединением из пула.
+    """
+    api_client.search_movie_by_query(DIGIT_QUERY)
+    created_before = api_client.pool_stats()["connections_created"]
+
+    api_client.search_movie_by_query(DIGIT_QUERY)
+    stats = api_client.pool_stats()
+
+    with allure.step("Проверить, что новое соединение не создавалось"):
+        assert stats["connections_created"] == created_before
+        assert stats["reuse_ratio"] > 0
+
+
+@allure.feature("API: поиск фильмов")
+@allure.title("Параллельный поиск по нескольким запросам")
+@allure.description("Позитивный кейс: несколько GET /movie/search выполняются одновременно.")
+async def test_search_movies_concurrently(async_api_client: AsyncKinopoiskApiClient) -> None:
+    """
+    Позитивный тест: параллельный поиск по цифровому и кириллическому запросам.
+    Ожидаем, что на каждый запрос сервер вернёт 200 и непустую выдачу.
+    """
+    queries = [DIGIT_QUERY, CYRILLIC_QUERY]
+    responses = await async_api_client.fan_out(async_api_client.search_movie_by_query, queries)
+
+    with allure.step("Проверить, что на каждый запрос получен ответ 200"):
+        assert all(isinstance(r, AsyncApiResponse) for r in responses), responses
+        assert [r.status_code for r in responses] == [200, 200]
+
+    with allure.step("Проверить, что в каждом ответе есть хотя бы один фильм"):
+        assert all(len(r.json().get("docs", [])) > 0 for r in responses)
+
+
+@allure.feature("API: HTTP-клиент")
+@allure.title("Повтор запроса при ответе 5xx")
+@allure.description("Клиент повторяет GET при 500 и отдаёт последний ответ, исчерпав попытки.")
+def test_client_retries_server_errors() -> None:
+    """
+    Заглушка всегда отвечает 500: клиент должен сделать
+    1 + max_retries попыток и вернуть ответ 500, а не исключение.
+    """
+    with StubApiServer(error_rate=1.0) as server:
+        client = KinopoiskApiClient(
+            base_url=server.url, api_key=server.api_key, max_retries=2, backoff_factor=0
+        )
+        response = client.get_movies_by_genre(GENRE_FANTASY)
+
+        with allure.step("Проверить, что все попытки исчерпаны"):
+            assert response.status_code == 500
+            assert server.request_count == 3
+
+
+@allure.feature("API: поиск фильмов")
+@allure.title("Постраничный перебор фильмов по жанру")
+@allure.description("Итератор проходит по всем страницам /movie и останавливается на max_items.")
+def test_iter_movies_by_genre_walks_pages(stub_api: StubApiServer) -> None:
+    """
+    Перебор жанра страницами по 50 документов: без ограничения получаем
+    все фильмы жанра без повторов, с max_items — ровно max_items.
+    """
+    client = KinopoiskApiClient(base_url=stub_api.url, api_key=stub_api.api_key)
+    total = client.get_movies_by_genre(GENRE_FANTASY).json()["total"]
+
+    ids = [doc["id"] for doc in client.iter_movies_by_genre(GENRE_FANTASY, limit=50)]
+    with allure.step("Проверить, что перебраны все фильмы жанра без повторов"):
+        assert len(ids) == total
+        assert len(set(ids)) == total
+
+    capped = list(client.iter_movies_by_genre(GENRE_FANTASY, limit=50, max_items=70))
+    with allure.step("Проверить, что перебор остановился на max_items"):
+        assert len(capped) == 70
+
+
+@allure.feature("API: поиск фильмов")
+@allure.title("Поиск с разбором ответа в модели Movie")
+@allure.description("GET /movie/search с selectFields возвращает только запрошенные поля.")
+def test_search_movies_returns_models(stub_api: StubApiServer) -> None:
+    """
+    Поиск по кириллическому запросу через типизированный метод: в выдаче
+    есть «Нэчжа», а незапрошенные поля не приходят и остаются None.
+    """
+    client = KinopoiskApiClient(base_url=stub_api.url, api_key=stub_api.api_key)
+    page = client.search_movies(CYRILLIC_QUERY, fields=("id", "name", "genres"))
+
+    with allure.step("Проверить, что выдача разобрана в модели"):
+        assert isinstance(page, MoviePage)
+        assert all(isinstance(movie, Movie) for movie in page.docs)
+        assert any("нэчжа" in movie.title.lower() for movie in page.docs)
+
+    with allure.step("Проверить, что незапрошенные поля не пришли"):
+        assert all(movie.description is None and movie.year is None for movie in page.docs)
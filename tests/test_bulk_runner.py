@@ -0,0 +1,85 @@
+import json
+from pathlib import Path
+
+import allure
+
+from data.test_data import CYRILLIC_QUERY, DIGIT_QUERY
+from utils.api_client import KinopoiskApiClient
+from utils.bulk_runner import BulkRunner
+from utils.stub_server import StubApiServer
+
+
+@allure.feature("API: HTTP-клиент")
+@allure.title("Массовый прогон повторяет запросы, завершившиеся ошибкой")
+@allure.description("Ошибки не запоминаются как ответы: после продолжения прогона запрос уходит в API снова.")
+def test_bulk_runner_retries_failed_queries_on_resume(tmp_path: Path) -> None:
+    """
+    Первый запуск (2 строки) идёт на сервер, отвечающий 500; второй
+    продолжает с тех же запросов на исправном сервере: строки 3 и 4
+    запрашиваются заново и не помечаются повторами ошибок.
+    """
+    corpus = tmp_path / "corpus.jsonl"
+    corpus.write_text("".join(json.dumps({"query": query}) + "\n" for query in ("a", "b", "a", "b")), encoding="utf-8")
+    output = tmp_path / "results.jsonl"
+    state = tmp_path / "state.sqlite"
+
+    with StubApiServer(error_rate=1.0) as failing:
+        client = KinopoiskApiClient(base_url=failing.url, api_key=failing.api_key, max_retries=0)
+        try:
+            first = BulkRunner(client, output, state, concurrency=2, checkpoint_every=1).run(corpus, max_lines=2)
+        finally:
+            client.close()
+    with StubApiServer() as healthy:
+        client = KinopoiskApiClient(base_url=healthy.url, api_key=healthy.api_key, max_retries=0)
+        try:
+            second = BulkRunner(client, output, state, concurrency=2, checkpoint_every=1).run(corpus)
+        finally:
+            client.close()
+        requests_sent = healthy.request_count
+
+    records = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    with allure.step("Проверить, что ошибки первого запуска записаны как ошибки"):
+        assert first["errors"] == 2
+        assert [record["status"] for record in records[:2]] == [500, 500]
+    with allure.step("Проверить, что после продолжения запросы отправлены заново"):
+        assert second == {"lines": 2, "requests": 2, "duplicates": 0, "errors": 0}
+        assert requests_sent == 2
+        assert [(record["status"], record["duplicate_of"]) for record in records[2:]] == [(200, None), (200, None)]
+
+
+@allure.feature("API: HTTP-клиент")
+@allure.title("Массовый прогон запросов из корпуса")
+@allure.description(
+    "Повторы не отправляются в API, результаты идут по порядку, прогон продолжается с контрольной точки."
+)
+def test_bulk_runner_dedupes_and_resumes(stub_api: StubApiServer, tmp_path: Path) -> None:
+    """
+    Корпус из 40 строк с 10 разными запросами прогоняется в два запуска
+    (первый прерван после 25 строк): в выходном файле 40 строк по порядку,
+    а к API ушло ровно 10 запросов.
+    """
+    queries = [
+        CYRILLIC_QUERY, DIGIT_QUERY, "Властелин", "Ocean", "Фильм 1",
+        "Фильм 2", "Фильм 3", "Ne Zha", "нет", "Movie 7",
+    ]
+    corpus = tmp_path / "corpus.jsonl"
+    corpus.write_text(
+        "".join(json.dumps({"query": queries[i % len(queries)]}, ensure_ascii=False) + "\n" for i in range(40)),
+        encoding="utf-8",
+    )
+    output = tmp_path / "results.jsonl"
+    state = tmp_path / "state.sqlite"
+    client = KinopoiskApiClient(base_url=stub_api.url, api_key=stub_api.api_key)
+    requests_before = stub_api.request_count
+
+    first = BulkRunner(client, output, state, concurrency=4, checkpoint_every=10).run(corpus, max_lines=25)
+    second = BulkRunner(client, output, state, concurrency=4, checkpoint_every=10).run(corpus)
+
+    records = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    with allure.step("Проверить, что результаты записаны по порядку строк корпуса"):
+        assert [record["line"] for record in records] == list(range(1, 41))
+        assert first["lines"] == 25 and second["lines"] == 15
+    with allure.step("Проверить, что одинаковые запросы отправлены в API один раз"):
+        assert stub_api.request_count - requests_before == len(queries)
+        assert sum(record["duplicate_of"] is not None for record in records) == 40 - len(queries)
+        assert all(record["status"] == 200 for record in records)
@@ -0,0 +1,52 @@
+from pathlib import Path
+
+import allure
+import pytest
+
+from data.config import get_auth_headers
+from data.test_data import DIGIT_QUERY
+from utils.api_client import KinopoiskApiClient
+from utils.cassette import CassetteMissError, CassetteStore
+from utils.http_records import request_key
+
+
+@allure.feature("API: HTTP-клиент")
+@allure.title("Воспроизведение записанного ответа без сети")
+@allure.description("Запрос в режиме replay обслуживается из хранилища cassette.")
+def test_cassette_replays_recorded_response(tmp_path: Path) -> None:
+    """
+    Записанный ответ возвращается клиенту в режиме replay,
+    а запрос к несуществующему хосту в сеть не уходит.
+    """
+    base_url = "http://cassette.invalid/v1.4"
+    store = CassetteStore(tmp_path)
+    key = request_key("GET", f"{base_url}/movie/search?query={DIGIT_QUERY}", get_auth_headers())
+    store.put(key, {"status": 200, "headers": {}, "body": '{"docs": [{"name": "11"}]}'})
+
+    client = KinopoiskApiClient(
+        base_url=base_url, cassette_mode="replay", cassette_dir=tmp_path, cassette_strict=True
+    )
+    response = client.search_movie_by_query(DIGIT_QUERY)
+
+    with allure.step("Проверить, что получен записанный ответ"):
+        assert response.status_code == 200
+        assert response.json()["docs"][0]["name"] == "11"
+
+
+@allure.feature("API: HTTP-клиент")
+@allure.title("Строгий режим replay без записи")
+@allure.description("Запрос без записи в строгом режиме завершается CassetteMissError.")
+def test_cassette_strict_mode_fails_without_recording(tmp_path: Path) -> None:
+    """
+    В строгом режиме запрос, для которого нет записи, не должен уходить в сеть.
+    """
+    client = KinopoiskApiClient(
+        base_url="http://cassette.invalid/v1.4",
+        cassette_mode="replay",
+        cassette_dir=tmp_path,
+        cassette_strict=True,
+    )
+
+    with allure.step("Проверить, что запрос без записи завершается ошибкой"):
+        with pytest.raises(CassetteMissError):
+            client.search_movie_without_token(DIGIT_QUERY)
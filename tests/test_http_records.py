@@ -0,0 +1,30 @@
+import allure
+
+from utils.http_records import normalize_query, request_key
+
+BASE_URL = "https://api.example/v1.4"
+HEADERS = {"X-API-KEY": "key"}
+
+
+@allure.feature("API: HTTP-клиент")
+@allure.title("Ключ запроса не зависит от порядка и кодирования параметров")
+@allure.description("Одинаковые запросы дают один ключ кассеты и кеша, разные — разные ключи.")
+def test_request_key_normalizes_query() -> None:
+    """
+    Порядок параметров и способ кодирования значения не меняют ключ.
+    Закодированные `&` и `=` внутри значения не склеиваются с
+    отдельными параметрами, а параметр без значения отличается от пустого.
+    """
+    with allure.step("Проверить нормализацию порядка и кодирования"):
+        assert normalize_query("query=%D0%9D%D1%8D%D1%87%D0%B6%D0%B0&page=1") == normalize_query(
+            "page=1&query=Нэчжа"
+        )
+        assert request_key("GET", f"{BASE_URL}/movie?b=2&a=1", HEADERS, "key") == request_key(
+            "GET", f"{BASE_URL}/movie?a=1&b=2", HEADERS, "key"
+        )
+    with allure.step("Проверить, что разные запросы не совпадают по ключу"):
+        assert normalize_query("a=1%26b%3D2") != normalize_query("a=1&b=2")
+        assert request_key("GET", f"{BASE_URL}/movie?a=1%26b%3D2", HEADERS, "key") != request_key(
+            "GET", f"{BASE_URL}/movie?a=1&b=2", HEADERS, "key"
+        )
+        assert normalize_query("query") != normalize_query("query=")
@@ -0,0 +1,95 @@
+import math
+import socket
+from typing import List
+
+import allure
+import pytest
+import requests
+
+from utils.api_client import KinopoiskApiClient
+from utils.metrics import LatencyRecorder, RequestSample, StreamingHistogram
+from utils.stub_server import StubApiServer
+
+
+@allure.feature("API: метрики запросов")
+@allure.title("Перцентили потоковой гистограммы на известных данных")
+@allure.description("Перцентили гистограммы совпадают с точными в пределах заданной относительной точности.")
+def test_streaming_histogram_percentiles_match_known_data() -> None:
+    """
+    Значения 1..1000 мс в перемешанном порядке: точный перцентиль q —
+    q * 10 мс. Гистограмма с точностью 2% не должна ошибаться сильнее.
+    """
+    histogram = StreamingHistogram(precision=0.02)
+    values = [index / 1000 for index in range(1, 1001)]
+    for value in values[::2] + values[1::2]:
+        histogram.add(value)
+    histogram.add(0.0)
+
+    with allure.step("Проверить количество, min и max"):
+        assert histogram.count == 1001
+        assert histogram.min == 0.0
+        assert histogram.max == 1.0
+    with allure.step("Проверить перцентили с точностью 2%"):
+        ordered = [0.0, *values]
+        for q in (10, 50, 90, 99):
+            exact = ordered[math.ceil(len(ordered) * q / 100) - 1]
+            assert histogram.percentile(q) == pytest.approx(exact, rel=0.02)
+        assert histogram.percentile(100) == 1.0
+    with allure.step("Проверить нулевые значения и пустую гистограмму"):
+        assert histogram.percentile(0.05) == 0.0
+        assert StreamingHistogram().percentile(50) == 0.0
+        assert StreamingHistogram().summary() == {"count": 0}
+
+
+@allure.feature("API: метрики запросов")
+@allure.title("Хук получает замер каждого запроса")
+@allure.description("Хуки клиента вызываются на каждый сетевой запрос, включая таймауты и ошибки соединения.")
+def test_hooks_record_every_request_and_error() -> None:
+    """
+    Три поиска и два запроса по жанру дают пять замеров со статусом 200.
+    Таймаут и отказ в соединении тоже попадают в хук — с именем
+    исключения — и не портят перцентили задержек ответов.
+    """
+    samples: List[RequestSample] = []
+    latency = LatencyRecorder()
+    with StubApiServer(latency=0.2) as server:
+        client = KinopoiskApiClient(base_url=server.url, api_key=server.api_key, timeout=5, max_retries=0)
+        client.add_hook(samples.append)
+        client.add_hook(latency)
+        try:
+            for query in ("1", "2", "3"):
+                assert client.search_movie_by_query(query).status_code == 200
+            for _ in range(2):
+                assert client.get_movies_by_genre("фантастика").status_code == 200
+            client.timeout = 0.05
+            with pytest.raises(requests.RequestException):
+                client.search_movie_by_query("4")
+        finally:
+            client.close()
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        closed_port = sock.getsockname()[1]
+    client = KinopoiskApiClient(base_url=f"http://127.0.0.1:{closed_port}/v1.4", api_key="key", max_retries=0)
+    client.add_hook(samples.append)
+    client.add_hook(latency)
+    try:
+        with pytest.raises(requests.RequestException):
+            client.search_movie_by_query("5")
+    finally:
+        client.close()
+
+    with allure.step("Проверить, что хук вызван на каждый запрос"):
+        assert [sample.status for sample in samples] == [200] * 5 + [0, 0]
+        assert [sample.error for sample in samples[:5]] == [None] * 5
+    with allure.step("Проверить замеры запросов без ответа"):
+        timeout, refused = samples[5:]
+        assert timeout.error == "ReadTimeoutError" and timeout.total >= 0.05
+        assert refused.error == "NewConnectionError"
+    with allure.step("Проверить сводку по эндпоинтам"):
+        summary = latency.summary()["GET /movie/search"]
+        assert summary["requests"] == 5
+        assert summary["statuses"] == {"200": 3}
+        assert summary["errors"] == {"ReadTimeoutError": 1, "NewConnectionError": 1}
+        assert latency.samples("GET /movie/search") == 3
+        assert latency.percentile("GET /movie/search", 99) < 1.0
@@ -0,0 +1,45 @@
+import json
+import tracemalloc
+
+import allure
+
+from data.test_data import GENRE_FANTASY
+from utils.api_client import KinopoiskApiClient
+from utils.models import measure_parse_cost
+from utils.stub_server import StubApiServer
+
+
+@allure.feature("API: формат ответов")
+@allure.title("Модели занимают меньше памяти, чем словари")
+@allure.description("Замер разбора страницы выдачи в словари и в модели Movie через tracemalloc.")
+def test_measure_parse_cost_models_use_less_memory(stub_api: StubApiServer) -> None:
+    """
+    Страница жанра из заглушки после разбора в модели удерживает меньше
+    памяти, чем те же документы в словарях. Трассировка, запущенная до
+    замера, после него продолжает работать.
+    """
+    client = KinopoiskApiClient(base_url=stub_api.url, api_key=stub_api.api_key)
+    raw = client.get_movies_by_genre(GENRE_FANTASY).content
+    client.close()
+
+    cost = measure_parse_cost(raw)
+    allure.attach(
+        json.dumps(cost, ensure_ascii=False, indent=2),
+        name="Стоимость разбора: словари и модели",
+        attachment_type=allure.attachment_type.JSON,
+    )
+    with allure.step("Проверить, что замеры заполнены"):
+        assert cost["docs"] > 0
+        for key in ("dict_parse_ms", "model_parse_ms", "dict_kb_per_1000_docs", "model_kb_per_1000_docs"):
+            assert cost[key] > 0
+    with allure.step("Проверить, что модели удерживают меньше памяти"):
+        assert cost["model_kb_per_1000_docs"] < cost["dict_kb_per_1000_docs"]
+
+    with allure.step("Проверить, что внешняя трассировка не останавливается"):
+        tracemalloc.start()
+        try:
+            nested = measure_parse_cost(raw)
+            assert tracemalloc.is_tracing()
+        finally:
+            tracemalloc.stop()
+        assert nested["model_kb_per_1000_docs"] < nested["dict_kb_per_1000_docs"]
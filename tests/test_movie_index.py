@@ -0,0 +1,57 @@
+import json
+import time
+from pathlib import Path
+
+import allure
+
+from data.test_data import CYRILLIC_QUERY, GENRE_FANTASY
+from utils.api_client import KinopoiskApiClient
+from utils.movie_index import MovieIndex, harvest, title_matches
+from utils.stub_server import StubApiServer
+
+
+@allure.feature("API: поиск фильмов")
+@allure.title("Локальный индекс фильмов из обхода /movie")
+@allure.description("Индекс собирается обходом страниц, обновляется по id и отвечает за микросекунды.")
+def test_movie_index_harvest_and_update(tmp_path: Path) -> None:
+    """
+    Индекс, собранный с заглушки, находит те же фильмы, что и её поиск
+    и фильтр по жанру; повторный обход ничего не переписывает, а
+    изменённый фильм обновляет свои вхождения.
+    """
+    with StubApiServer(movie_count=600) as server:
+        client = KinopoiskApiClient(base_url=server.url, api_key=server.api_key)
+        with MovieIndex(tmp_path / "movies.sqlite") as index:
+            first = harvest(client, index)
+            second = harvest(client, index)
+            with allure.step("Проверить обход и повторный обход"):
+                assert first["inserted"] == len(index) == len(server.movies)
+                assert second["unchanged"] == len(server.movies) and second["updated"] == 0
+
+            with allure.step("Проверить поиск и жанры по индексу"):
+                found = client.iter_movies({"query": CYRILLIC_QUERY}, path="/movie/search")
+                assert index.search(CYRILLIC_QUERY.upper()) == {doc["id"] for doc in found}
+                by_genre = client.iter_movies_by_genre(GENRE_FANTASY)
+                assert index.by_genre(GENRE_FANTASY) == {doc["id"] for doc in by_genre}
+                assert index.search("властелин кол") == {1004}
+                assert title_matches("ёлки", "Елки 2") and not title_matches("нэчжа", "11 друзей Оушена")
+
+            changed = {**server.movies[0], "name": "Нэчжа: Перерождение", "genres": [{"name": "Комедия"}]}
+            with allure.step("Обновить фильм по id и проверить его вхождения"):
+                assert index.upsert([changed]) == {"inserted": 0, "updated": 1, "unchanged": 0}
+                assert index.search("перерождение") == {changed["id"]}
+                assert changed["id"] not in index.by_genre(GENRE_FANTASY)
+                assert index.is_plausible(CYRILLIC_QUERY, changed["id"], genre="комедия")
+                assert not index.is_plausible("11", changed["id"], title="11")
+                # Название из выдачи проверяется всегда, даже если фильм есть в индексе
+                assert not index.is_plausible(CYRILLIC_QUERY, changed["id"], title="11 друзей Оушена")
+
+            started = time.perf_counter()
+            for _ in range(1000):
+                index.is_plausible(CYRILLIC_QUERY, changed["id"])
+            allure.attach(
+                json.dumps({"is_plausible_us": round((time.perf_counter() - started) * 1000, 2)}),
+                name="Время проверки по индексу",
+                attachment_type=allure.attachment_type.JSON,
+            )
+        client.close()
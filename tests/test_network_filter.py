@@ -0,0 +1,79 @@
+import json
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List
+
+import allure
+
+from utils.network_filter import NetworkFilter, collect_traffic
+
+
+def _event(method: str, **params: Any) -> Dict[str, str]:
+    return {"message": json.dumps({"message": {"method": method, "params": params}})}
+
+
+class _FakeDriver:
+    """
+    Драйвер, который отдаёт заранее заданный журнал performance.
+    """
+
+    def __init__(self, entries: List[Dict[str, str]]) -> None:
+        self.entries = entries
+
+    def execute(self, command: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        return {"value": self.entries}
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+        pass
+
+
+@allure.feature("UI: сетевые запросы")
+@allure.title("Учёт трафика и сэкономленных байт навигации")
+@allure.description("Трафик считается по типам ресурсов, размер заблокированного оценивается по Content-Length.")
+def test_collect_traffic_counts_types_and_saved_bytes(tmp_path: Path) -> None:
+    """
+    Постер без расширения блокируется шаблоном хоста. В журнале навигации
+    документ и скрипт скачаны, две картинки заблокированы; их размер
+    (1000 и 500 байт на локальном сервере) попадает в saved_bytes.
+    """
+    assert "*://avatars.mds.yandex.net/*" in NetworkFilter(resource_types=["image"], url_patterns=[]).patterns
+
+    (tmp_path / "poster").write_bytes(b"x" * 1000)
+    (tmp_path / "frame.webp").write_bytes(b"x" * 500)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), partial(_QuietHandler, directory=str(tmp_path)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    entries = [
+        _event("Network.requestWillBeSent", requestId="1", type="Document", request={"url": f"{base}/"}),
+        _event("Network.loadingFinished", requestId="1", encodedDataLength=2000),
+        _event("Network.requestWillBeSent", requestId="2", type="Script", request={"url": f"{base}/app.js"}),
+        _event("Network.loadingFinished", requestId="2", encodedDataLength=300),
+        _event("Network.requestWillBeSent", requestId="3", type="Image", request={"url": f"{base}/poster"}),
+        _event("Network.loadingFailed", requestId="3", type="Image", blockedReason="inspector"),
+        _event("Network.requestWillBeSent", requestId="4", type="Image", request={"url": f"{base}/frame.webp"}),
+        _event("Network.loadingFailed", requestId="4", type="Image", blockedReason="inspector"),
+    ]
+    try:
+        traffic = collect_traffic(_FakeDriver(entries), f"{base}/", estimate_saved=True)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    allure.attach(
+        json.dumps(traffic.to_dict(), ensure_ascii=False, indent=2),
+        name="Трафик навигации",
+        attachment_type=allure.attachment_type.JSON,
+    )
+    with allure.step("Проверить число запросов и скачанные байты по типам"):
+        assert traffic.requests == 4
+        assert traffic.blocked == 2 and traffic.blocked_by_type == {"image": 2}
+        assert traffic.transferred_bytes == 2300
+        assert traffic.transferred_by_type == {"document": 2000, "script": 300}
+    with allure.step("Проверить оценку сэкономленных байт"):
+        assert traffic.saved_bytes == 1500
+    with allure.step("Проверить, что без оценки сеть не запрашивается"):
+        assert collect_traffic(_FakeDriver(entries), f"{base}/").saved_bytes is None
@@ -0,0 +1,33 @@
+import time
+from pathlib import Path
+
+import allure
+
+from data.test_data import DIGIT_QUERY
+from utils.api_client import KinopoiskApiClient
+from utils.rate_limiter import TokenBucket
+from utils.stub_server import StubApiServer
+
+
+@allure.feature("API: HTTP-клиент")
+@allure.title("Ограничение частоты запросов")
+@allure.description("Запросы сверх ёмкости корзины ждут токен; использование квоты учитывается.")
+def test_rate_limiter_paces_requests(stub_api: StubApiServer, tmp_path: Path) -> None:
+    """
+    При лимите 20 запросов/с и ёмкости 1 шесть запросов занимают
+    не меньше 0.25 с, и все шесть попадают в счётчик квоты.
+    """
+    limiter = TokenBucket(stub_api.api_key, rate=20, burst=1, state_dir=tmp_path)
+    client = KinopoiskApiClient(
+        base_url=stub_api.url, api_key=stub_api.api_key, rate_limiter=limiter
+    )
+
+    started = time.perf_counter()
+    for _ in range(6):
+        client.search_movie_by_query(DIGIT_QUERY)
+    elapsed = time.perf_counter() - started
+
+    with allure.step("Проверить, что запросы были растянуты во времени"):
+        assert elapsed >= 0.25
+    with allure.step("Проверить счётчик использования квоты"):
+        assert limiter.usage()["used_today"] == 6
@@ -0,0 +1,118 @@
+import json
+import time
+from pathlib import Path
+
+import allure
+import pytest
+
+from data.test_data import DIGIT_QUERY, GENRE_FANTASY
+from utils.api_client import KinopoiskApiClient
+from utils.metrics import LatencyRecorder
+from utils.rate_limiter import TokenBucket
+from utils.resilience import CircuitBreaker, CircuitOpenError, HedgePolicy
+from utils.stub_server import StubApiServer
+
+
+@allure.feature("API: HTTP-клиент")
+@allure.title("Дубль медленного запроса")
+@allure.description("Если ответа нет дольше перцентиля задержки, клиент отправляет копию и берёт первый ответ.")
+def test_hedged_requests_cut_slow_tail() -> None:
+    """
+    Пятая часть ответов заглушки задерживается на 0.5 с. С дублями ни один
+    поиск не ждёт медленного ответа целиком, а дубли побеждают.
+    """
+    with StubApiServer(latency=0.005, slow_rate=0.2, slow_latency=0.5, seed=3) as server:
+        latency = LatencyRecorder()
+        hedge = HedgePolicy(latency, quantile=50, min_samples=5, initial_delay=0.05, max_ratio=0.5)
+        client = KinopoiskApiClient(base_url=server.url, api_key=server.api_key, hedge=hedge)
+        try:
+            durations = []
+            for _ in range(30):
+                started = time.perf_counter()
+                response = client.search_movie_by_query(DIGIT_QUERY)
+                durations.append(time.perf_counter() - started)
+                assert response.status_code == 200
+        finally:
+            client.close()
+
+    stats = hedge.stats()
+    allure.attach(
+        json.dumps(stats, ensure_ascii=False, indent=2),
+        name="Статистика дублей",
+        attachment_type=allure.attachment_type.JSON,
+    )
+    with allure.step("Проверить, что дубли отправлялись и отвечали раньше"):
+        endpoint = stats["endpoints"]["GET /movie/search"]
+        assert endpoint["hedge_wins"] >= 1
+    with allure.step("Проверить, что дублей не больше бюджета"):
+        assert stats["hedged"] <= 0.5 * stats["requests"]
+    with allure.step("Проверить, что медленный хвост срезан"):
+        assert sorted(durations)[-3] < 0.4
+
+
+@allure.feature("API: HTTP-клиент")
+@allure.title("Ожидание лимита частоты не запускает дубль")
+@allure.description("Задержка дубля отсчитывается от отправки запроса, а не от ожидания токена ограничителя.")
+def test_hedge_delay_excludes_rate_limiter_wait(tmp_path: Path) -> None:
+    """
+    Ограничитель пропускает запрос раз в 0.1 с, а дубль положен через
+    0.05 с. Заглушка отвечает быстро, поэтому ни одного дубля быть не должно.
+    """
+    with StubApiServer(latency=0.005) as server:
+        hedge = HedgePolicy(LatencyRecorder(), min_samples=1000, initial_delay=0.05, max_ratio=1.0)
+        client = KinopoiskApiClient(
+            base_url=server.url,
+            api_key=server.api_key,
+            hedge=hedge,
+            rate_limiter=TokenBucket(server.api_key, rate=10, burst=1, state_dir=tmp_path),
+        )
+        try:
+            for _ in range(5):
+                assert client.search_movie_by_query(DIGIT_QUERY).status_code == 200
+        finally:
+            client.close()
+
+    with allure.step("Проверить, что дубли не отправлялись"):
+        endpoint = hedge.stats()["endpoints"]["GET /movie/search"]
+        assert endpoint["hedged"] == 0
+        assert endpoint["skipped_rate_limit"] == 0
+
+
+@allure.feature("API: HTTP-клиент")
+@allure.title("Размыкатель цепи при серии сбоев")
+@allure.description("После серии ответов 5xx запросы к эндпоинту завершаются сразу, пробный запрос — после паузы.")
+def test_circuit_breaker_fails_fast() -> None:
+    """
+    Заглушка всегда отвечает 500: после двух сбоев третий запрос не
+    доходит до сервера, а после reset_timeout уходит один пробный запрос.
+    """
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.2)
+    with StubApiServer(error_rate=1.0) as server:
+        client = KinopoiskApiClient(
+            base_url=server.url, api_key=server.api_key, max_retries=0, breaker=breaker
+        )
+        for _ in range(2):
+            assert client.get_movies_by_genre(GENRE_FANTASY).status_code == 500
+
+        with allure.step("Проверить, что запрос отклонён без обращения к серверу"):
+            with pytest.raises(CircuitOpenError):
+                client.get_movies_by_genre(GENRE_FANTASY)
+            assert server.request_count == 2
+
+        time.sleep(0.25)
+        with allure.step("Проверить пробный запрос после паузы"):
+            assert client.get_movies_by_genre(GENRE_FANTASY).status_code == 500
+            assert server.request_count == 3
+            with pytest.raises(CircuitOpenError):
+                client.get_movies_by_genre(GENRE_FANTASY)
+
+        with allure.step("Проверить, что негативная проверка авторизации идёт мимо размыкателя"):
+            for _ in range(2):
+                breaker.record("GET /movie/search", ok=False)
+            client.search_movie_with_invalid_token(DIGIT_QUERY)
+            assert server.request_count == 4
+        client.close()
+
+    stats = breaker.stats()["GET /movie"]
+    assert stats == {"state": "open", "failures": 3, "opened": 2, "rejected": 2}
+    assert breaker.stats()["GET /movie/search"]["rejected"] == 0
@@ -0,0 +1,32 @@
+import allure
+
+from data.test_data import DIGIT_QUERY
+from utils.api_client import KinopoiskApiClient
+from utils.response_cache import ResponseCache
+from utils.stub_server import StubApiServer
+
+
+@allure.feature("API: HTTP-клиент")
+@allure.title("Повторный запрос обслуживается из кеша")
+@allure.description("Одинаковые GET берутся из кеша, негативные проверки токена — всегда с сервера.")
+def test_cache_serves_repeated_requests(stub_api: StubApiServer) -> None:
+    """
+    Второй одинаковый поиск не доходит до сервера, а запрос с неверным
+    токеном кеш обходит и получает 401.
+    """
+    cache = ResponseCache()
+    client = KinopoiskApiClient(base_url=stub_api.url, api_key=stub_api.api_key, cache=cache)
+    requests_before = stub_api.request_count
+
+    first = client.search_movie_by_query(DIGIT_QUERY)
+    second = client.search_movie_by_query(DIGIT_QUERY)
+    with allure.step("Проверить, что второй ответ взят из кеша"):
+        assert second.json() == first.json()
+        assert stub_api.request_count - requests_before == 1
+        assert cache.stats()["hits"] == 1
+
+    client.search_movie_with_invalid_token(DIGIT_QUERY)
+    response = client.search_movie_with_invalid_token(DIGIT_QUERY)
+    with allure.step("Проверить, что запросы с неверным токеном не кешируются"):
+        assert response.status_code == 401
+        assert stub_api.request_count - requests_before == 3
@@ -0,0 +1,116 @@
+import json
+from types import SimpleNamespace
+
+import allure
+import pytest
+
+from utils.scheduler import DurationScheduling, DurationStore
+
+
+class _FakeWorker:
+    """
+    Воркер xdist для планировщика: запоминает выданные тесты.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.gateway = SimpleNamespace(id=name)
+        self.shutting_down = False
+        self.sent: list[int] = []
+
+    def send_runtest_some(self, indices: list[int]) -> None:
+        self.sent.extend(indices)
+
+    def shutdown(self) -> None:
+        self.shutting_down = True
+
+
+@allure.feature("Параллельный запуск")
+@allure.title("Раздача тестов воркерам xdist по длительностям прошлых прогонов")
+@allure.description("Самые долгие тесты раздаются первыми, UI-тесты — только воркерам с браузером.")
+def test_duration_scheduler_runs_longest_first(request: pytest.FixtureRequest) -> None:
+    """
+    Три воркера, четыре UI-теста по 2 с, долгий API-тест на 2,5 с и
+    восемь коротких: долгие тесты уходят первыми, все UI-тесты
+    выполняются на воркерах с браузером, каждый тест — ровно один раз.
+    """
+    store = DurationStore()
+    store.driver_startup_s = 1.0
+    collection = [f"tests/test_ui.py::test_page[{i}]" for i in range(4)]
+    collection += ["tests/test_api.py::test_sweep"] + [f"tests/test_api.py::test_fast[{i}]" for i in range(8)]
+    for nodeid in collection:
+        ui = "test_ui" in nodeid
+        store.tests[nodeid] = {"s": 2.0 if ui else 2.5 if "sweep" in nodeid else 0.1, "ui": ui}
+
+    scheduler = DurationScheduling(request.config, store, numnodes=3)
+    workers = [_FakeWorker(f"gw{i}") for i in range(3)]
+    for worker in workers:
+        scheduler.add_node(worker)
+        scheduler.add_node_collection(worker, collection)
+    scheduler.schedule()
+
+    with allure.step("Выполнить выданные тесты до завершения воркеров"):
+        done: list[int] = []
+        while scheduler.has_pending:
+            worker = next(worker for worker in workers if scheduler.node2pending[worker])
+            index = scheduler.node2pending[worker][0]
+            done.append(index)
+            scheduler.mark_test_complete(worker, index)
+        assert scheduler.tests_finished
+        assert sorted(done) == list(range(len(collection)))
+        assert all(worker.shutting_down for worker in workers)
+
+    with allure.step("Проверить порядок и привязку UI-тестов к браузерам"):
+        first = [worker.sent[0] for worker in workers]
+        assert collection.index("tests/test_api.py::test_sweep") in first
+        for worker in workers:
+            if worker not in scheduler.browsers:
+                assert not any(store.is_ui(collection[index]) for index in worker.sent)
+        report = scheduler.report()
+        allure.attach(
+            json.dumps(report, ensure_ascii=False, indent=2),
+            name="Раздача тестов",
+            attachment_type=allure.attachment_type.JSON,
+        )
+        assert report["ui_workers"] == report["ui_workers_planned"] == 2
+        assert report["lower_bound_s"] <= report["planned_s"]
+        assert report["longest_test"]["nodeid"].startswith("tests/test_ui.py") and report["longest_test"]["s"] == 3.0
+
+
+@allure.feature("Параллельный запуск")
+@allure.title("Тесты упавшего воркера раздаются оставшимся")
+@allure.description("Воркер без работы не останавливается, пока в очереди есть тесты: он доделает тесты упавшего.")
+def test_duration_scheduler_requeues_crashed_worker(request: pytest.FixtureRequest) -> None:
+    """
+    Два коротких UI-теста, долгий API-тест и дорогой запуск браузера:
+    по плану браузер один, и воркеру без браузера нечего выдать. Когда
+    воркер с браузером падает, его тесты достаются второму, а не теряются.
+    """
+    store = DurationStore()
+    store.driver_startup_s = 3.0
+    collection = [f"tests/test_ui.py::test_page[{i}]" for i in range(2)] + ["tests/test_api.py::test_sweep"]
+    for nodeid in collection:
+        ui = "test_ui" in nodeid
+        store.tests[nodeid] = {"s": 1.0 if ui else 3.0, "ui": ui}
+
+    scheduler = DurationScheduling(request.config, store, numnodes=2)
+    workers = [_FakeWorker(f"gw{i}") for i in range(2)]
+    for worker in workers:
+        scheduler.add_node(worker)
+        scheduler.add_node_collection(worker, collection)
+    scheduler.schedule()
+    browser = next(worker for worker in workers if worker.sent)
+    idle = next(worker for worker in workers if worker is not browser)
+
+    with allure.step("Проверить, что воркер без работы не остановлен"):
+        assert not idle.sent and not idle.shutting_down
+
+    with allure.step("Уронить воркер с браузером и доделать его тесты"):
+        crashed = scheduler.remove_node(browser)
+        assert crashed == collection[browser.sent[0]]
+        done = set(browser.sent[:1])
+        while scheduler.has_pending:
+            index = scheduler.node2pending[idle][0]
+            done.add(index)
+            scheduler.mark_test_complete(idle, index)
+        assert done == set(range(len(collection)))
+        assert idle.shutting_down
@@ -0,0 +1,42 @@
+import allure
+
+from data.test_data import GENRE_FANTASY
+from utils.api_client import KinopoiskApiClient
+from utils.schemas import SchemaReport, validate_payload, validator_for
+from utils.stub_server import StubApiServer
+
+
+@allure.feature("API: формат ответов")
+@allure.title("Проверка выдачи по схеме при постраничном переборе")
+@allure.description("Документы проверяются по ходу перебора, нарушения собираются в одну сводку.")
+def test_schema_validation_streams_and_aggregates(stub_api: StubApiServer) -> None:
+    """
+    Все фильмы жанра из заглушки проходят схему документа по ходу
+    перебора страниц. Испорченные документы дают по одной записи на
+    каждое нарушение с числом случаев, а не падение на первом.
+    """
+    client = KinopoiskApiClient(base_url=stub_api.url, api_key=stub_api.api_key)
+    report = SchemaReport()
+    docs = validator_for("/movie").iter_docs(client.iter_movies_by_genre(GENRE_FANTASY), report)
+    ids = [doc["id"] for doc in docs]
+    report.attach("Проверка схемы выдачи жанра")
+    with allure.step("Проверить, что все документы прошли схему"):
+        assert ids and report.documents == len(ids)
+        assert report.ok, report.format()
+
+    broken = client.get_movies_by_genre(GENRE_FANTASY).json()
+    for doc in broken["docs"]:
+        doc["year"] = str(doc["year"])
+        doc["rating"]["kp"] = None
+    broken["docs"][0]["genres"].append({"title": "драма"})
+    broken["pages"] = "1"
+    client.close()
+
+    drift = validate_payload("/movie", broken)
+    with allure.step("Проверить, что нарушения собраны по путям схемы"):
+        violations = {(item["path"], item["count"]) for item in drift.summary()["violations"]}
+        assert violations == {
+            ("docs[].year", len(broken["docs"])),
+            ("docs[].genres[].name", 1),
+            ("pages", 1),
+        }
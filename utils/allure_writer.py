@@ -0,0 +1,385 @@
+"""
+Фоновая запись результатов allure для прогонов с тысячами шагов.
+
+Штатный AllureFileLogger пишет каждое вложение и JSON результата теста
+в потоке теста: на циклах из тысяч вызовов `@allure.step` и на переборах
+запросов это заметная доля времени теста. BackgroundAllureWriter
+принимает те же события (результаты, контейнеры фикстур, вложения)
+в очередь, а отдельный поток пишет их пачками. Перед записью результата
+повторяющиеся шаги сворачиваются: после collapse_after шагов с одним
+шаблоном названия (числа и значения в кавычках не различаются) остальные
+заменяются одним шагом-сводкой с их числом, общим временем и вложениями.
+При sample_every > 0 каждый такой шаг с номером, кратным sample_every,
+сохраняется как есть. Упавшие и сломанные шаги не сворачиваются никогда.
+
+Очередь дописывается на диск в конце сессии pytest, при выходе
+интерпретатора (atexit, в том числе после необработанного исключения)
+и по SIGTERM; между сбросами проходит не больше flush_interval секунд.
+
+Включается KINOPOISK_ALLURE_ASYNC=1 (см. conftest.py): install() подменяет
+класс записи в allure-pytest до того, как плагин создаст его экземпляр.
+"""
+
+import atexit
+import io
+import json
+import os
+import queue
+import re
+import shutil
+import signal
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from allure_commons import hookimpl
+from allure_commons.model2 import Parameter, Status, TestStepResult
+from attr import asdict
+
+from data.config import get_settings
+
+INDENT = 4
+
+# Чем выше, тем важнее статус для шага-сводки
+_STATUS_RANK = {Status.FAILED: 4, Status.BROKEN: 3, Status.SKIPPED: 2, Status.PASSED: 1}
+_KEEP_STATUSES = (Status.FAILED, Status.BROKEN)
+# Значения в кавычках и числа в названии шага не различают повторы
+_STEP_VALUES = re.compile(r"'[^']*'|\"[^\"]*\"|«[^»]*»|\d+(?:\.\d+)?")
+
+_STOP = object()
+
+_writers: List["BackgroundAllureWriter"] = []
+_writers_lock = threading.Lock()
+
+
+def step_pattern(name: Optional[str]) -> str:
+    """
+    Шаблон названия шага: значения в кавычках и числа заменены на «…».
+    """
+    return _STEP_VALUES.sub("…", name or "")
+
+
+def collapse_steps(item: Any, collapse_after: int, sample_every: int = 0) -> Tuple[int, int]:
+    """
+    Свернуть повторяющиеся шаги результата (рекурсивно, на месте).
+
+    Args:
+        item: Результат теста, фикстуры или шага с полем steps.
+        collapse_after: Сколько шагов одного шаблона на уровне сохранять
+            полностью; 0 — не сворачивать.
+        sample_every: Сверх порога сохранять каждый такой шаг с номером,
+            кратным sample_every; 0 — сворачивать все.
+
+    Returns:
+        tuple: Сколько шагов свёрнуто и сколько сохранено выборкой.
+    """
+    collapsed = sampled = 0
+    if collapse_after <= 0 or not item.steps:
+        return collapsed, sampled
+    seen: Dict[str, int] = {}
+    summaries: Dict[str, TestStepResult] = {}
+    kept: List[TestStepResult] = []
+    for step in item.steps:
+        pattern = step_pattern(step.name)
+        number = seen[pattern] = seen.get(pattern, 0) + 1
+        if number <= collapse_after or step.status in _KEEP_STATUSES:
+            kept.append(step)
+            continue
+        if sample_every > 0 and number % sample_every == 0:
+            kept.append(step)
+            sampled += 1
+            continue
+        summary = summaries.get(pattern)
+        if summary is None:
+            summary = summaries[pattern] = TestStepResult(
+                name=pattern, status=step.status, stage=step.stage, start=step.start, stop=step.stop
+            )
+            summary.parameters.append(Parameter(name="свёрнуто шагов", value="0"))
+            kept.append(summary)
+        _merge(summary, step)
+        collapsed += 1
+    for summary in summaries.values():
+        count = int(summary.parameters[0].value)
+        summary.name = f"{summary.name} — ещё {count} {_plural_steps(count)} свёрнуто"
+    item.steps = kept
+    summary_ids = {id(summary) for summary in summaries.values()}
+    for step in kept:
+        if id(step) not in summary_ids:
+            nested = collapse_steps(step, collapse_after, sample_every)
+            collapsed += nested[0]
+            sampled += nested[1]
+    return collapsed, sampled
+
+
+def _merge(summary: TestStepResult, step: TestStepResult) -> None:
+    summary.parameters[0].value = str(int(summary.parameters[0].value) + 1)
+    if _STATUS_RANK.get(step.status, 0) > _STATUS_RANK.get(summary.status, 0):
+        summary.status = step.status
+    if step.start is not None:
+        summary.start = step.start if summary.start is None else min(summary.start, step.start)
+    if step.stop is not None:
+        summary.stop = step.stop if summary.stop is None else max(summary.stop, step.stop)
+    # Вложения свёрнутых шагов уже записаны: ссылки на них остаются в сводке
+    summary.attachments.extend(step.attachments)
+    stack = list(step.steps)
+    while stack:
+        nested = stack.pop()
+        summary.attachments.extend(nested.attachments)
+        stack.extend(nested.steps)
+
+
+def _plural_steps(count: int) -> str:
+    if count % 10 == 1 and count % 100 != 11:
+        return "шаг"
+    if 2 <= count % 10 <= 4 and not 12 <= count % 100 <= 14:
+        return "шага"
+    return "шагов"
+
+
+class BackgroundAllureWriter:
+    """
+    Запись результатов allure в каталог отчёта из фонового потока.
+
+    Реализует те же хуки allure_commons, что и AllureFileLogger, и
+    создаётся плагином allure-pytest вместо него (см. install), поэтому
+    регистрация и снятие с регистрации остаются за плагином.
+
+    Args:
+        report_dir: Каталог результатов allure (--alluredir).
+        clean: Очистить каталог перед прогоном (--clean-alluredir).
+        collapse_after: Порог сворачивания повторяющихся шагов; 0 — не
+            сворачивать; по умолчанию — KINOPOISK_ALLURE_COLLAPSE_AFTER.
+        sample_every: Выборка шагов сверх порога; 0 — без выборки; по
+            умолчанию — KINOPOISK_ALLURE_SAMPLE_EVERY.
+        batch_size: Сколько событий писать за один проход потока.
+        flush_interval: Сколько секунд событие может ждать записи.
+    """
+
+    def __init__(
+        self,
+        report_dir: Any,
+        clean: bool = False,
+        collapse_after: Optional[int] = None,
+        sample_every: Optional[int] = None,
+        batch_size: int = 256,
+        flush_interval: float = 0.2,
+    ) -> None:
+        self.report_dir: Path = Path(report_dir).absolute()
+        if self.report_dir.is_dir() and clean:
+            shutil.rmtree(self.report_dir, ignore_errors=True)
+        self.report_dir.mkdir(parents=True, exist_ok=True)
+        settings = get_settings()
+        self.collapse_after: int = settings.allure_collapse_after if collapse_after is None else collapse_after
+        self.sample_every: int = settings.allure_sample_every if sample_every is None else sample_every
+        self.batch_size: int = max(batch_size, 1)
+        self.flush_interval: float = flush_interval
+        self.indent: Optional[int] = INDENT if os.environ.get("ALLURE_INDENT_OUTPUT") else None
+        self.counters: Dict[str, int] = {
+            "events": 0,
+            "written": 0,
+            "batches": 0,
+            "bytes": 0,
+            "errors": 0,
+            "collapsed_steps": 0,
+            "sampled_steps": 0,
+            "max_queue": 0,
+        }
+        self.last_error: Optional[str] = None
+        self.write_s: float = 0.0
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="allure-writer", daemon=True)
+        self._thread.start()
+        with _writers_lock:
+            _writers.append(self)
+
+    # Хуки allure_commons: только постановка события в очередь
+
+    @hookimpl
+    def report_result(self, result: Any) -> None:
+        self._put(("item", result))
+
+    @hookimpl
+    def report_container(self, container: Any) -> None:
+        self._put(("item", container))
+
+    @hookimpl
+    def report_attached_file(self, source: Any, file_name: str) -> None:
+        # Файл-источник копируется при записи пачки: он должен дожить до неё
+        self._put(("file", source, file_name))
+
+    @hookimpl
+    def report_attached_data(self, body: Any, file_name: str) -> None:
+        self._put(("data", body, file_name))
+
+    @hookimpl
+    def report_globals(self, globals_item: Any) -> None:
+        self._put(("item", globals_item))
+
+    def _put(self, event: Any) -> None:
+        if self._closed:
+            # После close события пишутся сразу, чтобы не потерять их
+            self._write(event)
+            return
+        self.counters["events"] += 1
+        self._queue.put(event)
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size and not _is_marker(batch[-1]):
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            self.counters["max_queue"] = max(self.counters["max_queue"], self._queue.qsize() + len(batch))
+            started = time.perf_counter()
+            for event in batch:
+                if event is _STOP:
+                    break
+                if isinstance(event, threading.Event):
+                    event.set()
+                else:
+                    self._write(event)
+            self.write_s += time.perf_counter() - started
+            self.counters["batches"] += 1
+            if batch[-1] is _STOP:
+                return
+
+    def _write(self, event: Any) -> None:
+        kind = event[0]
+        try:
+            if kind == "item":
+                self._write_item(event[1])
+            elif kind == "data":
+                body = event[1].encode("utf-8") if isinstance(event[1], str) else event[1]
+                self._replace(event[2], lambda path: path.write_bytes(body))
+                self.counters["bytes"] += len(body)
+            else:
+                self._replace(event[2], lambda path: shutil.copy2(event[1], path))
+            self.counters["written"] += 1
+        except Exception as exc:  # noqa: BLE001 — поток записи не должен останавливаться
+            self.counters["errors"] += 1
+            self.last_error = f"{type(exc).__name__}: {exc}"
+
+    def _write_item(self, item: Any) -> None:
+        if hasattr(item, "steps"):
+            counts = collapse_steps(item, self.collapse_after, self.sample_every)
+        else:
+            counts = (0, 0)
+            for fixture in getattr(item, "befores", []) + getattr(item, "afters", []):
+                nested = collapse_steps(fixture, self.collapse_after, self.sample_every)
+                counts = (counts[0] + nested[0], counts[1] + nested[1])
+        self.counters["collapsed_steps"] += counts[0]
+        self.counters["sampled_steps"] += counts[1]
+        data = asdict(item, filter=lambda _, v: v or v is False)
+        text = json.dumps(data, indent=self.indent, ensure_ascii=False)
+        self._replace(item.file_pattern.format(prefix=uuid.uuid4()), lambda path: _write_text(path, text))
+        self.counters["bytes"] += len(text)
+
+    def _replace(self, file_name: str, write: Any) -> None:
+        tmp_path = self.report_dir / f"{file_name}.tmp"
+        write(tmp_path)
+        os.replace(tmp_path, self.report_dir / file_name)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Дождаться записи всех событий, поставленных в очередь до вызова.
+
+        Returns:
+            bool: True, если очередь записана за timeout.
+        """
+        if self._closed or not self._thread.is_alive():
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout: Optional[float] = 30.0) -> None:
+        """
+        Записать очередь и остановить поток. Повторный вызов ничего не делает.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        # Если поток не успел или уже остановлен, дописать остаток здесь
+        while True:
+            try:
+                event = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if not _is_marker(event):
+                self._write(event)
+        with _writers_lock:
+            if self in _writers:
+                _writers.remove(self)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Счётчики записи: события, записанные файлы, пачки, ошибки и свёрнутые шаги.
+        """
+        return {
+            **self.counters,
+            "queued": self._queue.qsize(),
+            "write_ms": round(self.write_s * 1000, 2),
+            "collapse_after": self.collapse_after,
+            "sample_every": self.sample_every,
+            "last_error": self.last_error,
+        }
+
+
+def _is_marker(event: Any) -> bool:
+    # Служебные события очереди: остановка потока и ожидание flush
+    return event is _STOP or isinstance(event, threading.Event)
+
+
+def _write_text(path: Path, text: str) -> None:
+    with io.open(path, "w", encoding="utf8") as fh:
+        fh.write(text)
+
+
+def close_writers() -> List[Dict[str, Any]]:
+    """
+    Дописать и закрыть все фоновые записи процесса.
+
+    Returns:
+        list: Статистика каждой закрытой записи.
+    """
+    with _writers_lock:
+        writers = list(_writers)
+    stats = []
+    for writer in writers:
+        writer.close()
+        stats.append(writer.stats())
+    return stats
+
+
+def _on_sigterm(signum: int, frame: Any) -> None:
+    close_writers()
+    signal.signal(signum, signal.SIG_DFL)
+    os.kill(os.getpid(), signum)
+
+
+def install() -> None:
+    """
+    Писать результаты allure фоновым потоком в этом процессе pytest.
+
+    Вызывается до pytest_configure плагина allure-pytest: плагин создаст
+    BackgroundAllureWriter вместо AllureFileLogger. Очередь дописывается
+    при выходе интерпретатора и по SIGTERM (если у сигнала нет своего
+    обработчика).
+    """
+    import allure_pytest.plugin
+
+    allure_pytest.plugin.AllureFileLogger = BackgroundAllureWriter
+    atexit.register(close_writers)
+    if threading.current_thread() is threading.main_thread() and signal.getsignal(signal.SIGTERM) == signal.SIG_DFL:
+        signal.signal(signal.SIGTERM, _on_sigterm)
@@ -0,0 +1,291 @@
+import asyncio
+import json
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional
+
+import aiohttp
+import allure
+
+from data.config import get_auth_headers, get_settings
+from data.test_data import INVALID_TOKEN
+from utils.api_client import RETRY_STATUS_CODES
+
+# Внутри fan_out отдельные шаги не пишутся: параллельные корутины в одном
+# потоке перепутали бы вложенность шагов allure. Вместо них — один шаг
+# на всю пачку со сводкой во вложении.
+_SUPPRESS_STEPS: ContextVar[bool] = ContextVar("_SUPPRESS_STEPS", default=False)
+
+
+@contextmanager
+def _step(title: str) -> Iterator[None]:
+    """
+    Шаг allure, который не пишется внутри fan_out.
+
+    Args:
+        title: Заголовок шага.
+    """
+    if _SUPPRESS_STEPS.get():
+        yield
+        return
+    with allure.step(title):
+        yield
+
+
+class AsyncApiResponse:
+    """
+    Прочитанный ответ API с интерфейсом, совместимым с requests.Response
+    в той части, которую используют тесты (status_code, headers, text, json()).
+    """
+
+    __slots__ = ("status_code", "headers", "content", "url")
+
+    def __init__(self, status_code: int, headers: Dict[str, str], content: bytes, url: str) -> None:
+        self.status_code: int = status_code
+        self.headers: Dict[str, str] = headers
+        self.content: bytes = content
+        self.url: str = url
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self) -> Any:
+        return json.loads(self.content)
+
+
+class AsyncKinopoiskApiClient:
+    """
+    Асинхронный клиент API Кинопоиска v1.4.
+
+    Повторяет методы KinopoiskApiClient, но выполняет запросы через aiohttp,
+    поэтому сотни запросов могут одновременно выполняться в одном цикле
+    событий. Использовать как асинхронный контекстный менеджер или закрывать
+    явно через close(). Параметры, не заданные явно (None), берутся из
+    настроек окружения (data/config.py).
+    """
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        timeout: Optional[float] = None,
+        concurrency: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        backoff_factor: Optional[float] = None,
+    ) -> None:
+        settings = get_settings()
+        self.base_url: str = base_url or settings.base_api_url
+        self.api_key: str = settings.api_key if api_key is None else api_key
+        self.timeout: aiohttp.ClientTimeout = aiohttp.ClientTimeout(
+            total=settings.api_timeout if timeout is None else timeout
+        )
+        self.concurrency: int = settings.api_concurrency if concurrency is None else concurrency
+        self.max_retries: int = settings.api_max_retries if max_retries is None else max_retries
+        self.backoff_factor: float = settings.api_backoff_factor if backoff_factor is None else backoff_factor
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def __aenter__(self) -> "AsyncKinopoiskApiClient":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.close()
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """
+        Сессия aiohttp, создаётся лениво в текущем цикле событий.
+        """
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.concurrency)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self._session
+
+    async def close(self) -> None:
+        """
+        Закрыть сессию и все соединения.
+        """
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    def _retry_delay(self, attempt: int, retry_after: Optional[str]) -> float:
+        """
+        Задержка перед повтором: Retry-After, если он задан, иначе
+        экспоненциальная, как у urllib3.Retry в синхронном клиенте.
+        """
+        if retry_after:
+            try:
+                return max(float(retry_after), 0.0)
+            except ValueError:
+                pass
+        return self.backoff_factor * (2 ** attempt)
+
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        headers: Dict[str, str],
+        params: Optional[Dict[str, Any]] = None,
+    ) -> AsyncApiResponse:
+        """
+        Выполнить HTTP-запрос с повторами для ответов 429/5xx.
+
+        Args:
+            method: HTTP-метод.
+            path: Путь относительно базового URL API.
+            headers: HTTP-заголовки запроса.
+            params: Query-параметры запроса.
+
+        Returns:
+            AsyncApiResponse: прочитанный HTTP-ответ API.
+        """
+        url: str = f"{self.base_url}{path}"
+        attempt = 0
+        while True:
+            async with self.session.request(method, url, headers=headers, params=params) as resp:
+                content = await resp.read()
+                response = AsyncApiResponse(resp.status, dict(resp.headers), content, str(resp.url))
+            # POST, как и в синхронном клиенте, не повторяем
+            retryable = method == "GET" and response.status_code in RETRY_STATUS_CODES
+            if not retryable or attempt >= self.max_retries:
+                return response
+            await asyncio.sleep(self._retry_delay(attempt, response.headers.get("Retry-After")))
+            attempt += 1
+
+    async def search_movie_by_query(self, query: str) -> AsyncApiResponse:
+        """
+        Поиск фильма по строке запроса.
+
+        Args:
+            query: Строка запроса для параметра `query`.
+
+        Returns:
+            AsyncApiResponse: HTTP-ответ API.
+        """
+        with _step(f"GET /movie/search c query='{query}' и корректным токеном"):
+            params: Dict[str, Any] = {"query": query}
+            return await self._request("GET", "/movie/search", get_auth_headers(self.api_key), params)
+
+    async def get_movies_by_genre(self, genre_name: str) -> AsyncApiResponse:
+        """
+        Получить список фильмов по жанру.
+
+        Args:
+            genre_name: Название жанра на русском.
+
+        Returns:
+            AsyncApiResponse: HTTP-ответ API.
+        """
+        with _step(f"GET /movie по жанру '{genre_name}'"):
+            params: Dict[str, Any] = {"genres.name": genre_name}
+            return await self._request("GET", "/movie", get_auth_headers(self.api_key), params)
+
+    async def search_movie_empty_query(self) -> AsyncApiResponse:
+        """
+        Поиск фильма с пустым параметром query.
+
+        Returns:
+            AsyncApiResponse: HTTP-ответ API.
+        """
+        with _step("GET /movie/search c пустым query-параметром"):
+            # query без значения → ?query
+            return await self._request("GET", "/movie/search?query", get_auth_headers(self.api_key))
+
+    async def search_movie_with_wrong_method(self, query: str) -> AsyncApiResponse:
+        """
+        Отправка запроса с некорректным HTTP-методом.
+
+        Args:
+            query: Строка запроса.
+
+        Returns:
+            AsyncApiResponse: HTTP-ответ API.
+        """
+        with _step(f"POST /movie/search c query='{query}' вместо GET"):
+            params: Dict[str, Any] = {"query": query}
+            return await self._request("POST", "/movie/search", get_auth_headers(self.api_key), params)
+
+    async def search_movie_without_token(self, query: str) -> AsyncApiResponse:
+        """
+        Поиск фильма без передачи токена авторизации.
+
+        Args:
+            query: Строка запроса.
+
+        Returns:
+            AsyncApiResponse: HTTP-ответ API.
+        """
+        with _step(f"GET /movie/search c query='{query}' и без токена авторизации"):
+            params: Dict[str, Any] = {"query": query}
+            return await self._request("GET", "/movie/search", {}, params)
+
+    async def search_movie_with_invalid_token(self, query: str) -> AsyncApiResponse:
+        """
+        Поиск фильма с некорректным токеном авторизации.
+
+        Args:
+            query: Строка запроса.
+
+        Returns:
+            AsyncApiResponse: HTTP-ответ API.
+        """
+        with _step(f"GET /movie/search c query='{query}' и неверным токеном"):
+            headers: Dict[str, str] = get_auth_headers(self.api_key)
+            headers["x-api-key"] = INVALID_TOKEN
+            params: Dict[str, Any] = {"query": query}
+            return await self._request("GET", "/movie/search", headers, params)
+
+    async def fan_out(
+        self,
+        method: Callable[[Any], Awaitable[AsyncApiResponse]],
+        args: Iterable[Any],
+        concurrency: Optional[int] = None,
+    ) -> List[Any]:
+        """
+        Выполнить метод клиента для каждого аргумента с ограничением
+        числа одновременных запросов.
+
+        Аргументы читаются из итератора по мере освобождения воркеров,
+        поэтому длинный список запросов не создаёт задачи заранее.
+        Ошибка отдельного запроса не прерывает остальные: на её месте
+        в результате будет объект исключения.
+
+        Args:
+            method: Метод клиента, например client.search_movie_by_query.
+            args: Аргументы для каждого вызова.
+            concurrency: Максимум одновременных запросов
+                (по умолчанию — размер пула соединений клиента).
+
+        Returns:
+            list: Ответы (или исключения) в порядке аргументов.
+        """
+        limit = concurrency or self.concurrency
+        results: Dict[int, Any] = {}
+        source = enumerate(args)
+
+        async def worker() -> None:
+            for index, arg in source:
+                try:
+                    results[index] = await method(arg)
+                except Exception as exc:  # noqa: BLE001 — собираем все ошибки пачки
+                    results[index] = exc
+
+        title = f"Параллельно: {getattr(method, '__name__', 'request')} (до {limit} запросов)"
+        with allure.step(title):
+            token = _SUPPRESS_STEPS.set(True)
+            try:
+                await asyncio.gather(*(worker() for _ in range(limit)))
+            finally:
+                _SUPPRESS_STEPS.reset(token)
+
+            ordered = [results[i] for i in range(len(results))]
+            statuses: Dict[str, int] = {}
+            for item in ordered:
+                key = str(item.status_code) if isinstance(item, AsyncApiResponse) else type(item).__name__
+                statuses[key] = statuses.get(key, 0) + 1
+            allure.attach(
+                json.dumps({"total": len(ordered), "statuses": statuses}, ensure_ascii=False, indent=2),
+                name="Сводка параллельных запросов",
+                attachment_type=allure.attachment_type.JSON,
+            )
+        return ordered
@@ -0,0 +1,206 @@
+"""
+Повторяемые замеры производительности и сравнение с сохранёнными базовыми
+значениями.
+
+Используется бенчмарками из tests/benchmarks через фикстуру `bench`
+(см. conftest.py): каждый замер сравнивается с базовым значением из
+benchmarks/baselines.json, и тест падает, если метрика ухудшилась больше
+допустимого порога. Базовые значения зависят от машины, поэтому в
+репозиторий не попадают: их записывает только явный `--bench-update`,
+а замер без базы пропускается.
+"""
+
+import gc
+import json
+import platform
+import statistics
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+
+class BenchmarkResult:
+    """
+    Результат замера: время одной операции в секундах по всем повторам.
+    """
+
+    __slots__ = ("name", "samples", "ops_per_sample")
+
+    def __init__(self, name: str, samples: List[float], ops_per_sample: int) -> None:
+        self.name: str = name
+        self.samples: List[float] = samples
+        self.ops_per_sample: int = ops_per_sample
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.samples)
+
+    @property
+    def best(self) -> float:
+        return min(self.samples)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "median_s": self.median,
+            "best_s": self.best,
+            "stdev_s": statistics.pstdev(self.samples),
+            "repeat": len(self.samples),
+            "ops_per_sample": self.ops_per_sample,
+        }
+
+
+def measure(
+    name: str,
+    func: Callable[[], Any],
+    repeat: int = 7,
+    warmup: int = 1,
+    number: int = 1,
+) -> BenchmarkResult:
+    """
+    Замерить функцию: warmup прогонов без учёта, затем repeat серий
+    по number вызовов. Сборщик мусора на время серии отключается.
+
+    Args:
+        name: Имя метрики.
+        func: Замеряемая операция.
+        repeat: Число серий.
+        warmup: Число прогревочных вызовов.
+        number: Вызовов в одной серии (для очень быстрых операций).
+
+    Returns:
+        BenchmarkResult: Время одной операции по сериям.
+    """
+    for _ in range(warmup):
+        func()
+
+    samples: List[float] = []
+    gc_was_enabled = gc.isenabled()
+    for _ in range(repeat):
+        gc.collect()
+        gc.disable()
+        try:
+            started = time.perf_counter()
+            for _ in range(number):
+                func()
+            samples.append((time.perf_counter() - started) / number)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+    return BenchmarkResult(name, samples, number)
+
+
+class BaselineStore:
+    """
+    Базовые значения метрик в JSON-файле.
+
+    Args:
+        path: Путь к файлу базовых значений.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path: Path = path
+        self.data: Dict[str, Any] = {}
+        if path.exists():
+            self.data = json.loads(path.read_text(encoding="utf-8"))
+        self.dirty: bool = False
+
+    def get(self, name: str) -> Optional[float]:
+        entry = self.data.get("metrics", {}).get(name)
+        return None if entry is None else float(entry["best_s"])
+
+    def set(self, result: BenchmarkResult) -> None:
+        self.data.setdefault("metrics", {})[result.name] = {"best_s": result.best}
+        self.dirty = True
+
+    def save(self) -> None:
+        if not self.dirty:
+            return
+        self.data["machine"] = {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(),
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        text = json.dumps(self.data, ensure_ascii=False, indent=2, sort_keys=True)
+        self.path.write_text(text + "\n", encoding="utf-8")
+        self.dirty = False
+
+
+def regression(result: BenchmarkResult, baseline: Optional[float], threshold: float) -> Optional[str]:
+    """
+    Проверить, не ухудшилась ли метрика относительно базового значения.
+
+    Сравнивается лучшее время серии: в отличие от медианы оно почти не
+    зависит от фонового шума машины.
+
+    Args:
+        result: Свежий замер.
+        baseline: Базовое лучшее время, секунды; None — сравнивать не с чем.
+        threshold: Допустимое относительное ухудшение (0.2 — на 20%).
+
+    Returns:
+        str | None: Описание регрессии или None.
+    """
+    if baseline is None or baseline <= 0:
+        return None
+    change = result.best / baseline - 1
+    if change <= threshold:
+        return None
+    return (
+        f"{result.name}: {result.best * 1e6:.1f} мкс против базовых "
+        f"{baseline * 1e6:.1f} мкс (+{change:.0%}, порог {threshold:.0%})"
+    )
+
+
+class BenchmarkSession:
+    """
+    Замеры одной сессии pytest: сравнение с базой, обновление базы и отчёт.
+
+    Args:
+        store: Хранилище базовых значений.
+        threshold: Допустимое относительное ухудшение.
+        update: Перезаписать базовые значения свежими замерами.
+    """
+
+    def __init__(self, store: BaselineStore, threshold: float, update: bool = False) -> None:
+        self.store: BaselineStore = store
+        self.threshold: float = threshold
+        self.update: bool = update
+        self.results: Dict[str, Dict[str, Any]] = {}
+
+    def check(self, result: BenchmarkResult) -> Optional[str]:
+        """
+        Учесть замер: сравнить с базой или, в режиме update, записать его
+        как базу. Метрика без базового значения ни с чем не сравнивается
+        (см. missing_baseline).
+
+        Returns:
+            str | None: Описание регрессии или None.
+        """
+        baseline = self.store.get(result.name)
+        problem = None if self.update else regression(result, baseline, self.threshold)
+        entry = result.to_dict()
+        entry["baseline_best_s"] = baseline
+        entry["regression"] = problem
+        self.results[result.name] = entry
+        if self.update:
+            self.store.set(result)
+        return problem
+
+    def missing_baseline(self, name: str) -> bool:
+        """
+        Замер name не с чем было сравнить: базового значения нет, а режим
+        обновления базы не включён.
+        """
+        return not self.update and self.results[name]["baseline_best_s"] is None
+
+    def write_report(self, path: Path) -> None:
+        """
+        Сохранить базовые значения и записать отчёт о замерах сессии.
+        """
+        self.store.save()
+        if not self.results:
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        report = {"threshold": self.threshold, "results": self.results}
+        path.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
@@ -0,0 +1,271 @@
+"""
+Массовый прогон поисковых запросов из JSONL-корпуса через KinopoiskApiClient.
+
+Корпус читается построчно, одновременно в работе не больше window
+запросов, поэтому память не растёт с размером корпуса. Повторяющиеся
+запросы в API не отправляются: их результат берётся из базы состояния
+(sqlite), куда записывается каждый успешный запрос. Запросы с ошибкой
+(не 200, таймаут, ошибка соединения) в базу не попадают: их повторы
+и строки после продолжения прогона запрашиваются заново. Результаты
+пишутся в выходной JSONL в порядке строк корпуса, а вместе с ними
+фиксируется контрольная точка (номер строки и размер выходного файла):
+после падения прогон продолжается с неё тем же запуском.
+
+Запуск:
+    python -m utils.bulk_runner corpus.jsonl --concurrency 8 --rate 5
+    python -m utils.bulk_runner requests.jsonl --field title --max-lines 100
+"""
+
+import argparse
+import json
+import sqlite3
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterator, Optional, Tuple
+
+import requests
+
+from data.config import get_settings
+from utils.api_client import KinopoiskApiClient
+from utils.rate_limiter import TokenBucket
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (query TEXT PRIMARY KEY, line INTEGER NOT NULL, result TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS checkpoint (id INTEGER PRIMARY KEY CHECK (id = 1), line INTEGER NOT NULL, offset INTEGER NOT NULL);
+"""
+
+
+def iter_corpus(path: Path, field: str = "query", start_line: int = 0) -> Iterator[Tuple[int, Optional[str]]]:
+    """
+    Построчно читать запросы из JSONL-корпуса.
+
+    Args:
+        path: Файл корпуса.
+        field: Поле объекта со строкой запроса.
+        start_line: Пропустить строки с номерами до этого (включительно).
+
+    Yields:
+        tuple: Номер строки (с 1) и запрос; None, если строка не разобрана.
+    """
+    with open(path, encoding="utf-8") as fh:
+        for line_no, line in enumerate(fh, start=1):
+            if line_no <= start_line or not line.strip():
+                continue
+            try:
+                value = json.loads(line).get(field)
+            except (ValueError, AttributeError):
+                value = None
+            yield line_no, value.strip() if isinstance(value, str) else None
+
+
+class _Pending:
+    __slots__ = ("line", "query", "future", "started")
+
+    def __init__(self, line: int, query: Optional[str], future: Optional[Future]) -> None:
+        self.line = line
+        self.query = query
+        self.future = future
+        self.started = time.perf_counter()
+
+
+class BulkRunner:
+    """
+    Прогон корпуса запросов с ограничением конкурентности и контрольными точками.
+
+    Args:
+        client: Клиент API; частоту запросов ограничивает его rate_limiter.
+        output: Выходной JSONL, по строке на каждую строку корпуса.
+        state_path: База sqlite с результатами и контрольной точкой.
+        concurrency: Сколько запросов выполнять одновременно.
+        checkpoint_every: Раз в сколько строк фиксировать контрольную точку.
+    """
+
+    def __init__(
+        self,
+        client: KinopoiskApiClient,
+        output: Path,
+        state_path: Path,
+        concurrency: int = 8,
+        checkpoint_every: int = 100,
+    ) -> None:
+        self.client: KinopoiskApiClient = client
+        self.output: Path = output
+        self.state_path: Path = state_path
+        self.concurrency: int = max(concurrency, 1)
+        # Окно ожидающих записи строк: ограничивает память при любом корпусе
+        self.window: int = self.concurrency * 4
+        self.checkpoint_every: int = max(checkpoint_every, 1)
+        self.stats: Dict[str, int] = {"lines": 0, "requests": 0, "duplicates": 0, "errors": 0}
+
+    def _search(self, query: str) -> Dict[str, Any]:
+        started = time.perf_counter()
+        result: Dict[str, Any] = {"status": None, "total": None, "error": None}
+        try:
+            response = self.client.search_movie_by_query(query)
+            result["status"] = response.status_code
+            if response.status_code == 200:
+                result["total"] = response.json().get("total")
+            else:
+                result["error"] = response.text[:200]
+        except requests.exceptions.RequestException as exc:
+            result["error"] = f"{type(exc).__name__}: {exc}"
+        result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        return result
+
+    def _lookup(self, db: sqlite3.Connection, query: str) -> Optional[Tuple[int, Dict[str, Any]]]:
+        row = db.execute("SELECT line, result FROM results WHERE query = ?", (query,)).fetchone()
+        if row is None:
+            return None
+        result = json.loads(row[1])
+        # Ошибки из базы прежних версий не считаются ответом
+        return None if result["error"] is not None else (row[0], result)
+
+    def _store(self, db: sqlite3.Connection, line: int, query: str, result: Dict[str, Any]) -> None:
+        """
+        Запомнить результат для повторов запроса; ошибки не запоминаются,
+        чтобы временные сбои (429, 5xx, таймауты) запрашивались снова.
+        """
+        self.stats["errors"] += result["error"] is not None
+        if result["error"] is None:
+            db.execute(
+                "INSERT OR REPLACE INTO results (query, line, result) VALUES (?, ?, ?)",
+                (query, line, json.dumps(result, ensure_ascii=False)),
+            )
+
+    def run(self, corpus: Path, field: str = "query", max_lines: Optional[int] = None) -> Dict[str, int]:
+        """
+        Прогнать корпус, продолжив с контрольной точки, если она есть.
+
+        Args:
+            corpus: Файл корпуса JSONL.
+            field: Поле объекта со строкой запроса.
+            max_lines: Обработать не больше стольких строк за этот запуск.
+
+        Returns:
+            dict: Счётчики запуска: строки, запросы к API, повторы, ошибки.
+        """
+        self.state_path.parent.mkdir(parents=True, exist_ok=True)
+        self.output.parent.mkdir(parents=True, exist_ok=True)
+        db = sqlite3.connect(self.state_path)
+        db.executescript(_SCHEMA)
+        row = db.execute("SELECT line, offset FROM checkpoint WHERE id = 1").fetchone()
+        start_line, offset = row if row else (0, 0)
+
+        # Строки, записанные после контрольной точки, повторяются заново
+        out = open(self.output, "a+b")
+        out.truncate(offset)
+        out.seek(offset)
+
+        pending: Deque[_Pending] = deque()
+        in_flight: Dict[str, int] = {}
+        last_line = start_line
+        since_checkpoint = 0
+        pool = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="bulk")
+
+        def flush_one() -> None:
+            nonlocal last_line, since_checkpoint
+            item = pending.popleft()
+            record: Dict[str, Any] = {"line": item.line, "query": item.query, "duplicate_of": None}
+            if item.query is None:
+                record.update(status=None, total=None, error="нет строки запроса", elapsed_ms=0.0)
+                self.stats["errors"] += 1
+            elif item.future is None:
+                found = self._lookup(db, item.query)
+                if found is not None:
+                    source_line, result = found
+                    record.update(result, duplicate_of=source_line, elapsed_ms=0.0)
+                    self.stats["duplicates"] += 1
+                else:
+                    # Исходный запрос этой строки завершился ошибкой — повторяем
+                    result = self._search(item.query)
+                    record.update(result)
+                    self.stats["requests"] += 1
+                    self._store(db, item.line, item.query, result)
+            else:
+                result = item.future.result()
+                record.update(result)
+                in_flight.pop(item.query, None)
+                self._store(db, item.line, item.query, result)
+            out.write((json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8"))
+            last_line = item.line
+            self.stats["lines"] += 1
+            since_checkpoint += 1
+            if since_checkpoint >= self.checkpoint_every:
+                checkpoint()
+
+        def checkpoint() -> None:
+            nonlocal since_checkpoint
+            out.flush()
+            db.execute(
+                "INSERT OR REPLACE INTO checkpoint (id, line, offset) VALUES (1, ?, ?)", (last_line, out.tell())
+            )
+            db.commit()
+            since_checkpoint = 0
+
+        try:
+            for processed, (line_no, query) in enumerate(iter_corpus(corpus, field, start_line), start=1):
+                if max_lines is not None and processed > max_lines:
+                    break
+                future: Optional[Future] = None
+                if query is not None and query not in in_flight and self._lookup(db, query) is None:
+                    future = pool.submit(self._search, query)
+                    in_flight[query] = line_no
+                    self.stats["requests"] += 1
+                pending.append(_Pending(line_no, query, future))
+                while len(pending) >= self.window:
+                    flush_one()
+            while pending:
+                flush_one()
+        finally:
+            for item in pending:
+                if item.future is not None:
+                    item.future.cancel()
+            pool.shutdown(wait=True)
+            checkpoint()
+            out.close()
+            db.close()
+        return dict(self.stats)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Массовый прогон поисковых запросов из JSONL-корпуса")
+    parser.add_argument("corpus", type=Path, help="JSONL-файл с запросами")
+    parser.add_argument("--field", default="query", help="поле объекта со строкой запроса")
+    parser.add_argument("--output", type=Path, default=None, help="по умолчанию reports/bulk_results.jsonl")
+    parser.add_argument("--state", type=Path, default=None, help="по умолчанию reports/bulk_state.sqlite")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=0.0, help="целевая частота, запросов/с (0 — без ограничения)")
+    parser.add_argument("--max-lines", type=int, default=None, help="обработать не больше стольких строк")
+    parser.add_argument("--restart", action="store_true", help="начать заново, удалив состояние и результаты")
+    args = parser.parse_args()
+    settings = get_settings()
+    args.output = args.output or settings.reports_dir / "bulk_results.jsonl"
+    args.state = args.state or settings.reports_dir / "bulk_state.sqlite"
+
+    if args.restart:
+        args.state.unlink(missing_ok=True)
+        args.output.unlink(missing_ok=True)
+
+    limiter = None
+    if args.rate > 0:
+        limiter = TokenBucket(
+            settings.api_key,
+            rate=args.rate,
+            burst=args.concurrency,
+            daily_quota=settings.api_daily_quota,
+            state_dir=settings.api_rate_state_dir,
+        )
+    client = KinopoiskApiClient(pool_maxsize=args.concurrency, rate_limiter=limiter)
+    try:
+        stats = BulkRunner(client, args.output, args.state, concurrency=args.concurrency).run(
+            args.corpus, field=args.field, max_lines=args.max_lines
+        )
+    finally:
+        client.close()
+    print(json.dumps(stats, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
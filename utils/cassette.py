@@ -0,0 +1,151 @@
+"""
+Запись и воспроизведение HTTP-взаимодействий с API Кинопоиска (cassette).
+
+В режиме записи каждый ответ сохраняется в хранилище на диске, в режиме
+воспроизведения запросы обслуживаются из него без сети.
+"""
+
+import gzip
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import requests
+
+from data.config import get_settings
+from utils.http_adapters import PooledAdapter
+from utils.http_records import (
+    key_digest,
+    request_key,
+    response_from_record,
+    response_to_record,
+)
+
+MODE_OFF = "off"
+MODE_RECORD = "record"
+MODE_REPLAY = "replay"
+MODES = (MODE_OFF, MODE_RECORD, MODE_REPLAY)
+
+
+class CassetteMissError(requests.exceptions.RequestException):
+    """
+    В строгом режиме воспроизведения для запроса нет записи.
+    """
+
+
+class CassetteStore:
+    """
+    Шардированное хранилище записей на диске.
+
+    Записи раскладываются по 256 шардам по первому байту хеша ключа; каждый
+    шард — gzip-файл с JSON-строками, дописываемый в конец. Шард читается
+    целиком при первом обращении к любому его ключу, поэтому при десятках
+    тысяч записей в память попадают только реально используемые шарды.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root: Path = Path(root)
+        self._shards: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def _shard_path(self, shard: str) -> Path:
+        return self.root / f"{shard}.jsonl.gz"
+
+    def _load_shard(self, shard: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Загрузить шард в память (один раз). Более поздняя запись
+        с тем же ключом перекрывает раннюю.
+        """
+        loaded = self._shards.get(shard)
+        if loaded is not None:
+            return loaded
+
+        loaded = {}
+        path = self._shard_path(shard)
+        if path.exists():
+            with gzip.open(path, "rt", encoding="utf-8") as fh:
+                for line in fh:
+                    if line.strip():
+                        entry = json.loads(line)
+                        loaded[entry["key"]] = entry
+        self._shards[shard] = loaded
+        return loaded
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Найти запись по ключу запроса.
+
+        Args:
+            key: Ключ, построенный request_key.
+
+        Returns:
+            dict | None: Запись или None, если её нет.
+        """
+        shard = key_digest(key)[:2]
+        with self._lock:
+            return self._load_shard(shard).get(key)
+
+    def put(self, key: str, response_record: Dict[str, Any]) -> None:
+        """
+        Добавить запись в хранилище.
+
+        Args:
+            key: Ключ, построенный request_key.
+            response_record: Ответ, сериализованный response_to_record.
+        """
+        shard = key_digest(key)[:2]
+        entry = {"key": key, "recorded_at": time.time(), "response": response_record}
+        line = json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n"
+        with self._lock:
+            self.root.mkdir(parents=True, exist_ok=True)
+            with gzip.open(self._shard_path(shard), "at", encoding="utf-8") as fh:
+                fh.write(line)
+            self._load_shard(shard)[key] = entry
+
+
+class CassetteAdapter(PooledAdapter):
+    """
+    HTTP-адаптер, который записывает ответы в CassetteStore или
+    воспроизводит их оттуда.
+
+    В режиме replay запрос без записи уходит в сеть и записывается,
+    а при strict=True вызывает CassetteMissError.
+    """
+
+    def __init__(
+        self,
+        store: CassetteStore,
+        mode: str = MODE_REPLAY,
+        strict: bool = False,
+        api_key: Optional[str] = None,
+        **kwargs: Any,
+    ) -> None:
+        if mode not in (MODE_RECORD, MODE_REPLAY):
+            raise ValueError(f"Неизвестный режим cassette: {mode!r}")
+        super().__init__(**kwargs)
+        self.store: CassetteStore = store
+        self.mode: str = mode
+        self.strict: bool = strict
+        self.api_key: str = get_settings().api_key if api_key is None else api_key
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def send(self, request: requests.PreparedRequest, **kwargs: Any) -> requests.Response:
+        key = request_key(
+            request.method or "GET", request.url or "", request.headers, self.api_key
+        )
+
+        if self.mode == MODE_REPLAY:
+            entry = self.store.get(key)
+            if entry is not None:
+                self.hits += 1
+                return response_from_record(entry["response"], request)
+            self.misses += 1
+            if self.strict:
+                raise CassetteMissError(f"Нет записи для запроса: {key}", request=request)
+
+        response = super().send(request, **kwargs)
+        self.store.put(key, response_to_record(response))
+        return response
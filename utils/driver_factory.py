@@ -0,0 +1,225 @@
+"""
+Создание экземпляров Chrome WebDriver для UI-тестов.
+
+Чтобы холодный старт браузера не повторялся целиком в каждом прогоне
+и каждом воркере xdist:
+- chromedriver под установленную версию Chrome находится один раз через
+  webdriver-manager и берётся из кеша (KINOPOISK_DRIVER_CACHE_DIR);
+- профиль браузера копируется из заранее прогретого шаблона, где уже
+  есть кеш и состояние первого запуска (KINOPOISK_UI_PROFILE_TEMPLATE);
+- тесты могут подключаться к долгоживущему сервису WebDriver вместо
+  запуска chromedriver в каждом процессе (KINOPOISK_UI_REMOTE_URL).
+
+Сервис WebDriver:
+    python -m utils.driver_factory serve --port 9515
+    KINOPOISK_UI_REMOTE_URL=http://127.0.0.1:9515 pytest -m ui
+"""
+
+import argparse
+import functools
+import shutil
+import subprocess
+import tempfile
+import time
+import weakref
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.chromium.remote_connection import ChromiumRemoteConnection
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from data.config import get_settings
+from utils.file_lock import file_lock
+from utils.network_filter import NetworkFilter
+
+# Файлы блокировок запущенного браузера, которые нельзя копировать из шаблона
+_PROFILE_IGNORE = shutil.ignore_patterns("Singleton*", "lockfile", "*.lock", "Crashpad")
+_TEMPLATE_READY = ".template-ready"
+
+
+def build_chrome_options(page_load_strategy: str = "eager") -> Options:
+    """
+    Опции headless Chrome, общие для всех экземпляров.
+
+    Args:
+        page_load_strategy: normal | eager | none.
+
+    Returns:
+        Options: Опции Chrome.
+    """
+    options = Options()
+    options.add_argument("--headless")
+    options.add_argument("--window-size=1920,1080")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--no-sandbox")
+    options.page_load_strategy = page_load_strategy
+    # Журнал сетевых событий для учёта трафика навигаций (collect_traffic)
+    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    return options
+
+
+@functools.lru_cache(maxsize=None)
+def resolve_chromedriver() -> Optional[str]:
+    """
+    Путь к chromedriver под установленную версию Chrome.
+
+    Драйвер скачивается webdriver-manager один раз и дальше берётся из
+    кеша; воркеры xdist ждут друг друга на файловой блокировке, а не
+    скачивают драйвер параллельно. Без сети и кеша возвращается None —
+    тогда драйвер ищет сам Selenium (Selenium Manager или PATH).
+
+    Returns:
+        str | None: Путь к chromedriver.
+    """
+    settings = get_settings()
+    if settings.ui_chromedriver_path:
+        return settings.ui_chromedriver_path
+
+    from webdriver_manager.chrome import ChromeDriverManager
+    from webdriver_manager.core.driver_cache import DriverCacheManager
+
+    cache_dir = settings.ui_driver_cache_dir
+    with file_lock(cache_dir / "install.lock"):
+        try:
+            return ChromeDriverManager(cache_manager=DriverCacheManager(root_dir=str(cache_dir))).install()
+        except Exception:  # noqa: BLE001 — нет сети или неизвестная версия Chrome
+            return None
+
+
+def prepare_profile_template(template_dir: Path, driver_path: Optional[str] = None) -> Path:
+    """
+    Создать шаблон профиля Chrome, если его ещё нет: один раз запустить
+    браузер с этим профилем, чтобы он заполнил кеш и состояние первого
+    запуска.
+
+    Args:
+        template_dir: Каталог шаблона.
+        driver_path: Путь к chromedriver; None — найдёт Selenium.
+
+    Returns:
+        Path: Каталог готового шаблона.
+    """
+    with file_lock(template_dir.with_name(template_dir.name + ".lock")):
+        if (template_dir / _TEMPLATE_READY).exists():
+            return template_dir
+        shutil.rmtree(template_dir, ignore_errors=True)
+        options = build_chrome_options("normal")
+        options.add_argument(f"--user-data-dir={template_dir}")
+        driver = webdriver.Chrome(service=Service(driver_path), options=options)
+        try:
+            driver.get("about:blank")
+        finally:
+            driver.quit()
+        (template_dir / _TEMPLATE_READY).touch()
+    return template_dir
+
+
+def clone_profile(template_dir: Path) -> Path:
+    """
+    Скопировать шаблон профиля во временный каталог для нового браузера.
+
+    Returns:
+        Path: Каталог профиля; удаляется вместе с драйвером.
+    """
+    profile = Path(tempfile.mkdtemp(prefix="kinopoisk-chrome-"))
+    shutil.copytree(template_dir, profile, dirs_exist_ok=True, ignore=_PROFILE_IGNORE)
+    return profile
+
+
+def prepare_startup(remote_url: Optional[str] = None, profile_template: Optional[Path] = None) -> Dict[str, Any]:
+    """
+    Заранее найти chromedriver и подготовить шаблон профиля, чтобы время
+    запуска браузеров в пуле не включало эти разовые шаги.
+
+    Args:
+        remote_url: Адрес сервиса WebDriver; None — локальный chromedriver.
+        profile_template: Шаблон профиля; None — без шаблона.
+
+    Returns:
+        dict: Режим запуска, путь к драйверу, шаблон профиля и время
+        подготовки, секунды.
+    """
+    started = time.perf_counter()
+    info: Dict[str, Any] = {"mode": "remote" if remote_url else "local", "remote_url": remote_url}
+    if not remote_url:
+        info["chromedriver"] = resolve_chromedriver()
+        info["profile_template"] = None
+        if profile_template is not None:
+            info["profile_template"] = str(prepare_profile_template(profile_template, info["chromedriver"]))
+    info["prepare_s"] = round(time.perf_counter() - started, 3)
+    return info
+
+
+def create_chrome_driver(
+    page_load_strategy: str = "eager",
+    network_filter: Optional[NetworkFilter] = None,
+    remote_url: Optional[str] = None,
+    profile_template: Optional[Path] = None,
+) -> WebDriver:
+    """
+    Запустить новый экземпляр headless Chrome.
+
+    Args:
+        page_load_strategy: normal | eager | none.
+        network_filter: Правила блокировки запросов; None — без блокировки.
+        remote_url: Адрес сервиса WebDriver; None — запустить chromedriver.
+        profile_template: Шаблон профиля; None — чистый профиль. Для
+            удалённого сервиса не используется.
+
+    Returns:
+        WebDriver: Готовый к работе драйвер.
+    """
+    options = build_chrome_options(page_load_strategy)
+    if remote_url:
+        executor = ChromiumRemoteConnection(remote_url, vendor_prefix="goog", browser_name="chrome")
+        driver: WebDriver = webdriver.Remote(command_executor=executor, options=options)
+    else:
+        driver_path = resolve_chromedriver()
+        profile: Optional[Path] = None
+        if profile_template is not None:
+            profile = clone_profile(prepare_profile_template(profile_template, driver_path))
+            options.add_argument(f"--user-data-dir={profile}")
+        driver = webdriver.Chrome(service=Service(driver_path), options=options)
+        if profile is not None:
+            weakref.finalize(driver, shutil.rmtree, profile, True)
+
+    # Неявное ожидание не используется: элементы ждёт WaitEngine
+    # (utils/waits.py) асинхронным скриптом, которому нужен запас по
+    # таймауту скриптов на самое долгое ожидание теста
+    driver.set_script_timeout(get_settings().ui_test_wait_budget + 5)
+    if network_filter is not None:
+        network_filter.install(driver)
+    return driver
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Запуск Chrome для UI-тестов")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve = commands.add_parser("serve", help="долгоживущий сервис WebDriver (chromedriver)")
+    serve.add_argument("--port", type=int, default=9515)
+    commands.add_parser("prepare", help="закешировать chromedriver и подготовить шаблон профиля")
+    args = parser.parse_args()
+
+    driver_path = resolve_chromedriver()
+    if args.command == "prepare":
+        print(f"chromedriver: {driver_path or 'Selenium Manager / PATH'}")
+        template = get_settings().ui_profile_template_dir
+        if template is not None:
+            print(f"шаблон профиля: {prepare_profile_template(template, driver_path)}")
+        return
+
+    executable = driver_path or shutil.which("chromedriver")
+    if executable is None:
+        raise SystemExit("chromedriver не найден: задайте KINOPOISK_CHROMEDRIVER")
+    print(f"Сервис WebDriver: KINOPOISK_UI_REMOTE_URL=http://127.0.0.1:{args.port}")
+    try:
+        subprocess.run([executable, f"--port={args.port}"], check=False)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
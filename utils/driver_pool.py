@@ -0,0 +1,258 @@
+"""
+Пул прогретых экземпляров WebDriver для UI-тестов.
+
+Каждый процесс pytest (в том числе каждый воркер pytest-xdist) держит свой
+пул. Тест получает из пула проверенный браузер, а после теста браузер
+возвращается в пул или пересоздаётся, если он отработал заданное число
+тестов, слишком разросся по памяти или перестал отвечать. Замена
+создаётся в фоне, чтобы следующий тест не ждал холодного старта.
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.remote.webdriver import WebDriver
+
+# Размер кучи JS в Chrome; в других браузерах performance.memory нет
+_HEAP_SCRIPT = "return (window.performance && performance.memory) ? performance.memory.usedJSHeapSize : null;"
+
+
+class PooledDriver:
+    """
+    Экземпляр WebDriver и его учёт в пуле.
+    """
+
+    __slots__ = ("driver", "uses", "created_at", "startup_time", "baseline_heap")
+
+    def __init__(self, driver: WebDriver, startup_time: float) -> None:
+        self.driver: WebDriver = driver
+        self.uses: int = 0
+        self.created_at: float = time.time()
+        self.startup_time: float = startup_time
+        self.baseline_heap: Optional[int] = None
+
+
+class WebDriverPool:
+    """
+    Пул экземпляров WebDriver.
+
+    Args:
+        factory: Функция, создающая новый драйвер.
+        size: Сколько прогретых браузеров держать в процессе.
+        max_uses: После скольких тестов браузер пересоздаётся.
+        max_heap_growth_mb: Допустимый рост кучи JS с момента первой выдачи, МБ.
+        ping_timeout: Сколько ждать ответа браузера при проверке, секунды.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], WebDriver],
+        size: int = 1,
+        max_uses: int = 50,
+        max_heap_growth_mb: float = 256.0,
+        ping_timeout: float = 2.0,
+    ) -> None:
+        self.factory: Callable[[], WebDriver] = factory
+        self.size: int = max(size, 1)
+        self.max_uses: int = max_uses
+        self.max_heap_growth: float = max_heap_growth_mb * 1024 * 1024
+        self.ping_timeout: float = ping_timeout
+        self._idle: Deque[PooledDriver] = deque()
+        self._warming: Deque[Future] = deque()
+        self._in_use: Dict[int, PooledDriver] = {}
+        self._lock = threading.Lock()
+        # Фоновый запуск браузеров
+        self._starter = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="driver-start")
+        self.created: int = 0
+        self.recycled: int = 0
+        self.crashed: int = 0
+        self.handed_out: int = 0
+        self.startup_times: List[float] = []
+
+    def _create(self) -> PooledDriver:
+        started = time.perf_counter()
+        driver = self.factory()
+        startup = time.perf_counter() - started
+        with self._lock:
+            self.created += 1
+            self.startup_times.append(startup)
+        return PooledDriver(driver, startup)
+
+    def _spawn(self) -> None:
+        """
+        Запустить создание браузера в фоне.
+        """
+        with self._lock:
+            self._warming.append(self._starter.submit(self._create))
+
+    def warm_up(self) -> None:
+        """
+        Запустить недостающие до size браузеры и дождаться их готовности.
+        """
+        with self._lock:
+            missing = self.size - len(self._idle) - len(self._warming) - len(self._in_use)
+        for _ in range(missing):
+            self._spawn()
+        with self._lock:
+            pending = list(self._warming)
+        for future in pending:
+            future.exception()
+
+    def _ping(self, item: PooledDriver) -> bool:
+        """
+        Быстрая проверка, что браузер жив и отвечает.
+        """
+        # Отдельный поток на каждую проверку: зависший вызов не должен
+        # задерживать проверки других браузеров
+        future: Future = Future()
+
+        def ping() -> None:
+            try:
+                future.set_result(item.driver.execute_script("return 1;"))
+            except Exception as exc:  # noqa: BLE001 — передаём ошибку ожидающему
+                future.set_exception(exc)
+
+        threading.Thread(target=ping, daemon=True).start()
+        try:
+            return future.result(timeout=self.ping_timeout) == 1
+        except (FutureTimeoutError, WebDriverException):
+            return False
+
+    def _heap_size(self, item: PooledDriver) -> Optional[int]:
+        try:
+            value = item.driver.execute_script(_HEAP_SCRIPT)
+        except WebDriverException:
+            return None
+        return int(value) if value is not None else None
+
+    def _discard(self, item: PooledDriver) -> None:
+        """
+        Закрыть браузер, не дожидаясь его, если он завис.
+        """
+
+        def quit_driver() -> None:
+            try:
+                item.driver.quit()
+            except Exception:  # noqa: BLE001 — браузер уже мог упасть
+                service = getattr(item.driver, "service", None)
+                process = getattr(service, "process", None)
+                if process is not None:
+                    process.kill()
+
+        threading.Thread(target=quit_driver, daemon=True).start()
+
+    def _take_ready(self) -> PooledDriver:
+        """
+        Взять свободный браузер: из простаивающих, из запускаемых
+        или, если их нет, запустить новый.
+        """
+        while True:
+            with self._lock:
+                if self._idle:
+                    return self._idle.popleft()
+                future = self._warming.popleft() if self._warming else None
+            if future is None:
+                return self._create()
+            try:
+                return future.result()
+            except Exception:  # noqa: BLE001 — неудачный старт, пробуем следующий
+                with self._lock:
+                    self.crashed += 1
+
+    def acquire(self) -> WebDriver:
+        """
+        Выдать проверенный браузер для теста.
+
+        Упавший или зависший браузер прозрачно заменяется новым.
+
+        Returns:
+            WebDriver: Драйвер, готовый к работе.
+        """
+        while True:
+            item = self._take_ready()
+            if self._ping(item):
+                break
+            with self._lock:
+                self.crashed += 1
+            self._discard(item)
+
+        if item.baseline_heap is None:
+            item.baseline_heap = self._heap_size(item)
+        item.uses += 1
+        with self._lock:
+            self.handed_out += 1
+            self._in_use[id(item.driver)] = item
+        return item.driver
+
+    def release(self, driver: WebDriver) -> None:
+        """
+        Вернуть браузер в пул после теста или пересоздать его.
+
+        Args:
+            driver: Драйвер, выданный acquire().
+        """
+        with self._lock:
+            item = self._in_use.pop(id(driver), None)
+        if item is None:
+            return
+
+        if item.uses >= self.max_uses or self._heap_grew(item) or not self._ping(item):
+            with self._lock:
+                self.recycled += 1
+            self._discard(item)
+            self._spawn()
+            return
+
+        with self._lock:
+            self._idle.append(item)
+
+    def _heap_grew(self, item: PooledDriver) -> bool:
+        if item.baseline_heap is None:
+            return False
+        current = self._heap_size(item)
+        return current is not None and current - item.baseline_heap > self.max_heap_growth
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Счётчики пула и время запуска браузеров.
+        """
+        with self._lock:
+            startups = list(self.startup_times)
+            return {
+                "size": self.size,
+                "idle": len(self._idle),
+                "in_use": len(self._in_use),
+                "created": self.created,
+                "recycled": self.recycled,
+                "crashed": self.crashed,
+                "handed_out": self.handed_out,
+                "startup_s_max": round(max(startups), 3) if startups else None,
+                "startup_s_mean": round(sum(startups) / len(startups), 3) if startups else None,
+            }
+
+    def close(self) -> None:
+        """
+        Закрыть все браузеры пула.
+        """
+        with self._lock:
+            items = list(self._idle) + list(self._in_use.values())
+            pending = list(self._warming)
+            self._idle.clear()
+            self._in_use.clear()
+            self._warming.clear()
+        for future in pending:
+            try:
+                items.append(future.result())
+            except Exception:  # noqa: BLE001 — браузер так и не запустился
+                pass
+        for item in items:
+            try:
+                item.driver.quit()
+            except Exception:  # noqa: BLE001 — браузер уже мог упасть
+                pass
+        self._starter.shutdown(wait=False)
@@ -0,0 +1,107 @@
+import threading
+import time
+from typing import Any, Dict
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+# Времена установки соединения для запроса текущего потока: requests
+# отправляет запрос в вызывающем потоке, поэтому клиент может сбросить
+# их перед отправкой и прочитать после.
+_connection_timings = threading.local()
+
+
+def reset_connection_timings() -> None:
+    """
+    Обнулить замеры соединения перед отправкой запроса.
+    """
+    _connection_timings.connect = 0.0
+    _connection_timings.tls = 0.0
+
+
+def get_connection_timings() -> Dict[str, float]:
+    """
+    Замеры соединения последнего запроса в текущем потоке.
+
+    Returns:
+        dict: connect — DNS и TCP, tls — рукопожатие TLS, секунды.
+        Нули, если использовалось уже открытое соединение.
+    """
+    return {
+        "connect": getattr(_connection_timings, "connect", 0.0),
+        "tls": getattr(_connection_timings, "tls", 0.0),
+    }
+
+
+class TimedHTTPConnection(HTTPConnection):
+    def _new_conn(self) -> Any:
+        started = time.perf_counter()
+        sock = super()._new_conn()
+        _connection_timings.connect = time.perf_counter() - started
+        return sock
+
+
+class TimedHTTPSConnection(HTTPSConnection):
+    def _new_conn(self) -> Any:
+        started = time.perf_counter()
+        sock = super()._new_conn()
+        _connection_timings.connect = time.perf_counter() - started
+        return sock
+
+    def connect(self) -> None:
+        started = time.perf_counter()
+        super().connect()
+        total = time.perf_counter() - started
+        _connection_timings.tls = max(total - getattr(_connection_timings, "connect", 0.0), 0.0)
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class PooledAdapter(HTTPAdapter):
+    """
+    HTTP-адаптер с пулом keep-alive соединений и статистикой их использования.
+
+    Новые соединения замеряются (см. get_connection_timings).
+    """
+
+    def init_poolmanager(self, *args: Any, **kwargs: Any) -> None:
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": TimedHTTPConnectionPool,
+            "https": TimedHTTPSConnectionPool,
+        }
+
+    def pool_stats(self) -> Dict[str, Any]:
+        """
+        Собрать статистику по всем пулам соединений адаптера.
+
+        Returns:
+            dict: Число запросов, созданных и открытых соединений, доля
+            запросов, обслуженных переиспользованным соединением.
+        """
+        requests_total = 0
+        connections_total = 0
+        open_connections = 0
+        pools = self.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            requests_total += pool.num_requests
+            connections_total += pool.num_connections
+            idle = list(pool.pool.queue) if pool.pool is not None else []
+            open_connections += sum(1 for conn in idle if conn is not None)
+        reused = max(requests_total - connections_total, 0)
+        return {
+            "requests": requests_total,
+            "connections_created": connections_total,
+            "open_connections": open_connections,
+            "reuse_ratio": reused / requests_total if requests_total else 0.0,
+        }
@@ -0,0 +1,157 @@
+"""
+Сериализация HTTP-запросов и ответов в компактные словари.
+
+Используется слоем записи/воспроизведения (cassette), чтобы хранить ответы
+API на диске и восстанавливать из них объекты requests.Response.
+"""
+
+import base64
+import hashlib
+from typing import Any, Dict, Mapping, Optional
+from urllib.parse import quote_plus, unquote_plus, urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from data.config import get_settings
+
+# Заголовки, которые не имеют смысла для уже раскодированного тела ответа
+_DROPPED_RESPONSE_HEADERS = frozenset(
+    {"content-encoding", "transfer-encoding", "connection", "keep-alive", "set-cookie"}
+)
+
+
+def auth_class(headers: Mapping[str, str], api_key: Optional[str] = None) -> str:
+    """
+    Класс авторизации запроса — без сохранения самого токена.
+
+    Args:
+        headers: Заголовки запроса.
+        api_key: Токен, который считается корректным; по умолчанию —
+            KINOPOISK_API_KEY.
+
+    Returns:
+        str: "none" — токена нет, "valid" — токен из конфигурации,
+        "invalid" — любой другой токен.
+    """
+    token = CaseInsensitiveDict(headers).get("x-api-key")
+    if not token:
+        return "none"
+    if api_key is None:
+        api_key = get_settings().api_key
+    return "valid" if token == api_key else "invalid"
+
+
+def normalize_query(query: str) -> str:
+    """
+    Нормализовать строку query-параметров: раскодировать имена и значения,
+    отсортировать пары и закодировать заново.
+
+    Закодированные `&` и `=` внутри значения (`a=1%26b%3D2`) остаются
+    частью значения, а не превращаются в лишние параметры. Параметр без
+    значения (`?query`) и с пустым значением (`?query=`) остаются различимыми.
+
+    Args:
+        query: Строка после `?` в URL.
+
+    Returns:
+        str: Нормализованная строка параметров.
+    """
+    pairs = []
+    for part in query.split("&"):
+        if part:
+            name, separator, value = part.partition("=")
+            pairs.append((unquote_plus(name), separator, unquote_plus(value)))
+    return "&".join(quote_plus(name) + separator + quote_plus(value) for name, separator, value in sorted(pairs))
+
+
+def request_key(
+    method: str,
+    url: str,
+    headers: Mapping[str, str],
+    api_key: Optional[str] = None,
+) -> str:
+    """
+    Ключ запроса: метод, URL без параметров, нормализованные параметры
+    и класс авторизации.
+
+    Args:
+        method: HTTP-метод.
+        url: Полный URL запроса.
+        headers: Заголовки запроса.
+        api_key: Токен, который считается корректным; по умолчанию —
+            KINOPOISK_API_KEY.
+
+    Returns:
+        str: Строковый ключ записи.
+    """
+    parts = urlsplit(url)
+    base = f"{parts.scheme}://{parts.netloc}{parts.path}"
+    query = normalize_query(parts.query)
+    return f"{method.upper()} {base}?{query} auth={auth_class(headers, api_key)}"
+
+
+def key_digest(key: str) -> str:
+    """
+    Короткий хеш ключа, по которому выбирается шард хранилища.
+    """
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def response_to_record(response: requests.Response) -> Dict[str, Any]:
+    """
+    Сохранить ответ в словарь, пригодный для JSON.
+
+    Текстовое тело хранится как есть, бинарное — в base64.
+
+    Args:
+        response: Полученный ответ (тело будет прочитано).
+
+    Returns:
+        dict: Статус, причина, заголовки и тело ответа.
+    """
+    content: bytes = response.content
+    headers = {
+        name: value
+        for name, value in response.headers.items()
+        if name.lower() not in _DROPPED_RESPONSE_HEADERS
+    }
+    record: Dict[str, Any] = {
+        "status": response.status_code,
+        "reason": response.reason,
+        "headers": headers,
+    }
+    try:
+        record["body"] = content.decode("utf-8")
+    except UnicodeDecodeError:
+        record["body_b64"] = base64.b64encode(content).decode("ascii")
+    return record
+
+
+def response_from_record(
+    record: Mapping[str, Any],
+    request: requests.PreparedRequest,
+) -> requests.Response:
+    """
+    Восстановить requests.Response из сохранённого словаря.
+
+    Args:
+        record: Словарь, созданный response_to_record.
+        request: Запрос, в ответ на который возвращается запись.
+
+    Returns:
+        requests.Response: Ответ с прочитанным телом.
+    """
+    response = requests.Response()
+    response.status_code = int(record["status"])
+    response.reason = record.get("reason") or ""
+    response.headers = CaseInsensitiveDict(record.get("headers", {}))
+    if "body_b64" in record:
+        response._content = base64.b64decode(record["body_b64"])
+    else:
+        response._content = record.get("body", "").encode("utf-8")
+    response.encoding = get_encoding_from_headers(response.headers) or "utf-8"
+    response.url = request.url or ""
+    response.request = request
+    return response
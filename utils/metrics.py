@@ -0,0 +1,225 @@
+"""
+Метрики задержек запросов к API Кинопоиска.
+
+KinopoiskApiClient вызывает подключённые хуки после каждого запроса,
+передавая RequestSample, в том числе когда запрос завершился таймаутом
+или ошибкой соединения. LatencyRecorder раскладывает замеры по
+эндпоинтам в потоковые гистограммы: перцентили считаются без хранения
+отдельных замеров, а память не растёт с числом запросов.
+"""
+
+import json
+import math
+import threading
+from pathlib import Path
+from typing import Any, Dict, NamedTuple, Optional
+
+import allure
+
+
+class RequestSample(NamedTuple):
+    """
+    Замер одного запроса. Времена — в секундах.
+
+    connect (включая DNS) и tls равны 0, если запрос пошёл по уже
+    открытому соединению из пула. Если ответа нет (таймаут, ошибка
+    соединения), error — имя исключения, status и size равны 0, а total —
+    время до ошибки.
+    """
+
+    endpoint: str
+    status: int
+    total: float
+    ttfb: float
+    connect: float
+    tls: float
+    size: int
+    error: Optional[str] = None
+
+
+class StreamingHistogram:
+    """
+    Гистограмма с логарифмическими корзинами для потоковых перцентилей.
+
+    Границы соседних корзин отличаются в (1 + precision) раз, поэтому
+    относительная ошибка перцентиля не превышает precision, а число
+    корзин зависит только от диапазона значений.
+
+    Args:
+        precision: Относительная точность перцентилей.
+    """
+
+    def __init__(self, precision: float = 0.02) -> None:
+        self._log_base: float = math.log1p(precision)
+        self._buckets: Dict[int, int] = {}
+        self._zeros: int = 0
+        self.count: int = 0
+        self.total: float = 0.0
+        self.min: float = math.inf
+        self.max: float = 0.0
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if value <= 0:
+            self._zeros += 1
+            return
+        index = math.floor(math.log(value) / self._log_base)
+        self._buckets[index] = self._buckets.get(index, 0) + 1
+
+    def percentile(self, q: float) -> float:
+        """
+        Значение перцентиля q (0..100).
+        """
+        if not self.count:
+            return 0.0
+        rank = max(math.ceil(self.count * q / 100), 1)
+        if rank <= self._zeros:
+            return 0.0
+        seen = self._zeros
+        for index in sorted(self._buckets):
+            seen += self._buckets[index]
+            if seen >= rank:
+                # Середина корзины в логарифмической шкале, в пределах min/max
+                value = math.exp((index + 0.5) * self._log_base)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def summary(self, scale: float = 1.0, digits: int = 2) -> Dict[str, Any]:
+        """
+        Сводка: количество, среднее, min/max и p50/p90/p99.
+
+        Args:
+            scale: Множитель значений (например, 1000 для перевода с в мс).
+            digits: Число знаков после запятой.
+        """
+        def fmt(value: float) -> float:
+            return round(value * scale, digits)
+
+        if not self.count:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "mean": fmt(self.total / self.count),
+            "min": fmt(self.min),
+            "p50": fmt(self.percentile(50)),
+            "p90": fmt(self.percentile(90)),
+            "p99": fmt(self.percentile(99)),
+            "max": fmt(self.max),
+        }
+
+
+class _EndpointStats:
+    __slots__ = ("total", "ttfb", "connect", "tls", "size", "statuses", "new_connections", "errors", "error_time")
+
+    def __init__(self) -> None:
+        self.total = StreamingHistogram()
+        self.ttfb = StreamingHistogram()
+        self.connect = StreamingHistogram()
+        self.tls = StreamingHistogram()
+        self.size = StreamingHistogram()
+        self.statuses: Dict[str, int] = {}
+        self.new_connections: int = 0
+        self.errors: Dict[str, int] = {}
+        self.error_time = StreamingHistogram()
+
+
+class LatencyRecorder:
+    """
+    Хук KinopoiskApiClient, собирающий задержки по эндпоинтам.
+
+    Запросы без ответа считаются отдельно по именам исключений и не входят
+    в перцентили задержек ответов (по ним считается задержка дублей).
+
+    Подключение:
+        client.add_hook(LatencyRecorder())
+    """
+
+    def __init__(self) -> None:
+        self._endpoints: Dict[str, _EndpointStats] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, sample: RequestSample) -> None:
+        with self._lock:
+            stats = self._endpoints.get(sample.endpoint)
+            if stats is None:
+                stats = self._endpoints[sample.endpoint] = _EndpointStats()
+            if sample.error is not None:
+                stats.errors[sample.error] = stats.errors.get(sample.error, 0) + 1
+                stats.error_time.add(sample.total)
+                return
+            stats.total.add(sample.total)
+            stats.ttfb.add(sample.ttfb)
+            stats.size.add(sample.size)
+            status = str(sample.status)
+            stats.statuses[status] = stats.statuses.get(status, 0) + 1
+            if sample.connect or sample.tls:
+                stats.new_connections += 1
+                stats.connect.add(sample.connect)
+                stats.tls.add(sample.tls)
+
+    def samples(self, endpoint: str) -> int:
+        """
+        Сколько ответов эндпоинта уже замерено (без запросов с ошибкой).
+        """
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            return 0 if stats is None else stats.total.count
+
+    def percentile(self, endpoint: str, q: float) -> Optional[float]:
+        """
+        Перцентиль полного времени запроса к эндпоинту, секунды.
+
+        Returns:
+            float | None: Значение или None, если замеров ещё нет.
+        """
+        with self._lock:
+            stats = self._endpoints.get(endpoint)
+            if stats is None or not stats.total.count:
+                return None
+            return stats.total.percentile(q)
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Сводка по всем эндпоинтам: времена в мс, размер ответа в байтах;
+        запросы без ответа — в errors (по исключениям) и error_ms.
+        """
+        with self._lock:
+            return {
+                endpoint: {
+                    "requests": stats.total.count + stats.error_time.count,
+                    "statuses": dict(stats.statuses),
+                    "errors": dict(stats.errors),
+                    "error_ms": stats.error_time.summary(scale=1000),
+                    "new_connections": stats.new_connections,
+                    "total_ms": stats.total.summary(scale=1000),
+                    "ttfb_ms": stats.ttfb.summary(scale=1000),
+                    "connect_ms": stats.connect.summary(scale=1000),
+                    "tls_ms": stats.tls.summary(scale=1000),
+                    "size_bytes": stats.size.summary(digits=0),
+                }
+                for endpoint, stats in sorted(self._endpoints.items())
+            }
+
+    def report(self, path: Path) -> Dict[str, Any]:
+        """
+        Записать сводку в JSON-файл и приложить её к allure-отчёту.
+
+        Args:
+            path: Путь к JSON-файлу.
+
+        Returns:
+            dict: Записанная сводка.
+        """
+        summary = self.summary()
+        text = json.dumps(summary, ensure_ascii=False, indent=2)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding="utf-8")
+        allure.attach(
+            text,
+            name="Задержки запросов к API",
+            attachment_type=allure.attachment_type.JSON,
+        )
+        return summary
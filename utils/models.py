@@ -0,0 +1,252 @@
+"""
+Типизированные компактные модели ответов API Кинопоиска.
+
+Модели используют __slots__ и переносят из документа только запрошенные
+поля, поэтому разобранная страница из сотен фильмов остаётся в памяти
+заметно меньше, чем дерево словарей из response.json(). Само тело ответа
+при этом разбирается json.loads целиком: время разбора и пиковая память
+зависят от того, что прислал сервер. Чтобы уменьшить и их, те же поля
+передаются в API как selectFields — тогда сервер не присылает остальное.
+"""
+
+import json
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Tuple
+
+# Поля документа фильма в терминах API (значения selectFields)
+MOVIE_FIELDS: Tuple[str, ...] = (
+    "id",
+    "name",
+    "alternativeName",
+    "enName",
+    "type",
+    "year",
+    "description",
+    "shortDescription",
+    "movieLength",
+    "rating",
+    "votes",
+    "genres",
+    "countries",
+    "poster",
+)
+
+# Поля, которых достаточно для большинства проверок выдачи
+DEFAULT_FIELDS: Tuple[str, ...] = ("id", "name", "alternativeName", "year", "rating", "genres")
+
+
+def _names(items: Any) -> Tuple[str, ...]:
+    """
+    Список объектов {"name": ...} в кортеж интернированных строк:
+    одинаковые жанры и страны разных фильмов делят одну строку.
+    """
+    if not isinstance(items, list):
+        return ()
+    return tuple(sys.intern(item["name"]) for item in items if isinstance(item, dict) and item.get("name"))
+
+
+class Movie:
+    """
+    Фильм из выдачи API. Незапрошенные поля остаются None.
+    """
+
+    __slots__ = (
+        "id",
+        "name",
+        "alternative_name",
+        "en_name",
+        "type",
+        "year",
+        "description",
+        "short_description",
+        "movie_length",
+        "rating_kp",
+        "rating_imdb",
+        "votes_kp",
+        "genres",
+        "countries",
+        "poster_url",
+    )
+
+    def __init__(self) -> None:
+        for attr in self.__slots__:
+            setattr(self, attr, None)
+
+    def __repr__(self) -> str:
+        return f"Movie(id={self.id!r}, name={self.name!r}, year={self.year!r})"
+
+    @property
+    def title(self) -> str:
+        """
+        Название для проверок: русское, а если его нет — оригинальное.
+        """
+        return self.name or self.alternative_name or self.en_name or ""
+
+    @classmethod
+    def from_doc(cls, doc: Mapping[str, Any], fields: Iterable[str] = DEFAULT_FIELDS) -> "Movie":
+        """
+        Перенести в модель указанные поля уже разобранного документа.
+
+        Args:
+            doc: Документ из `docs`.
+            fields: Поля API, см. MOVIE_FIELDS.
+
+        Returns:
+            Movie: Модель фильма.
+        """
+        movie = cls()
+        for field in fields:
+            value = doc.get(field)
+            if value is not None:
+                _PARSERS[field](movie, value)
+        return movie
+
+
+def _set_rating(movie: Movie, value: Any) -> None:
+    if isinstance(value, dict):
+        movie.rating_kp = value.get("kp")
+        movie.rating_imdb = value.get("imdb")
+
+
+def _set_votes(movie: Movie, value: Any) -> None:
+    if isinstance(value, dict):
+        movie.votes_kp = value.get("kp")
+
+
+def _set_poster(movie: Movie, value: Any) -> None:
+    if isinstance(value, dict):
+        movie.poster_url = value.get("url")
+
+
+def _setter(attr: str) -> Callable[[Movie, Any], None]:
+    def parse(movie: Movie, value: Any) -> None:
+        setattr(movie, attr, value)
+
+    return parse
+
+
+def _names_setter(attr: str) -> Callable[[Movie, Any], None]:
+    def parse(movie: Movie, value: Any) -> None:
+        setattr(movie, attr, _names(value))
+
+    return parse
+
+
+_PARSERS: Dict[str, Callable[[Movie, Any], None]] = {
+    "id": _setter("id"),
+    "name": _setter("name"),
+    "alternativeName": _setter("alternative_name"),
+    "enName": _setter("en_name"),
+    "type": _setter("type"),
+    "year": _setter("year"),
+    "description": _setter("description"),
+    "shortDescription": _setter("short_description"),
+    "movieLength": _setter("movie_length"),
+    "rating": _set_rating,
+    "votes": _set_votes,
+    "genres": _names_setter("genres"),
+    "countries": _names_setter("countries"),
+    "poster": _set_poster,
+}
+
+
+class MoviePage:
+    """
+    Страница выдачи /movie или /movie/search: фильмы и данные пагинации.
+    """
+
+    __slots__ = ("docs", "total", "limit", "page", "pages")
+
+    def __init__(self, docs: List[Movie], total: int, limit: int, page: int, pages: int) -> None:
+        self.docs: List[Movie] = docs
+        self.total: int = total
+        self.limit: int = limit
+        self.page: int = page
+        self.pages: int = pages
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def __repr__(self) -> str:
+        return f"MoviePage(page={self.page}/{self.pages}, docs={len(self.docs)}, total={self.total})"
+
+    @classmethod
+    def from_payload(
+        cls,
+        payload: Mapping[str, Any],
+        fields: Iterable[str] = DEFAULT_FIELDS,
+    ) -> "MoviePage":
+        """
+        Разобрать тело ответа API.
+
+        Args:
+            payload: Результат response.json().
+            fields: Поля документа, которые нужно разобрать.
+
+        Returns:
+            MoviePage: Страница выдачи.
+        """
+        fields = tuple(fields)
+        unknown = set(fields) - set(_PARSERS)
+        if unknown:
+            raise ValueError(f"Неизвестные поля фильма: {sorted(unknown)}")
+        docs = [Movie.from_doc(doc, fields) for doc in payload.get("docs") or []]
+        return cls(
+            docs=docs,
+            total=int(payload.get("total") or len(docs)),
+            limit=int(payload.get("limit") or len(docs)),
+            page=int(payload.get("page") or 1),
+            pages=int(payload.get("pages") or 1),
+        )
+
+
+def measure_parse_cost(raw: bytes, fields: Iterable[str] = DEFAULT_FIELDS) -> Dict[str, Any]:
+    """
+    Сравнить стоимость разбора страницы в словари и в модели.
+
+    Память считается через tracemalloc как объём, который остаётся занятым
+    после разбора (для моделей исходные словари к этому моменту освобождены),
+    и пересчитывается на 1000 документов. Если трассировка уже запущена
+    вызывающим кодом, она не останавливается.
+
+    Args:
+        raw: Тело ответа API.
+        fields: Поля, разбираемые в модели.
+
+    Returns:
+        dict: Время разбора (мс) и память на 1000 документов (КБ) для
+        обоих вариантов.
+    """
+    fields = tuple(fields)
+
+    def run(parse: Callable[[], Any]) -> Tuple[float, int, Any]:
+        # Трассировку, запущенную вызывающим кодом, не останавливаем:
+        # считаем прирост относительно уже занятой памяти
+        own_tracing = not tracemalloc.is_tracing()
+        if own_tracing:
+            tracemalloc.start()
+        before, _peak = tracemalloc.get_traced_memory()
+        started = time.perf_counter()
+        result = parse()
+        elapsed = time.perf_counter() - started
+        after, _peak = tracemalloc.get_traced_memory()
+        if own_tracing:
+            tracemalloc.stop()
+        return elapsed, after - before, result
+
+    dict_time, dict_mem, docs = run(lambda: json.loads(raw).get("docs") or [])
+    count = len(docs)
+    del docs
+    model_time, model_mem, _page = run(lambda: MoviePage.from_payload(json.loads(raw), fields))
+
+    per_thousand = 1000 / count if count else 0.0
+    return {
+        "docs": count,
+        "fields": list(fields),
+        "dict_parse_ms": round(dict_time * 1000, 3),
+        "model_parse_ms": round(model_time * 1000, 3),
+        "dict_kb_per_1000_docs": round(dict_mem * per_thousand / 1024, 1),
+        "model_kb_per_1000_docs": round(model_mem * per_thousand / 1024, 1),
+    }
@@ -0,0 +1,455 @@
+"""
+Локальный индекс фильмов для быстрой проверки поисковой выдачи.
+
+Харвестер обходит страницы /movie через KinopoiskApiClient и складывает
+фильмы в файл sqlite: сами фильмы по id и два списка вхождений —
+токены названий (name, alternativeName, enName) и жанры. Токены
+нормализованы: регистр сложен (casefold), «ё» заменена на «е», так что
+«НЭЧЖА», «Нэчжа» и «нэчжа» дают один токен. Повторный обход обновляет
+только фильмы, у которых изменились названия, год или жанры.
+
+Файл открывается через mmap (PRAGMA mmap_size): страницы индекса
+читаются из кеша ОС без копирования. Проверка одного фильма из выдачи
+(is_plausible) — точечная выборка по id, десятки микросекунд; поиск
+по слову — десятки микросекунд для редких слов, повторный запрос —
+несколько микросекунд из кеша в памяти процесса.
+
+Выдача считается правдоподобной, если в названии найденного фильма есть
+все слова запроса (последнее — как начало слова). Для фильмов из индекса
+проверяются их названия в индексе, для остальных — название из выдачи.
+
+Запуск:
+    python -m utils.movie_index harvest --max-items 50000
+    python -m utils.movie_index harvest --param updatedAt=01.01.2025-31.12.2025
+    python -m utils.movie_index query Нэчжа
+"""
+
+import argparse
+import json
+import re
+import sqlite3
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Sequence, Set, Tuple
+
+from data.config import get_settings
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS movies (
+    id INTEGER PRIMARY KEY, name TEXT, alt_name TEXT, en_name TEXT, year INTEGER, genres TEXT, sig INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS title_tokens (
+    token TEXT NOT NULL, movie_id INTEGER NOT NULL, PRIMARY KEY (token, movie_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS genre_postings (
+    genre TEXT NOT NULL, movie_id INTEGER NOT NULL, PRIMARY KEY (genre, movie_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
+# Поля документа, которые нужны индексу (selectFields при обходе)
+HARVEST_FIELDS: Tuple[str, ...] = ("id", "name", "alternativeName", "enName", "year", "genres")
+
+# Сколько ответов на запросы держать в памяти процесса
+QUERY_CACHE_SIZE = 4096
+# До скольких вхождений считать список слова, выбирая самое редкое слово запроса
+SELECTIVITY_PROBE = 256
+
+_FOLD = str.maketrans({"ё": "е"})
+_WORD = re.compile(r"\w+")
+# Последний символ Юникода: верхняя граница диапазона токенов с префиксом
+_MAX_CHAR = "\U0010ffff"
+
+
+def fold(text: Optional[str]) -> str:
+    """
+    Нормализовать строку для сравнения: casefold и «ё» -> «е».
+    """
+    return (text or "").casefold().translate(_FOLD)
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """
+    Нормализованные слова строки в порядке появления.
+    """
+    return _WORD.findall(fold(text))
+
+
+def title_matches(query: str, *titles: Optional[str]) -> bool:
+    """
+    Есть ли в названиях все слова запроса (последнее — как начало слова).
+
+    Проверка без индекса: для фильмов, которых в индексе нет.
+    """
+    words = tokenize(query)
+    if not words:
+        return True
+    tokens = {token for title in titles for token in tokenize(title)}
+    *exact, last = words
+    return all(word in tokens for word in exact) and any(token.startswith(last) for token in tokens)
+
+
+def _movie_row(doc: Dict[str, Any]) -> Tuple[int, str, str, str, Optional[int], str, int]:
+    genres = sorted({fold(genre.get("name")) for genre in doc.get("genres") or [] if genre.get("name")})
+    row = (doc.get("name") or "", doc.get("alternativeName") or "", doc.get("enName") or "", doc.get("year"))
+    signature = zlib.crc32(json.dumps([row, genres], ensure_ascii=False).encode("utf-8"))
+    return (int(doc["id"]), *row, ",".join(genres), signature)
+
+
+def _postings(name: str, alt_name: str, en_name: str, genres: str) -> Tuple[Set[str], Set[str]]:
+    tokens = {token for title in (name, alt_name, en_name) for token in tokenize(title)}
+    return tokens, set(filter(None, genres.split(",")))
+
+
+class MovieIndex:
+    """
+    Индекс фильмов в файле sqlite: фильмы по id, токены названий и жанры.
+
+    Args:
+        path: Файл индекса; ":memory:" — пустой индекс в памяти; по
+            умолчанию — KINOPOISK_MOVIE_INDEX.
+        readonly: Открыть только на чтение (тесты, воркеры xdist).
+        mmap_size: Сколько байт файла отображать в память; по умолчанию —
+            KINOPOISK_MOVIE_INDEX_MMAP_SIZE.
+    """
+
+    def __init__(
+        self,
+        path: Any = None,
+        readonly: bool = False,
+        mmap_size: Optional[int] = None,
+    ) -> None:
+        settings = get_settings()
+        if path is None:
+            path = settings.movie_index_path
+        if mmap_size is None:
+            mmap_size = settings.movie_index_mmap_size
+        self.path = path
+        if readonly:
+            self._db = sqlite3.connect(f"file:{Path(path).as_posix()}?mode=ro", uri=True)
+        else:
+            if str(path) != ":memory:":
+                Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(path)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(_SCHEMA)
+        self._db.execute(f"PRAGMA mmap_size={int(mmap_size)}")
+        self._cache: Dict[Tuple[str, str], Any] = {}
+
+    def __enter__(self) -> "MovieIndex":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __len__(self) -> int:
+        return self._db.execute("SELECT COUNT(*) FROM movies").fetchone()[0]
+
+    def upsert(self, docs: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Добавить или обновить фильмы по id одной транзакцией.
+
+        Вхождения фильма переписываются, только если изменились его
+        названия, год или жанры.
+
+        Args:
+            docs: Документы фильмов из API (нужны id, названия, год, жанры).
+
+        Returns:
+            dict: Сколько фильмов добавлено, обновлено и не изменилось.
+        """
+        stats = {"inserted": 0, "updated": 0, "unchanged": 0}
+        with self._db:
+            for doc in docs:
+                if doc.get("id") is None:
+                    continue
+                row = _movie_row(doc)
+                movie_id = row[0]
+                old = self._db.execute(
+                    "SELECT name, alt_name, en_name, genres, sig FROM movies WHERE id = ?", (movie_id,)
+                ).fetchone()
+                if old is not None and old[4] == row[6]:
+                    stats["unchanged"] += 1
+                    continue
+                old_tokens, old_genres = _postings(*old[:4]) if old is not None else (set(), set())
+                tokens, genres = _postings(row[1], row[2], row[3], row[5])
+                self._db.executemany(
+                    "DELETE FROM title_tokens WHERE token = ? AND movie_id = ?",
+                    [(token, movie_id) for token in old_tokens - tokens],
+                )
+                self._db.executemany(
+                    "INSERT OR IGNORE INTO title_tokens (token, movie_id) VALUES (?, ?)",
+                    [(token, movie_id) for token in tokens - old_tokens],
+                )
+                self._db.executemany(
+                    "DELETE FROM genre_postings WHERE genre = ? AND movie_id = ?",
+                    [(genre, movie_id) for genre in old_genres - genres],
+                )
+                self._db.executemany(
+                    "INSERT OR IGNORE INTO genre_postings (genre, movie_id) VALUES (?, ?)",
+                    [(genre, movie_id) for genre in genres - old_genres],
+                )
+                self._db.execute("INSERT OR REPLACE INTO movies VALUES (?, ?, ?, ?, ?, ?, ?)", row)
+                stats["updated" if old is not None else "inserted"] += 1
+        if stats["inserted"] or stats["updated"]:
+            self._cache.clear()
+        return stats
+
+    def set_meta(self, key: str, value: Any) -> None:
+        with self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, json.dumps(value, ensure_ascii=False))
+            )
+
+    def meta(self) -> Dict[str, Any]:
+        return {key: json.loads(value) for key, value in self._db.execute("SELECT key, value FROM meta")}
+
+    def _cached(self, kind: str, key: str, load: Any) -> Any:
+        cache_key = (kind, key)
+        value = self._cache.get(cache_key)
+        if value is None:
+            if len(self._cache) >= QUERY_CACHE_SIZE:
+                self._cache.clear()
+            value = self._cache[cache_key] = load()
+        return value
+
+    @staticmethod
+    def _token_filter(token: str, prefix: bool) -> Tuple[str, Tuple[str, ...]]:
+        if prefix:
+            return "token >= ? AND token < ?", (token, token + _MAX_CHAR)
+        return "token = ?", (token,)
+
+    def _token_ids(self, token: str, prefix: bool) -> FrozenSet[int]:
+        where, args = self._token_filter(token, prefix)
+        return frozenset(row[0] for row in self._db.execute(f"SELECT movie_id FROM title_tokens WHERE {where}", args))
+
+    def _token_count(self, token: str, prefix: bool) -> int:
+        # Считается не дальше SELECTIVITY_PROBE вхождений: важно только, какое слово реже
+        where, args = self._token_filter(token, prefix)
+        return self._db.execute(
+            f"SELECT COUNT(*) FROM (SELECT 1 FROM title_tokens WHERE {where} LIMIT ?)", (*args, SELECTIVITY_PROBE)
+        ).fetchone()[0]
+
+    def search(self, query: str) -> FrozenSet[int]:
+        """
+        Id фильмов, в названиях которых есть все слова запроса
+        (последнее — как начало слова).
+
+        Читается список вхождений самого редкого слова, остальные слова
+        проверяются по названиям найденных фильмов.
+        """
+        words = tokenize(query)
+        if not words:
+            return frozenset()
+
+        def load() -> FrozenSet[int]:
+            *exact, last = words
+            terms = [(word, False) for word in exact] + [(last, True)]
+            if len(terms) > 1:
+                terms.sort(key=lambda term: self._token_count(*term))
+            candidates = self._token_ids(*terms[0])
+            if len(terms) == 1:
+                return candidates
+            return frozenset(movie_id for movie_id in candidates if title_matches(query, *self._titles(movie_id)))
+
+        return self._cached("search", " ".join(words), load)
+
+    def by_genre(self, genre: str) -> FrozenSet[int]:
+        """
+        Id фильмов жанра.
+        """
+        key = fold(genre).strip()
+        return self._cached(
+            "genre",
+            key,
+            lambda: frozenset(
+                row[0] for row in self._db.execute("SELECT movie_id FROM genre_postings WHERE genre = ?", (key,))
+            ),
+        )
+
+    def in_genre(self, movie_id: int, genre: str) -> bool:
+        """
+        Относится ли фильм к жанру (одна точечная выборка по ключу).
+        """
+        row = self._db.execute(
+            "SELECT 1 FROM genre_postings WHERE genre = ? AND movie_id = ?", (fold(genre).strip(), movie_id)
+        ).fetchone()
+        return row is not None
+
+    def _titles(self, movie_id: int) -> Tuple[str, ...]:
+        row = self._db.execute("SELECT name, alt_name, en_name FROM movies WHERE id = ?", (movie_id,)).fetchone()
+        return tuple(row) if row is not None else ()
+
+    def genres(self) -> Dict[str, int]:
+        """
+        Жанры индекса и число фильмов в каждом.
+        """
+        rows = self._db.execute("SELECT genre, COUNT(*) FROM genre_postings GROUP BY genre ORDER BY genre")
+        return dict(rows.fetchall())
+
+    def get(self, movie_id: int) -> Optional[Dict[str, Any]]:
+        """
+        Фильм из индекса по id или None.
+        """
+        row = self._db.execute(
+            "SELECT id, name, alt_name, en_name, year, genres FROM movies WHERE id = ?", (movie_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {
+            "id": row[0],
+            "name": row[1],
+            "alternativeName": row[2],
+            "enName": row[3],
+            "year": row[4],
+            "genres": [genre for genre in row[5].split(",") if genre],
+        }
+
+    def is_plausible(
+        self,
+        query: str,
+        movie_id: Optional[int] = None,
+        title: Optional[str] = None,
+        genre: Optional[str] = None,
+    ) -> bool:
+        """
+        Правдоподобен ли фильм в выдаче по запросу.
+
+        Название из выдачи, если оно передано, должно содержать слова
+        запроса всегда. Индекс — дополнительный фильтр: фильм из индекса
+        ещё проверяется по его названиям в индексе (и жанру, если он задан)
+        точечными выборками по id.
+
+        Args:
+            query: Поисковый запрос.
+            movie_id: Id фильма из выдачи.
+            title: Название фильма из выдачи.
+            genre: Жанр, к которому фильм должен относиться.
+
+        Returns:
+            bool: True, если в названии есть все слова запроса.
+        """
+        if title is not None and not title_matches(query, title):
+            return False
+        titles = self._titles(movie_id) if movie_id is not None else ()
+        if titles:
+            return title_matches(query, *titles) and (genre is None or self.in_genre(movie_id, genre))
+        return title_matches(query, title)
+
+
+def harvest(
+    client: Any,
+    index: MovieIndex,
+    params: Optional[Dict[str, Any]] = None,
+    max_items: Optional[int] = None,
+    batch: int = 250,
+) -> Dict[str, Any]:
+    """
+    Обойти страницы /movie и занести фильмы в индекс.
+
+    Каждые batch фильмов записываются одной транзакцией, поэтому
+    прерванный обход оставляет индекс целым, а повторный обновляет
+    только изменившиеся фильмы.
+
+    Args:
+        client: KinopoiskApiClient.
+        index: Индекс, открытый на запись.
+        params: Фильтр выдачи /movie, например {"updatedAt": "01.01.2025-31.12.2025"}.
+        max_items: Обойти не больше стольких фильмов.
+        batch: Размер транзакции записи.
+
+    Returns:
+        dict: Сколько фильмов обойдено, добавлено, обновлено, не изменилось, и время.
+    """
+    started = time.perf_counter()
+    stats: Dict[str, Any] = {"docs": 0, "inserted": 0, "updated": 0, "unchanged": 0}
+    select = {**(params or {}), "selectFields": list(HARVEST_FIELDS)}
+    pending: List[Dict[str, Any]] = []
+
+    def flush() -> None:
+        for key, value in index.upsert(pending).items():
+            stats[key] += value
+        pending.clear()
+
+    for doc in client.iter_movies(select, path="/movie", max_items=max_items):
+        pending.append(doc)
+        stats["docs"] += 1
+        if len(pending) >= batch:
+            flush()
+    flush()
+    stats["seconds"] = round(time.perf_counter() - started, 3)
+    # Id фильмов имеют смысл только для того API, с которого собран индекс
+    index.set_meta("source", client.base_url)
+    index.set_meta("last_harvest", {"ts": round(time.time(), 3), "params": params or {}, **stats})
+    return stats
+
+
+def open_for_tests(path: Optional[Path] = None, source: Optional[str] = None) -> MovieIndex:
+    """
+    Индекс для проверки выдачи в тестах.
+
+    Args:
+        path: Файл индекса; по умолчанию KINOPOISK_MOVIE_INDEX.
+        source: Адрес API, с которым работают тесты; по умолчанию KINOPOISK_API_URL.
+
+    Returns:
+        MovieIndex: Файл индекса только на чтение, если он собран с того же
+        API; иначе пустой индекс в памяти — выдача проверяется по названиям
+        из неё самой.
+    """
+    settings = get_settings()
+    path = settings.movie_index_path if path is None else path
+    if path.exists():
+        index = MovieIndex(path, readonly=True)
+        if index.meta().get("source") == (source or settings.base_api_url):
+            return index
+        index.close()
+    return MovieIndex(":memory:")
+
+
+def _parse_params(items: Sequence[str]) -> Dict[str, str]:
+    params: Dict[str, str] = {}
+    for item in items:
+        key, _, value = item.partition("=")
+        params[key] = value
+    return params
+
+
+def main() -> None:
+    from utils.api_client import KinopoiskApiClient
+
+    parser = argparse.ArgumentParser(description="Локальный индекс фильмов Кинопоиска")
+    parser.add_argument("--index", type=Path, default=None, help="файл индекса; по умолчанию KINOPOISK_MOVIE_INDEX")
+    commands = parser.add_subparsers(dest="command", required=True)
+    harvest_parser = commands.add_parser("harvest", help="обойти /movie и обновить индекс")
+    harvest_parser.add_argument("--param", action="append", default=[], help="фильтр выдачи key=value")
+    harvest_parser.add_argument("--max-items", type=int, default=None, help="обойти не больше стольких фильмов")
+    query_parser = commands.add_parser("query", help="найти фильмы в индексе")
+    query_parser.add_argument("query")
+    args = parser.parse_args()
+
+    if args.command == "harvest":
+        client = KinopoiskApiClient()
+        try:
+            with MovieIndex(args.index) as index:
+                stats = harvest(client, index, _parse_params(args.param), max_items=args.max_items)
+        finally:
+            client.close()
+        print(json.dumps(stats, ensure_ascii=False))
+        return
+
+    with MovieIndex(args.index, readonly=True) as index:
+        started = time.perf_counter()
+        ids = index.search(args.query)
+        elapsed_us = (time.perf_counter() - started) * 1e6
+        for movie_id in sorted(ids)[:20]:
+            print(json.dumps(index.get(movie_id), ensure_ascii=False))
+        print(f"найдено {len(ids)} за {elapsed_us:.0f} мкс")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+Блокировка лишних сетевых запросов браузера и учёт трафика навигаций.
+
+UI-тесты проверяют только разметку страниц, поэтому картинки, видео,
+шрифты, реклама и аналитика Кинопоиска загружаются впустую. NetworkFilter
+через DevTools (Network.setBlockedURLs) запрещает браузеру такие запросы,
+а collect_traffic по журналу performance считает, сколько запросов
+навигация сделала, сколько из них заблокировано и сколько байт
+фактически скачано — всего и по типам ресурсов.
+
+Ограничение: Network.setBlockedURLs сопоставляет только адреса, поэтому
+«тип ресурса» — это набор шаблонов: расширения файлов и хосты, которые
+отдают только такие ресурсы (постеры Кинопоиска на avatars.mds.yandex.net
+идут без расширения). Ресурс нужного типа с другого хоста и без
+расширения не блокируется; такие утечки видны в transferred_by_type.
+Настоящая блокировка по типу (Fetch.enable с resourceType) требует
+обработки событий DevTools, которой нет у execute_cdp_cmd и удалённого
+драйвера.
+"""
+
+import json
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import requests
+
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.remote.command import Command
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from data.config import get_settings
+
+# Network.setBlockedURLs понимает только шаблоны адресов, поэтому типы
+# ресурсов переводятся в шаблоны по расширениям файлов и хостам, которые
+# отдают только ресурсы этого типа
+RESOURCE_TYPE_PATTERNS: Dict[str, Tuple[str, ...]] = {
+    "image": (
+        "*.jpg*",
+        "*.jpeg*",
+        "*.png*",
+        "*.gif*",
+        "*.webp*",
+        "*.avif*",
+        "*.svg*",
+        "*.ico*",
+        # Постеры и кадры Кинопоиска: адреса вида /get-kinopoisk-image/<id>/<size> без расширения
+        "*://avatars.mds.yandex.net/*",
+    ),
+    "media": ("*.mp4*", "*.webm*", "*.m3u8*", "*.mp3*", "*.ogg*"),
+    "font": ("*.woff*", "*.woff2*", "*.ttf*", "*.otf*", "*.eot*"),
+    "stylesheet": ("*.css*",),
+}
+
+
+class NavigationTraffic(NamedTuple):
+    """
+    Сетевая активность страницы с момента предыдущего замера.
+    """
+
+    url: str
+    requests: int
+    blocked: int
+    transferred_bytes: int
+    blocked_by_type: Dict[str, int]
+    # Скачано по типам ресурсов: что осталось незаблокированным
+    transferred_by_type: Dict[str, int]
+    # Сколько весят заблокированные ресурсы (оценка по Content-Length);
+    # None — оценка не запрашивалась
+    saved_bytes: Optional[int] = None
+
+    def to_dict(self) -> Dict[str, object]:
+        return self._asdict()
+
+
+class NetworkFilter:
+    """
+    Набор правил блокировки запросов для экземпляра Chrome.
+
+    Args:
+        resource_types: Блокируемые типы ресурсов (ключи RESOURCE_TYPE_PATTERNS);
+            по умолчанию — KINOPOISK_UI_BLOCKED_TYPES.
+        url_patterns: Дополнительные шаблоны адресов (`*` — любая подстрока);
+            по умолчанию — KINOPOISK_UI_BLOCKED_URLS.
+    """
+
+    def __init__(
+        self,
+        resource_types: Optional[Iterable[str]] = None,
+        url_patterns: Optional[Iterable[str]] = None,
+    ) -> None:
+        settings = get_settings()
+        resource_types = settings.ui_blocked_resource_types if resource_types is None else resource_types
+        url_patterns = settings.ui_blocked_url_patterns if url_patterns is None else url_patterns
+        self.resource_types: Tuple[str, ...] = tuple(t.strip().lower() for t in resource_types if t.strip())
+        unknown = [t for t in self.resource_types if t not in RESOURCE_TYPE_PATTERNS]
+        if unknown:
+            raise ValueError(f"Неизвестные типы ресурсов: {', '.join(unknown)}")
+        self.url_patterns: Tuple[str, ...] = tuple(p.strip() for p in url_patterns if p.strip())
+
+    @property
+    def patterns(self) -> List[str]:
+        """
+        Все шаблоны адресов, передаваемые в Network.setBlockedURLs.
+        """
+        result: List[str] = []
+        for resource_type in self.resource_types:
+            result.extend(RESOURCE_TYPE_PATTERNS[resource_type])
+        result.extend(self.url_patterns)
+        return result
+
+    def install(self, driver: WebDriver) -> None:
+        """
+        Включить блокировку в браузере. Правила действуют на все
+        последующие навигации вкладки.
+
+        Args:
+            driver: Chrome WebDriver (нужна поддержка execute_cdp_cmd).
+        """
+        patterns = self.patterns
+        if not patterns:
+            return
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+
+
+def estimate_blocked_bytes(urls: Iterable[str], timeout: float = 2.0) -> int:
+    """
+    Оценить, сколько байт сэкономила блокировка: заблокированные ресурсы
+    запрашиваются через HEAD, и суммируется их Content-Length.
+
+    Ресурсы без Content-Length или с ошибкой запроса не учитываются,
+    поэтому оценка — нижняя граница.
+
+    Args:
+        urls: Адреса заблокированных запросов.
+        timeout: Таймаут одного запроса, секунды.
+
+    Returns:
+        int: Суммарный размер ресурсов, байт.
+    """
+    total = 0
+    with requests.Session() as session:
+        for url in dict.fromkeys(urls):
+            try:
+                response = session.head(url, timeout=timeout, allow_redirects=True)
+            except requests.RequestException:
+                continue
+            if response.ok:
+                total += int(response.headers.get("Content-Length") or 0)
+    return total
+
+
+def collect_traffic(driver: WebDriver, url: str, estimate_saved: bool = False) -> NavigationTraffic:
+    """
+    Разобрать накопленный журнал performance и посчитать трафик.
+
+    Журнал вычитывается целиком, поэтому каждый вызов считает трафик
+    только с момента предыдущего. Если журнал не включён
+    (goog:loggingPrefs), возвращаются нули.
+
+    Args:
+        driver: Chrome WebDriver.
+        url: Адрес навигации, для отчёта.
+        estimate_saved: Оценить размер заблокированных ресурсов
+            (см. estimate_blocked_bytes) — отдельные HEAD-запросы в сеть.
+
+    Returns:
+        NavigationTraffic: Число запросов, заблокированных запросов
+        и скачанных байт.
+    """
+    try:
+        # Через execute, а не get_log: у удалённого драйвера get_log нет
+        entries = driver.execute(Command.GET_LOG, {"type": "performance"})["value"]
+    except WebDriverException:
+        entries = []
+
+    requests_total = 0
+    transferred = 0
+    # requestId -> (адрес, тип ресурса) из Network.requestWillBeSent
+    sent: Dict[str, Tuple[str, str]] = {}
+    blocked_by_type: Dict[str, int] = {}
+    transferred_by_type: Dict[str, int] = {}
+    blocked_urls: List[str] = []
+    for entry in entries:
+        message = json.loads(entry["message"])["message"]
+        method = message.get("method")
+        params = message.get("params", {})
+        request_id = params.get("requestId")
+        if method == "Network.requestWillBeSent":
+            requests_total += 1
+            resource_type = str(params.get("type", "Other")).lower()
+            sent[request_id] = (params.get("request", {}).get("url", ""), resource_type)
+        elif method == "Network.loadingFinished":
+            size = int(params.get("encodedDataLength", 0))
+            transferred += size
+            resource_type = sent.get(request_id, ("", "other"))[1]
+            transferred_by_type[resource_type] = transferred_by_type.get(resource_type, 0) + size
+        elif method == "Network.loadingFailed" and params.get("blockedReason"):
+            resource_type = str(params.get("type", "Other")).lower()
+            blocked_by_type[resource_type] = blocked_by_type.get(resource_type, 0) + 1
+            if request_id in sent:
+                blocked_urls.append(sent[request_id][0])
+
+    return NavigationTraffic(
+        url=url,
+        requests=requests_total,
+        blocked=sum(blocked_by_type.values()),
+        transferred_bytes=transferred,
+        blocked_by_type=blocked_by_type,
+        transferred_by_type=transferred_by_type,
+        saved_bytes=estimate_blocked_bytes(blocked_urls) if estimate_saved else None,
+    )
@@ -0,0 +1,169 @@
+"""
+Метрики производительности страниц со стороны браузера.
+
+После каждой навигации BasePage.open (при KINOPOISK_UI_PAGE_METRICS=1)
+читает из Performance API страницы Navigation Timing, отрисовку
+(first-paint, first-contentful-paint, LCP), число и объём загруженных
+ресурсов и размер кучи JS. Замеры раскладываются по шаблонам адресов
+(главная, поиск по kp_query, карточка фильма), а каждый замер
+дописывается строкой во временной ряд JSONL — по нему видно, когда
+страница поиска начала открываться медленнее.
+"""
+
+import functools
+import json
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qsl, urlsplit
+
+import allure
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from data.config import get_settings
+from utils.metrics import StreamingHistogram
+
+# Все значения — в мс от начала навигации, размеры — в байтах. LCP
+# доступен только через PerformanceObserver с buffered: true, поэтому
+# скрипт асинхронный и ждёт буферизованные записи один кадр
+_COLLECT_SCRIPT = """
+const done = arguments[arguments.length - 1];
+const result = {};
+const nav = performance.getEntriesByType("navigation")[0];
+if (nav) {
+    result.dns_ms = nav.domainLookupEnd - nav.domainLookupStart;
+    result.connect_ms = nav.connectEnd - nav.connectStart;
+    result.ttfb_ms = nav.responseStart - nav.startTime;
+    result.response_ms = nav.responseEnd - nav.startTime;
+    result.dom_interactive_ms = nav.domInteractive - nav.startTime;
+    result.dom_content_loaded_ms = nav.domContentLoadedEventEnd - nav.startTime;
+    result.load_ms = nav.loadEventEnd ? nav.loadEventEnd - nav.startTime : null;
+    result.document_bytes = nav.transferSize;
+}
+for (const paint of performance.getEntriesByType("paint")) {
+    result[paint.name.replace(/-/g, "_") + "_ms"] = paint.startTime;
+}
+const resources = performance.getEntriesByType("resource");
+result.resources = resources.length;
+result.resource_bytes = resources.reduce((sum, entry) => sum + (entry.transferSize || 0), 0);
+if (performance.memory) result.js_heap_bytes = performance.memory.usedJSHeapSize;
+let lcp = null;
+try {
+    const observer = new PerformanceObserver((list) => {
+        const entries = list.getEntries();
+        if (entries.length) lcp = entries[entries.length - 1].startTime;
+    });
+    observer.observe({type: "largest-contentful-paint", buffered: true});
+    setTimeout(() => {
+        observer.disconnect();
+        result.lcp_ms = lcp;
+        done(result);
+    }, 0);
+} catch (e) {
+    done(result);
+}
+"""
+
+_ID_SEGMENT = re.compile(r"^\d+$")
+
+
+def url_pattern(url: str) -> str:
+    """
+    Шаблон адреса для группировки замеров: числовые части пути
+    заменяются на {id}, значения параметров — на *.
+
+    Пример: /film/535341/ -> /film/{id}/, /index.php?kp_query=Нэчжа ->
+    /index.php?kp_query=*.
+    """
+    parts = urlsplit(url)
+    path = "/".join("{id}" if _ID_SEGMENT.match(segment) else segment for segment in (parts.path or "/").split("/"))
+    keys = sorted({key for key, _ in parse_qsl(parts.query, keep_blank_values=True)})
+    return path + ("?" + "&".join(f"{key}=*" for key in keys) if keys else "")
+
+
+def collect_page_metrics(driver: WebDriver) -> Dict[str, Any]:
+    """
+    Прочитать метрики текущей страницы одним асинхронным скриптом.
+
+    Returns:
+        dict: Метрики; пустой словарь, если браузер их не отдал.
+    """
+    try:
+        return driver.execute_async_script(_COLLECT_SCRIPT) or {}
+    except WebDriverException:
+        return {}
+
+
+class PageMetricsRecorder:
+    """
+    Метрики страниц по шаблонам адресов и их временной ряд.
+
+    Args:
+        series_path: JSONL-файл, куда дописывается каждый замер;
+            None — ряд не пишется.
+    """
+
+    def __init__(self, series_path: Optional[Path] = None) -> None:
+        self.series_path: Optional[Path] = series_path
+        self._patterns: Dict[str, Dict[str, StreamingHistogram]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, url: str, metrics: Dict[str, Any]) -> str:
+        """
+        Учесть замер навигации.
+
+        Returns:
+            str: Шаблон адреса, к которому отнесён замер.
+        """
+        pattern = url_pattern(url)
+        with self._lock:
+            histograms = self._patterns.setdefault(pattern, {})
+            for name, value in metrics.items():
+                if isinstance(value, (int, float)) and value >= 0:
+                    histograms.setdefault(name, StreamingHistogram()).add(float(value))
+            if self.series_path is not None:
+                line = json.dumps(
+                    {"ts": round(time.time(), 3), "pattern": pattern, "url": url, **metrics},
+                    ensure_ascii=False,
+                )
+                self.series_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.series_path, "a", encoding="utf-8") as fh:
+                    fh.write(line + "\n")
+        return pattern
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Сводка по шаблонам адресов: перцентили каждой метрики.
+        """
+        with self._lock:
+            return {
+                pattern: {name: histogram.summary() for name, histogram in sorted(histograms.items())}
+                for pattern, histograms in sorted(self._patterns.items())
+            }
+
+    def report(self, path: Path) -> Dict[str, Any]:
+        """
+        Записать сводку в JSON-файл и приложить её к allure-отчёту.
+        """
+        summary = self.summary()
+        text = json.dumps(summary, ensure_ascii=False, indent=2)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding="utf-8")
+        allure.attach(text, name="Метрики страниц", attachment_type=allure.attachment_type.JSON)
+        return summary
+
+
+@functools.lru_cache(maxsize=None)
+def get_page_metrics_recorder() -> Optional[PageMetricsRecorder]:
+    """
+    Метрики страниц процесса pytest.
+
+    Returns:
+        PageMetricsRecorder | None: Общий на процесс сборщик или None, если
+        сбор выключен (KINOPOISK_UI_PAGE_METRICS).
+    """
+    settings = get_settings()
+    return PageMetricsRecorder(settings.ui_page_metrics_series) if settings.ui_page_metrics else None
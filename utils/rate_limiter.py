@@ -0,0 +1,212 @@
+"""
+Клиентское ограничение частоты запросов к API Кинопоиска.
+
+Корзина токенов хранится в файле и защищена файловой блокировкой, поэтому
+все процессы (в том числе воркеры pytest-xdist), работающие с одним
+ключом API, делят общий лимит. При ответе 429 скорость снижается вдвое и
+запросы приостанавливаются на время из Retry-After, затем скорость
+постепенно восстанавливается.
+"""
+
+import datetime
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from data.config import get_settings
+from utils.file_lock import file_lock
+
+# Коэффициенты адаптации скорости: уменьшение при 429 и восстановление при успехе
+THROTTLE_FACTOR: float = 0.5
+RECOVERY_STEP: float = 0.05
+MIN_RATE_FACTOR: float = 0.1
+DEFAULT_RETRY_AFTER: float = 1.0
+
+
+class QuotaExceededError(RuntimeError):
+    """
+    Дневная квота запросов для ключа API исчерпана.
+    """
+
+
+class TokenBucket:
+    """
+    Корзина токенов, общая для всех процессов с одним ключом API.
+
+    Args:
+        api_key: Ключ API; по его хешу выбирается файл состояния.
+        rate: Пополнение корзины, запросов в секунду.
+        burst: Ёмкость корзины — сколько запросов можно сделать подряд.
+        daily_quota: Дневная квота запросов; None — без ограничения.
+        state_dir: Каталог файлов состояния; None — системный temp.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        rate: float,
+        burst: int = 5,
+        daily_quota: Optional[int] = None,
+        state_dir: Optional[Path] = None,
+    ) -> None:
+        if rate <= 0:
+            raise ValueError("rate должен быть положительным")
+        self.rate: float = rate
+        self.burst: int = max(burst, 1)
+        self.daily_quota: Optional[int] = daily_quota
+        key_id = hashlib.sha1(api_key.encode("utf-8")).hexdigest()[:12]
+        root = Path(state_dir) if state_dir else Path(tempfile.gettempdir())
+        self.state_path: Path = root / f"kinopoisk-ratelimit-{key_id}.json"
+        self.lock_path: Path = root / f"kinopoisk-ratelimit-{key_id}.lock"
+        self.waited: float = 0.0
+
+    def _load(self, now: float) -> Dict[str, Any]:
+        try:
+            state = json.loads(self.state_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            state = {}
+        today = datetime.date.today().isoformat()
+        if state.get("day") != today:
+            state.update(day=today, used_today=0, throttled_today=0)
+        state.setdefault("tokens", float(self.burst))
+        state.setdefault("updated", now)
+        state.setdefault("rate_factor", 1.0)
+        state.setdefault("blocked_until", 0.0)
+        # Пополнение корзины за прошедшее время с учётом текущего замедления
+        elapsed = max(now - state["updated"], 0.0)
+        state["tokens"] = min(
+            float(self.burst), state["tokens"] + elapsed * self.rate * state["rate_factor"]
+        )
+        state["updated"] = now
+        return state
+
+    def _save(self, state: Dict[str, Any]) -> None:
+        tmp_path = self.state_path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(state), encoding="utf-8")
+        os.replace(tmp_path, self.state_path)
+
+    def _take(self, now: float) -> float:
+        """
+        Попытаться взять токен.
+
+        Returns:
+            float: 0, если токен взят, иначе сколько секунд подождать.
+        """
+        with file_lock(self.lock_path):
+            state = self._load(now)
+            if self.daily_quota is not None and state["used_today"] >= self.daily_quota:
+                raise QuotaExceededError(
+                    f"Дневная квота {self.daily_quota} запросов исчерпана"
+                )
+            if now < state["blocked_until"]:
+                wait = state["blocked_until"] - now
+            elif state["tokens"] >= 1.0:
+                state["tokens"] -= 1.0
+                state["used_today"] += 1
+                wait = 0.0
+            else:
+                wait = (1.0 - state["tokens"]) / (self.rate * state["rate_factor"])
+            self._save(state)
+            return wait
+
+    def acquire(self) -> float:
+        """
+        Дождаться токена и забрать его.
+
+        Returns:
+            float: Сколько секунд пришлось ждать.
+
+        Raises:
+            QuotaExceededError: Если дневная квота исчерпана.
+        """
+        waited = 0.0
+        while True:
+            wait = self._take(time.time())
+            if wait <= 0:
+                self.waited += waited
+                return waited
+            time.sleep(wait)
+            waited += wait
+
+    def try_acquire(self) -> bool:
+        """
+        Забрать токен, только если он доступен прямо сейчас.
+
+        Returns:
+            bool: True, если токен взят.
+        """
+        try:
+            return self._take(time.time()) <= 0
+        except QuotaExceededError:
+            return False
+
+    def on_response(self, status_code: int, retry_after: Optional[str] = None) -> None:
+        """
+        Подстроить скорость по ответу сервера.
+
+        На 429 скорость уменьшается и запросы приостанавливаются до истечения
+        Retry-After; на успешный ответ скорость постепенно восстанавливается.
+
+        Args:
+            status_code: Код ответа.
+            retry_after: Значение заголовка Retry-After, если он был.
+        """
+        now = time.time()
+        with file_lock(self.lock_path):
+            state = self._load(now)
+            if status_code == 429:
+                try:
+                    pause = float(retry_after) if retry_after else DEFAULT_RETRY_AFTER
+                except ValueError:
+                    pause = DEFAULT_RETRY_AFTER
+                state["rate_factor"] = max(state["rate_factor"] * THROTTLE_FACTOR, MIN_RATE_FACTOR)
+                state["blocked_until"] = max(state["blocked_until"], now + pause)
+                state["tokens"] = 0.0
+                state["throttled_today"] += 1
+            elif state["rate_factor"] < 1.0:
+                state["rate_factor"] = min(state["rate_factor"] + RECOVERY_STEP, 1.0)
+            else:
+                return
+            self._save(state)
+
+    def usage(self) -> Dict[str, Any]:
+        """
+        Текущее использование квоты ключа (общее для всех процессов).
+        """
+        with file_lock(self.lock_path):
+            state = self._load(time.time())
+        return {
+            "day": state["day"],
+            "used_today": state["used_today"],
+            "daily_quota": self.daily_quota,
+            "throttled_today": state["throttled_today"],
+            "rate_limit": self.rate,
+            "rate_factor": state["rate_factor"],
+            "waited_in_process": self.waited,
+        }
+
+
+def build_default_rate_limiter(api_key: str) -> Optional[TokenBucket]:
+    """
+    Ограничитель по настройкам окружения (KINOPOISK_API_RATE_LIMIT и соседние).
+
+    Args:
+        api_key: Ключ API, для которого действует лимит.
+
+    Returns:
+        TokenBucket | None: Ограничитель или None, если лимит не задан.
+    """
+    settings = get_settings()
+    if settings.api_rate_limit <= 0:
+        return None
+    return TokenBucket(
+        api_key,
+        rate=settings.api_rate_limit,
+        burst=settings.api_rate_burst,
+        daily_quota=settings.api_daily_quota,
+        state_dir=settings.api_rate_state_dir,
+    )
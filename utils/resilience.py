@@ -0,0 +1,261 @@
+"""
+Защита тестов от хвоста задержек и деградации API Кинопоиска.
+
+HedgePolicy — дублирующие запросы для идемпотентных GET: если ответа нет
+дольше перцентиля задержки эндпоинта (по замерам LatencyRecorder),
+клиент отправляет копию запроса и берёт тот ответ, что придёт первым.
+Число дублей ограничено долей от всех запросов, а каждый дубль берёт
+токен из ограничителя частоты без ожидания, поэтому дубли не выводят
+клиент за лимит API.
+
+CircuitBreaker — размыкатель цепи по эндпоинтам: после серии сбоев
+подряд (5xx, обрыв соединения, таймаут) запросы к эндпоинту сразу
+завершаются CircuitOpenError, не дожидаясь таймаута. Через reset_timeout
+один пробный запрос проверяет, восстановился ли эндпоинт.
+"""
+
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import requests
+
+from data.config import get_settings
+from utils.metrics import LatencyRecorder
+from utils.rate_limiter import TokenBucket
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half-open"
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """
+    Эндпоинт временно отключён размыкателем цепи после серии сбоев.
+    """
+
+
+class HedgePolicy:
+    """
+    Когда отправлять дубль запроса и можно ли его себе позволить.
+
+    Args:
+        recorder: Замеры задержек, по которым выбирается момент дубля.
+            Клиент с этой политикой сам подключает его хуком.
+        quantile: Перцентиль полного времени запроса к эндпоинту (0..100).
+        min_samples: Сколько замеров эндпоинта нужно, чтобы доверять перцентилю.
+        initial_delay: Задержка дубля, пока замеров меньше min_samples, с.
+        min_delay: Нижняя граница задержки дубля, с.
+        max_delay: Верхняя граница задержки дубля, с.
+        max_ratio: Доля дублей от всех запросов через политику.
+    """
+
+    def __init__(
+        self,
+        recorder: LatencyRecorder,
+        quantile: float = 95.0,
+        min_samples: int = 20,
+        initial_delay: float = 1.0,
+        min_delay: float = 0.01,
+        max_delay: float = 5.0,
+        max_ratio: float = 0.1,
+    ) -> None:
+        self.recorder: LatencyRecorder = recorder
+        self.quantile: float = quantile
+        self.min_samples: int = min_samples
+        self.initial_delay: float = initial_delay
+        self.min_delay: float = min_delay
+        self.max_delay: float = max_delay
+        self.max_ratio: float = max_ratio
+        self.requests: int = 0
+        self.hedged: int = 0
+        self._endpoints: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _stats(self, endpoint: str) -> Dict[str, Any]:
+        stats = self._endpoints.get(endpoint)
+        if stats is None:
+            stats = self._endpoints[endpoint] = {
+                "requests": 0,
+                "hedged": 0,
+                "hedge_wins": 0,
+                "skipped_budget": 0,
+                "skipped_rate_limit": 0,
+                "delay_ms": None,
+            }
+        return stats
+
+    def delay(self, endpoint: str) -> float:
+        """
+        Учесть запрос к эндпоинту и выбрать, через сколько отправить дубль.
+
+        Returns:
+            float: Задержка дубля, секунды.
+        """
+        value = self.initial_delay
+        if self.recorder.samples(endpoint) >= self.min_samples:
+            value = self.recorder.percentile(endpoint, self.quantile) or self.initial_delay
+        value = min(max(value, self.min_delay), self.max_delay)
+        with self._lock:
+            self.requests += 1
+            stats = self._stats(endpoint)
+            stats["requests"] += 1
+            stats["delay_ms"] = round(value * 1000, 2)
+        return value
+
+    def allow(self, endpoint: str, rate_limiter: Optional[TokenBucket] = None) -> bool:
+        """
+        Можно ли отправить дубль: в пределах доли дублей и лимита частоты.
+
+        Args:
+            endpoint: Эндпоинт запроса.
+            rate_limiter: Ограничитель клиента; дубль берёт токен без ожидания.
+
+        Returns:
+            bool: True, если дубль можно отправлять.
+        """
+        with self._lock:
+            stats = self._stats(endpoint)
+            if self.hedged + 1 > self.max_ratio * self.requests:
+                stats["skipped_budget"] += 1
+                return False
+            self.hedged += 1
+        if rate_limiter is not None and not rate_limiter.try_acquire():
+            with self._lock:
+                self.hedged -= 1
+                stats["skipped_rate_limit"] += 1
+            return False
+        with self._lock:
+            stats["hedged"] += 1
+        return True
+
+    def won(self, endpoint: str) -> None:
+        """
+        Учесть, что дубль ответил раньше исходного запроса.
+        """
+        with self._lock:
+            self._stats(endpoint)["hedge_wins"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Счётчики дублей по эндпоинтам и последняя задержка дубля.
+        """
+        with self._lock:
+            return {
+                "quantile": self.quantile,
+                "max_ratio": self.max_ratio,
+                "requests": self.requests,
+                "hedged": self.hedged,
+                "endpoints": {endpoint: dict(stats) for endpoint, stats in sorted(self._endpoints.items())},
+            }
+
+
+class CircuitBreaker:
+    """
+    Размыкатель цепи с отдельным состоянием для каждого эндпоинта.
+
+    Args:
+        failure_threshold: Сколько сбоев подряд размыкают цепь.
+        reset_timeout: Через сколько секунд пропустить пробный запрос.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+    ) -> None:
+        self.failure_threshold: int = max(failure_threshold, 1)
+        self.reset_timeout: float = reset_timeout
+        self._endpoints: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _state(self, endpoint: str) -> Dict[str, Any]:
+        state = self._endpoints.get(endpoint)
+        if state is None:
+            state = self._endpoints[endpoint] = {
+                "state": STATE_CLOSED,
+                "failures": 0,
+                "opened_at": 0.0,
+                "opened": 0,
+                "rejected": 0,
+            }
+        return state
+
+    def before(self, endpoint: str) -> None:
+        """
+        Пропустить запрос к эндпоинту или отказать сразу.
+
+        Raises:
+            CircuitOpenError: Если цепь эндпоинта разомкнута или пробный
+                запрос уже выполняется.
+        """
+        with self._lock:
+            state = self._state(endpoint)
+            if state["state"] == STATE_CLOSED:
+                return
+            if state["state"] == STATE_OPEN and time.monotonic() - state["opened_at"] >= self.reset_timeout:
+                state["state"] = STATE_HALF_OPEN
+                return
+            state["rejected"] += 1
+        raise CircuitOpenError(f"{endpoint}: цепь разомкнута после {self.failure_threshold} сбоев подряд")
+
+    def record(self, endpoint: str, ok: bool) -> None:
+        """
+        Учесть результат запроса к эндпоинту.
+
+        Args:
+            endpoint: Эндпоинт запроса.
+            ok: False — сбой (5xx, обрыв соединения, таймаут).
+        """
+        with self._lock:
+            state = self._state(endpoint)
+            if ok:
+                state["state"] = STATE_CLOSED
+                state["failures"] = 0
+                return
+            state["failures"] += 1
+            if state["state"] == STATE_HALF_OPEN or state["failures"] >= self.failure_threshold:
+                if state["state"] != STATE_OPEN:
+                    state["opened"] += 1
+                state["state"] = STATE_OPEN
+                state["opened_at"] = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Состояние цепи каждого эндпоинта: сбои подряд, сколько раз
+        размыкалась и сколько запросов отклонено.
+        """
+        with self._lock:
+            return {
+                endpoint: {key: value for key, value in state.items() if key != "opened_at"}
+                for endpoint, state in sorted(self._endpoints.items())
+            }
+
+
+def build_default_hedge(recorder: LatencyRecorder) -> Optional[HedgePolicy]:
+    """
+    Дублирование запросов по настройкам окружения (KINOPOISK_API_HEDGE и соседние).
+
+    Args:
+        recorder: Замеры задержек клиента.
+
+    Returns:
+        HedgePolicy | None: Политика или None, если дублирование выключено.
+    """
+    settings = get_settings()
+    if not settings.api_hedge_enabled:
+        return None
+    return HedgePolicy(recorder, quantile=settings.api_hedge_quantile, max_ratio=settings.api_hedge_max_ratio)
+
+
+def build_default_breaker() -> Optional[CircuitBreaker]:
+    """
+    Размыкатель цепи по настройкам окружения (KINOPOISK_API_BREAKER_*).
+
+    Returns:
+        CircuitBreaker | None: Размыкатель или None, если он выключен.
+    """
+    settings = get_settings()
+    if settings.api_breaker_threshold <= 0:
+        return None
+    return CircuitBreaker(settings.api_breaker_threshold, settings.api_breaker_reset)
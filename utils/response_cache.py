@@ -0,0 +1,211 @@
+"""
+Кеш ответов API Кинопоиска с TTL по эндпоинтам и вытеснением LRU.
+
+Кеш подключается к KinopoiskApiClient явно (параметр cache) и хранит
+только успешные ответы GET. Запросы без токена и с неверным токеном
+кеш всегда обходят — они должны доходить до сервера.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Mapping, Optional
+
+from data.config import get_settings
+from utils.http_records import key_digest
+
+# TTL по умолчанию для эндпоинтов API, секунды
+DEFAULT_TTLS: Dict[str, float] = {
+    "/movie/search": 600.0,
+    "/movie": 3600.0,
+}
+DEFAULT_TTL: float = 300.0
+
+
+class _Entry:
+    __slots__ = ("record", "expires_at", "size")
+
+    def __init__(self, record: Dict[str, Any], expires_at: float, size: int) -> None:
+        self.record = record
+        self.expires_at = expires_at
+        self.size = size
+
+
+class ResponseCache:
+    """
+    Двухуровневый кеш ответов: LRU в памяти и необязательный каталог на диске.
+
+    Память ограничена числом записей и суммарным размером тел ответов;
+    при превышении вытесняются давно не использованные записи. Диск
+    пишется сквозным образом, поэтому вытесненная из памяти запись может
+    вернуться оттуда, пока не истёк её TTL.
+
+    Args:
+        max_entries: Максимум записей в памяти; по умолчанию —
+            KINOPOISK_API_CACHE_MAX_ENTRIES.
+        max_bytes: Максимальный суммарный размер тел ответов в памяти;
+            по умолчанию — KINOPOISK_API_CACHE_MAX_BYTES.
+        ttls: TTL по пути эндпоинта (например, "/movie/search"), секунды.
+        default_ttl: TTL для путей, которых нет в ttls.
+        disk_dir: Каталог дискового уровня; None — только память.
+    """
+
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        ttls: Optional[Mapping[str, float]] = None,
+        default_ttl: float = DEFAULT_TTL,
+        disk_dir: Optional[Path] = None,
+    ) -> None:
+        settings = get_settings()
+        self.max_entries: int = settings.api_cache_max_entries if max_entries is None else max_entries
+        self.max_bytes: int = settings.api_cache_max_bytes if max_bytes is None else max_bytes
+        self.ttls: Dict[str, float] = dict(DEFAULT_TTLS if ttls is None else ttls)
+        self.default_ttl: float = default_ttl
+        self.disk_dir: Optional[Path] = Path(disk_dir) if disk_dir else None
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._bytes: int = 0
+        self._lock = threading.Lock()
+        self.hits: int = 0
+        self.disk_hits: int = 0
+        self.misses: int = 0
+        self.evictions: int = 0
+        self.expired: int = 0
+        self.bytes_saved: int = 0
+
+    def ttl_for(self, path: str) -> float:
+        """
+        TTL для пути эндпоинта (query-часть пути игнорируется).
+        """
+        return self.ttls.get(path.split("?", 1)[0], self.default_ttl)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Найти неистёкшую запись сначала в памяти, затем на диске.
+
+        Args:
+            key: Ключ запроса (utils.http_records.request_key).
+
+        Returns:
+            dict | None: Сериализованный ответ или None.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    self.bytes_saved += entry.size
+                    return entry.record
+                self._drop(key)
+                self.expired += 1
+
+            entry = self._read_disk(key, now)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+            self.bytes_saved += entry.size
+            self._store(key, entry)
+            return entry.record
+
+    def put(self, key: str, record: Dict[str, Any], ttl: float) -> None:
+        """
+        Сохранить ответ в кеш.
+
+        Args:
+            key: Ключ запроса.
+            record: Ответ, сериализованный response_to_record.
+            ttl: Время жизни записи, секунды.
+        """
+        size = len(record.get("body") or record.get("body_b64") or "")
+        entry = _Entry(record, time.time() + ttl, size)
+        with self._lock:
+            self._store(key, entry)
+            self._write_disk(key, entry)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Счётчики кеша: попадания, промахи, вытеснения и сэкономленные байты.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expired": self.expired,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "bytes_saved": self.bytes_saved,
+            }
+
+    def _store(self, key: str, entry: _Entry) -> None:
+        if key in self._entries:
+            self._drop(key)
+        if entry.size > self.max_bytes:
+            return
+        self._entries[key] = entry
+        self._bytes += entry.size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+            self.evictions += 1
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self._bytes -= entry.size
+
+    def _disk_path(self, key: str) -> Optional[Path]:
+        if self.disk_dir is None:
+            return None
+        return self.disk_dir / f"{key_digest(key)}.json"
+
+    def _read_disk(self, key: str, now: float) -> Optional[_Entry]:
+        path = self._disk_path(key)
+        if path is None or not path.exists():
+            return None
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if data.get("key") != key:
+            return None
+        if data["expires_at"] <= now:
+            path.unlink(missing_ok=True)
+            self.expired += 1
+            return None
+        return _Entry(data["record"], data["expires_at"], data["size"])
+
+    def _write_disk(self, key: str, entry: _Entry) -> None:
+        path = self._disk_path(key)
+        if path is None:
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {"key": key, "expires_at": entry.expires_at, "size": entry.size, "record": entry.record}
+        # Пишем во временный файл и переименовываем, чтобы параллельные
+        # процессы не прочитали недописанную запись
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp_path, path)
+
+
+def build_default_cache() -> Optional[ResponseCache]:
+    """
+    Кеш по настройкам окружения (KINOPOISK_API_CACHE и соседние переменные).
+
+    Returns:
+        ResponseCache | None: Кеш или None, если он выключен.
+    """
+    settings = get_settings()
+    if not settings.api_cache_enabled:
+        return None
+    return ResponseCache(disk_dir=settings.api_cache_dir)
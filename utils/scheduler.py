@@ -0,0 +1,435 @@
+"""
+Распределение тестов по воркерам xdist с учётом их длительности.
+
+Штатный `--dist load` раздаёт тесты порциями в порядке сбора, и воркер,
+которому достались секундные UI-тесты, заканчивает намного позже
+остальных. DurationScheduling раздаёт тесты по одному в порядке убывания
+ожидаемой длительности (longest processing time first): освободившийся
+воркер берёт самый долгий из оставшихся тестов. UI-тесты идут только
+на воркеры с браузером: сколько их нужно, выбирает симуляция расписания
+с учётом времени запуска браузера; воркер без браузера берёт UI-тест,
+только когда API-тестов не осталось, а оставшихся UI-тестов хватает,
+чтобы окупить запуск ещё одного браузера.
+
+Длительности берутся из прошлых прогонов (DurationStore, кеш pytest
+`.pytest_cache`): время setup+call+teardown каждого теста без запуска
+браузеров, который учитывается отдельно. Для новых тестов — среднее
+по тестам того же вида (UI или API).
+
+Перед прогоном считается нижняя граница времени прогона (критический
+путь: самый долгий тест или вся работа, поделённая на воркеры) и время
+по плану; после прогона они сравниваются с фактическим в
+reports/xdist_schedule.json.
+"""
+
+import heapq
+import re
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+from utils.startup import marks_by_test
+
+CACHE_KEY = "kinopoisk/test_durations"
+# Длительности, пока о тестах этого вида нет истории, секунды
+DEFAULT_UI_S = 5.0
+DEFAULT_API_S = 0.2
+DEFAULT_DRIVER_STARTUP_S = 3.0
+# Вес нового замера в скользящем среднем длительности
+SMOOTHING = 0.5
+
+_PARAMS = re.compile(r"\[.*\]$")
+
+
+class DurationStore:
+    """
+    Длительности тестов из прошлых прогонов и время запуска браузеров.
+
+    Args:
+        cache: Кеш pytest (`config.cache`); None — без сохранения между прогонами.
+        rootpath: Корень проекта: по нему ищутся файлы новых тестов.
+    """
+
+    def __init__(self, cache: Any = None, rootpath: Optional[Path] = None) -> None:
+        self.cache = cache
+        self.rootpath: Path = rootpath or Path.cwd()
+        data = cache.get(CACHE_KEY, {}) if cache is not None else {}
+        self.tests: Dict[str, Dict[str, Any]] = data.get("tests", {})
+        self.driver_startup_s: Optional[float] = data.get("driver_startup_s")
+        self._phases: Dict[str, float] = {}
+        self._startup: Dict[str, float] = {}
+        self._file_marks: Dict[str, Optional[Dict[str, Set[str]]]] = {}
+
+    def add_report(self, report: Any) -> None:
+        """
+        Учесть отчёт фазы теста; на teardown длительность теста записывается.
+
+        Время запуска браузеров (свойство `driver_startup_s` отчёта) не
+        входит в длительность теста, а усредняется отдельно.
+        """
+        nodeid = report.nodeid
+        self._phases[nodeid] = self._phases.get(nodeid, 0.0) + (report.duration or 0.0)
+        for name, value in report.user_properties:
+            if name == "driver_startup_s":
+                self._startup[nodeid] = float(value)
+        if report.when != "teardown":
+            return
+        seconds = self._phases.pop(nodeid)
+        startup = self._startup.pop(nodeid, None)
+        if startup is not None:
+            seconds = max(seconds - startup, 0.0)
+            self.driver_startup_s = _smooth(self.driver_startup_s, startup)
+        previous = self.tests.get(nodeid, {}).get("s")
+        self.tests[nodeid] = {"s": round(_smooth(previous, seconds), 4), "ui": "ui" in report.keywords}
+
+    def is_ui(self, nodeid: str) -> bool:
+        """
+        UI-тест ли это: по истории, а для нового теста — по маркерам
+        в исходном коде модуля.
+        """
+        known = self.tests.get(nodeid)
+        if known is not None:
+            return bool(known["ui"])
+        path, _, name = nodeid.partition("::")
+        if path not in self._file_marks:
+            self._file_marks[path] = marks_by_test(self.rootpath / path)
+        marks = self._file_marks[path] or {}
+        return "ui" in marks.get(_PARAMS.sub("", name), set())
+
+    def estimate(self, nodeid: str, ui: bool) -> float:
+        """
+        Ожидаемая длительность теста, секунды.
+        """
+        known = self.tests.get(nodeid)
+        if known is not None:
+            return known["s"]
+        same_kind = [item["s"] for item in self.tests.values() if item["ui"] == ui]
+        if same_kind:
+            return sum(same_kind) / len(same_kind)
+        return DEFAULT_UI_S if ui else DEFAULT_API_S
+
+    @property
+    def startup_estimate(self) -> float:
+        return DEFAULT_DRIVER_STARTUP_S if self.driver_startup_s is None else self.driver_startup_s
+
+    def save(self) -> None:
+        if self.cache is not None:
+            self.cache.set(
+                CACHE_KEY,
+                {"tests": self.tests, "driver_startup_s": _round(self.driver_startup_s)},
+            )
+
+
+def _smooth(previous: Optional[float], value: float) -> float:
+    return value if previous is None else previous + SMOOTHING * (value - previous)
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 4)
+
+
+class _Queues:
+    """
+    Оставшиеся тесты двух видов, каждый по убыванию длительности.
+    """
+
+    def __init__(self, estimates: List[float], ui: List[bool], indices: Sequence[int]) -> None:
+        self.estimates = estimates
+        self.ui = ui
+        self.ui_pending: List[int] = []
+        self.api_pending: List[int] = []
+        self.extend(indices)
+
+    def extend(self, indices: Sequence[int]) -> None:
+        for index in indices:
+            (self.ui_pending if self.ui[index] else self.api_pending).append(index)
+        for pending in (self.ui_pending, self.api_pending):
+            pending.sort(key=lambda index: -self.estimates[index])
+
+    def __bool__(self) -> bool:
+        return bool(self.ui_pending or self.api_pending)
+
+    def __len__(self) -> int:
+        return len(self.ui_pending) + len(self.api_pending)
+
+    def ui_work(self) -> float:
+        return sum(self.estimates[index] for index in self.ui_pending)
+
+    def take(self, has_browser: bool, ui_workers: int, startup: float) -> Tuple[Optional[int], bool]:
+        """
+        Выбрать следующий тест для освободившегося воркера.
+
+        Args:
+            has_browser: Браузер на воркере уже запущен или запускается.
+            ui_workers: Сколько воркеров с браузером сейчас.
+            startup: Время запуска браузера, секунды.
+
+        Returns:
+            tuple: Индекс теста (None — отдать нечего) и признак того, что
+            воркеру придётся запустить браузер.
+        """
+        ui_head = self.ui_pending[0] if self.ui_pending else None
+        api_head = self.api_pending[0] if self.api_pending else None
+        if has_browser:
+            if ui_head is not None and (api_head is None or self.estimates[ui_head] >= self.estimates[api_head]):
+                return self.ui_pending.pop(0), False
+            return (self.api_pending.pop(0) if api_head is not None else None), False
+        if api_head is not None:
+            return self.api_pending.pop(0), False
+        # Новый браузер окупается, если оставшейся UI-работы на каждого
+        # воркера с браузером хватает хотя бы на ещё один запуск
+        if ui_head is not None and (ui_workers == 0 or self.ui_work() / (ui_workers + 1) >= startup):
+            return self.ui_pending.pop(0), True
+        return None, False
+
+
+def simulate(
+    estimates: List[float], ui: List[bool], workers: int, ui_workers: int, startup: float
+) -> Tuple[float, List[float]]:
+    """
+    Прогнать расписание DurationScheduling по ожидаемым длительностям.
+
+    Args:
+        estimates: Длительность каждого теста.
+        ui: Признак UI-теста для каждого теста.
+        workers: Число воркеров.
+        ui_workers: Сколько воркеров сразу получают браузер.
+        startup: Время запуска браузера.
+
+    Returns:
+        tuple: Время прогона по плану и загрузка каждого воркера, секунды.
+    """
+    queues = _Queues(estimates, ui, range(len(estimates)))
+    has_ui = bool(queues.ui_pending)
+    browsers = [has_ui and worker < ui_workers for worker in range(workers)]
+    loads = [startup if browser else 0.0 for browser in browsers]
+    heap = [(load, worker) for worker, load in enumerate(loads)]
+    heapq.heapify(heap)
+    while queues and heap:
+        load, worker = heapq.heappop(heap)
+        index, starts_browser = queues.take(browsers[worker], sum(browsers), startup)
+        if index is None:
+            continue
+        if starts_browser:
+            browsers[worker] = True
+            load += startup
+        loads[worker] = load + estimates[index]
+        heapq.heappush(heap, (loads[worker], worker))
+    return max(loads, default=0.0), loads
+
+
+def plan(estimates: List[float], ui: List[bool], workers: int, startup: float) -> Dict[str, Any]:
+    """
+    Выбрать число воркеров с браузером и оценить время прогона.
+
+    Returns:
+        dict: ui_workers, время по плану, нижняя граница (критический путь)
+        и самый долгий тест.
+    """
+    workers = max(workers, 1)
+    has_ui = any(ui)
+    candidates = range(1, workers + 1) if has_ui else [0]
+    best_makespan, best_workers = min((simulate(estimates, ui, workers, k, startup)[0], k) for k in candidates)
+    longest = max(
+        range(len(estimates)), key=lambda index: estimates[index] + (startup if ui[index] else 0.0), default=None
+    )
+    critical = 0.0 if longest is None else estimates[longest] + (startup if ui[longest] else 0.0)
+    total = sum(estimates) + (startup if has_ui else 0.0)
+    return {
+        "ui_workers": best_workers,
+        "planned_s": round(best_makespan, 3),
+        "lower_bound_s": round(max(critical, total / workers), 3),
+        "total_work_s": round(total, 3),
+        "longest_index": longest,
+        "longest_s": round(critical, 3),
+    }
+
+
+class DurationScheduling:
+    """
+    Планировщик xdist: самые долгие тесты первыми, UI-тесты — на воркеры
+    с уже запущенным браузером.
+
+    Реализует протокол планировщика xdist (как LoadScheduling). Каждому
+    воркеру выдаётся по тесту так, чтобы у него в очереди было не больше
+    двух: воркер начинает тест, только зная следующий.
+
+    Args:
+        config: Конфигурация pytest.
+        store: Длительности тестов из прошлых прогонов.
+        log: Журнал xdist.
+        numnodes: Число воркеров; по умолчанию — из `-n`/`--tx`.
+    """
+
+    def __init__(self, config: Any, store: DurationStore, log: Any = None, numnodes: Optional[int] = None) -> None:
+        self.config = config
+        self.store = store
+        if numnodes is None:
+            from xdist.workermanage import parse_tx_spec_config
+
+            numnodes = len(parse_tx_spec_config(config))
+        self.numnodes: int = numnodes
+        self.node2collection: Dict[Any, List[str]] = {}
+        self.node2pending: Dict[Any, List[int]] = {}
+        self.collection: Optional[List[str]] = None
+        self.estimates: List[float] = []
+        self.ui: List[bool] = []
+        self.queues: Optional[_Queues] = None
+        self.browsers: Set[Any] = set()
+        self.assigned: Dict[Any, List[int]] = {}
+        self.plan: Dict[str, Any] = {}
+        self.started: Optional[float] = None
+        self.log: Callable[..., None] = log.durationsched if log is not None else (lambda *args: None)
+
+    @property
+    def nodes(self) -> List[Any]:
+        return list(self.node2pending)
+
+    @property
+    def collection_is_completed(self) -> bool:
+        return len(self.node2collection) >= self.numnodes
+
+    @property
+    def tests_finished(self) -> bool:
+        if not self.collection_is_completed or self.queues is None or self.queues:
+            return False
+        return all(len(pending) < 2 for pending in self.node2pending.values())
+
+    @property
+    def has_pending(self) -> bool:
+        return bool(self.queues) or any(self.node2pending.values())
+
+    def add_node(self, node: Any) -> None:
+        assert node not in self.node2pending
+        self.node2pending[node] = []
+        self.assigned[node] = []
+
+    def add_node_collection(self, node: Any, collection: Sequence[str]) -> None:
+        assert node in self.node2pending
+        if self.collection is not None and list(collection) != self.collection:
+            self.log(f"{node.gateway.id}: собраны другие тесты, воркер не получит тестов")
+            return
+        self.node2collection[node] = list(collection)
+
+    def mark_test_complete(self, node: Any, item_index: int, duration: float = 0) -> None:
+        self.node2pending[node].remove(item_index)
+        self._fill(node)
+
+    def mark_test_pending(self, item: str) -> None:
+        assert self.collection is not None and self.queues is not None
+        self.queues.extend([self.collection.index(item)])
+        for node in self.nodes:
+            self._fill(node)
+
+    def remove_pending_tests_from_node(self, node: Any, indices: Sequence[int]) -> None:
+        raise NotImplementedError()
+
+    def remove_node(self, node: Any) -> Optional[str]:
+        pending = self.node2pending.pop(node)
+        self.browsers.discard(node)
+        if not pending:
+            return None
+        # Воркер упал: текущий тест — причина, остальные раздаются заново
+        assert self.collection is not None and self.queues is not None
+        crashitem = self.collection[pending.pop(0)]
+        self.queues.extend(pending)
+        for other in self.nodes:
+            self._fill(other)
+        return crashitem
+
+    def schedule(self) -> None:
+        assert self.collection_is_completed
+        if self.collection is not None:
+            for node in self.nodes:
+                self._fill(node)
+            return
+        if not self._same_collection():
+            self.log("**Воркеры собрали разные тесты, прогон прерван**")
+            return
+
+        self.collection = next(iter(self.node2collection.values()))
+        self.ui = [self.store.is_ui(nodeid) for nodeid in self.collection]
+        self.estimates = [self.store.estimate(nodeid, ui) for nodeid, ui in zip(self.collection, self.ui)]
+        self.queues = _Queues(self.estimates, self.ui, range(len(self.collection)))
+        startup = self.store.startup_estimate
+        self.plan = plan(self.estimates, self.ui, len(self.nodes), startup)
+        self.browsers = set(self.nodes[: self.plan["ui_workers"]]) if self.queues.ui_pending else set()
+        self.started = time.perf_counter()
+        for node in self.nodes:
+            self._fill(node)
+
+    def _fill(self, node: Any) -> None:
+        """
+        Дополнить очередь воркера до двух тестов. Когда раздано всё,
+        остановить воркеры: каждый доделает выданные тесты и завершится.
+
+        Воркер, которому сейчас нечего выдать (например, без браузера,
+        пока остались только UI-тесты), не останавливается: тесты упавшего
+        воркера (remove_node, mark_test_pending) вернутся в очередь, и их
+        нужно будет кому-то выдать.
+        """
+        if node.shutting_down or self.queues is None:
+            return
+        pending = self.node2pending[node]
+        sent: List[int] = []
+        while len(pending) + len(sent) < 2:
+            index, starts_browser = self.queues.take(
+                node in self.browsers, len(self.browsers), self.store.startup_estimate
+            )
+            if index is None:
+                break
+            if starts_browser:
+                self.browsers.add(node)
+            sent.append(index)
+        if sent:
+            pending.extend(sent)
+            self.assigned[node].extend(sent)
+            node.send_runtest_some(sent)
+        if not self.queues:
+            for other in self.nodes:
+                if not other.shutting_down:
+                    other.shutdown()
+
+    def _same_collection(self) -> bool:
+        from xdist.report import report_collection_diff
+
+        items = list(self.node2collection.items())
+        first_node, first = items[0]
+        same = True
+        for node, collection in items[1:]:
+            message = report_collection_diff(first, collection, first_node.gateway.id, node.gateway.id)
+            if message:
+                same = False
+                self.log(message)
+        return same
+
+    def report(self) -> Dict[str, Any]:
+        """
+        План и фактическое распределение: время по плану, нижняя граница,
+        фактическое время и ожидаемая загрузка каждого воркера.
+        """
+        if self.collection is None:
+            return {}
+        longest = self.plan.get("longest_index")
+        longest_test = None if longest is None else {"nodeid": self.collection[longest], "s": self.plan["longest_s"]}
+        return {
+            "workers": len(self.assigned),
+            "tests": len(self.collection),
+            "ui_tests": sum(self.ui),
+            "driver_startup_s": round(self.store.startup_estimate, 3),
+            "ui_workers_planned": self.plan["ui_workers"],
+            "ui_workers": sum(any(self.ui[index] for index in indices) for indices in self.assigned.values()),
+            "total_work_s": self.plan["total_work_s"],
+            "lower_bound_s": self.plan["lower_bound_s"],
+            "planned_s": self.plan["planned_s"],
+            "actual_s": None if self.started is None else round(time.perf_counter() - self.started, 3),
+            "longest_test": longest_test,
+            "nodes": {
+                node.gateway.id: {
+                    "tests": len(indices),
+                    "ui_tests": sum(self.ui[index] for index in indices),
+                    "estimated_s": round(sum(self.estimates[index] for index in indices), 3),
+                }
+                for node, indices in sorted(self.assigned.items(), key=lambda item: item[0].gateway.id)
+            },
+        }
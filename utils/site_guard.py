@@ -0,0 +1,102 @@
+"""
+Распознавание капчи и блокировок Кинопоиска.
+
+Когда сайт отвечает капчей (showcaptcha), ни один элемент, которого ждут
+тесты, на странице не появится. SiteGuard проверяет страницу сразу после
+навигации и прерывает тест пропуском (SiteBlockedError), а после первой
+блокировки размыкает «предохранитель»: оставшиеся UI-тесты процесса
+(и других воркеров xdist того же прогона) пропускаются сразу, без
+запуска браузера и ожиданий.
+"""
+
+from pathlib import Path
+from typing import Optional, Tuple
+
+import pytest
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.remote.webdriver import WebDriver
+
+# Элементы страниц капчи Яндекса: чекбокс «Я не робот» и расширенная капча
+CAPTCHA_MARKER: Tuple[str, str] = (
+    By.CSS_SELECTOR,
+    'form[action*="checkcaptcha"], .CheckboxCaptcha, .AdvancedCaptcha, #checkbox-captcha-form',
+)
+
+# Признаки блокировки в адресе страницы
+CAPTCHA_URL_MARKERS: Tuple[str, ...] = ("showcaptcha", "checkcaptcha")
+
+_PROBE_SCRIPT = "return [location.href, !!document.querySelector(arguments[0])];"
+
+
+class SiteBlockedError(pytest.skip.Exception):
+    """
+    Сайт показал капчу или заблокировал браузер: тест пропускается.
+    """
+
+
+class SiteGuard:
+    """
+    Проверка страниц на капчу и предохранитель для всего прогона.
+
+    Args:
+        state_path: Файл-признак блокировки, общий для воркеров xdist;
+            None — предохранитель действует только в текущем процессе.
+    """
+
+    def __init__(self, state_path: Optional[Path] = None) -> None:
+        self.state_path: Optional[Path] = state_path
+        self.reason: Optional[str] = None
+
+    @property
+    def tripped(self) -> bool:
+        """
+        Сайт уже блокировал этот прогон.
+        """
+        if self.reason is None and self.state_path is not None and self.state_path.exists():
+            self.reason = self.state_path.read_text(encoding="utf-8") or "Сайт заблокировал прогон"
+        return self.reason is not None
+
+    def trip(self, reason: str) -> None:
+        """
+        Разомкнуть предохранитель.
+        """
+        self.reason = reason
+        if self.state_path is not None:
+            self.state_path.parent.mkdir(parents=True, exist_ok=True)
+            self.state_path.write_text(reason, encoding="utf-8")
+
+    def reset(self) -> None:
+        self.reason = None
+        if self.state_path is not None:
+            self.state_path.unlink(missing_ok=True)
+
+    def ensure_open(self) -> None:
+        """
+        Пропустить тест, если сайт уже блокировал прогон.
+
+        Raises:
+            SiteBlockedError: Предохранитель разомкнут.
+        """
+        if self.tripped:
+            raise SiteBlockedError(f"UI-тесты пропущены: {self.reason}")
+
+    def check(self, driver: WebDriver) -> None:
+        """
+        Проверить открытую страницу одним запросом к браузеру.
+
+        Raises:
+            SiteBlockedError: На странице капча или адрес блокировки.
+        """
+        try:
+            url, has_captcha = driver.execute_script(_PROBE_SCRIPT, CAPTCHA_MARKER[1])
+        except WebDriverException:
+            return
+        if has_captcha or any(marker in url for marker in CAPTCHA_URL_MARKERS):
+            reason = f"Кинопоиск вернул капчу ({url}) — тест заблокирован защитой сайта"
+            self.trip(reason)
+            raise SiteBlockedError(reason)
+
+
+# Предохранитель процесса pytest; conftest.py задаёт общий для воркеров файл
+site_guard = SiteGuard()
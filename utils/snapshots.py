@@ -0,0 +1,285 @@
+"""
+Снимки страниц Кинопоиска и локальный сервер для их воспроизведения.
+
+Снимок — это DOM страницы после отрисовки (без скриптов, которые снова
+пошли бы в сеть) и таблицы стилей, нужные для проверок видимости.
+SnapshotServer отдаёт снимки по тем же путям, что и сайт, поэтому
+SearchPage работает с ним без изменений, если направить её на сервер
+(KINOPOISK_UI_URL или аргумент base_url).
+
+Съёмка (нужен Chrome и доступ к сайту):
+    python -m utils.snapshots capture --query Нэчжа --query 11
+
+Воспроизведение:
+    python -m utils.snapshots serve --port 8001
+    KINOPOISK_UI_URL=http://127.0.0.1:8001/ pytest -m ui
+"""
+
+import argparse
+import hashlib
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests
+from selenium.webdriver.remote.webdriver import WebDriver
+
+from data.config import get_settings
+from utils.site_guard import SiteGuard
+
+ASSETS_PREFIX = "/__assets/"
+
+# Сериализация отрисованной страницы: скрипты удаляются, таблицы стилей
+# заменяются метками, которые затем подменяются локальными путями
+_SERIALIZE_SCRIPT = """
+const root = document.documentElement.cloneNode(true);
+root.querySelectorAll("script, noscript, iframe").forEach((el) => el.remove());
+const stylesheets = [];
+root.querySelectorAll('link[rel="stylesheet"]').forEach((el) => {
+    const absolute = new URL(el.getAttribute("href"), document.baseURI).href;
+    el.setAttribute("href", "__ASSET_" + stylesheets.length + "__");
+    stylesheets.push(absolute);
+});
+return {html: "<!DOCTYPE html>\\n" + root.outerHTML, stylesheets: stylesheets};
+"""
+
+# Страница фильма, которой нет в снимках: переходы из выдачи не ведут в 404
+_PLACEHOLDER_PAGE = """<!DOCTYPE html>
+<html lang="ru"><head><meta charset="utf-8"><title>Снимок: {path}</title></head>
+<body><header><input name="kp_query" type="text"></header>
+<main><h1>{path}</h1></main></body></html>
+"""
+
+
+def snapshot_key(path_with_query: str) -> str:
+    """
+    Ключ снимка: путь и отсортированные декодированные параметры запроса.
+
+    Args:
+        path_with_query: Путь с параметрами или полный URL.
+    """
+    parts = urlsplit(path_with_query)
+    path = parts.path or "/"
+    params = sorted(parse_qsl(parts.query, keep_blank_values=True))
+    return f"{path}?{urlencode(params)}" if params else path
+
+
+class SnapshotStore:
+    """
+    Каталог снимков: manifest.json и файлы страниц и ресурсов.
+
+    Args:
+        root: Каталог хранилища; по умолчанию — KINOPOISK_SNAPSHOT_DIR.
+    """
+
+    def __init__(self, root: Optional[Path] = None) -> None:
+        if root is None:
+            root = get_settings().snapshot_dir
+        self.root: Path = root
+        self._manifest_path: Path = root / "manifest.json"
+        self.manifest: Dict[str, Dict[str, Any]] = {}
+        if self._manifest_path.exists():
+            self.manifest = json.loads(self._manifest_path.read_text(encoding="utf-8"))
+        self._lock = threading.Lock()
+
+    def put(self, key: str, body: bytes, content_type: str) -> None:
+        """
+        Сохранить страницу или ресурс под ключом snapshot_key.
+        """
+        name = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+        path = self.root / "files" / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(body)
+        with self._lock:
+            self.manifest[key] = {"file": f"files/{name}", "content_type": content_type, "size": len(body)}
+            self._manifest_path.write_text(
+                json.dumps(self.manifest, ensure_ascii=False, indent=2, sort_keys=True), encoding="utf-8"
+            )
+
+    def get(self, key: str) -> Optional[Tuple[bytes, str]]:
+        """
+        Тело и Content-Type снимка или None, если снимка нет.
+        """
+        entry = self.manifest.get(key)
+        if entry is None:
+            return None
+        return (self.root / entry["file"]).read_bytes(), entry["content_type"]
+
+
+def capture_page(driver: WebDriver, url: str, store: SnapshotStore, session: requests.Session) -> str:
+    """
+    Снять отрисованную страницу вместе с таблицами стилей.
+
+    Args:
+        driver: WebDriver, которым открывается страница.
+        url: Адрес страницы на сайте.
+        store: Куда сохранить снимок.
+        session: HTTP-сессия для скачивания таблиц стилей.
+
+    Returns:
+        str: Ключ сохранённой страницы.
+
+    Raises:
+        SiteBlockedError: Сайт показал капчу вместо страницы.
+    """
+    driver.get(url)
+    SiteGuard().check(driver)
+    page = driver.execute_script(_SERIALIZE_SCRIPT)
+    html: str = page["html"]
+    for index, stylesheet in enumerate(page["stylesheets"]):
+        asset_key = ASSETS_PREFIX + hashlib.sha1(stylesheet.encode("utf-8")).hexdigest()[:16] + ".css"
+        if asset_key not in store.manifest:
+            response = session.get(stylesheet, timeout=15)
+            if response.ok:
+                store.put(asset_key, response.content, "text/css; charset=utf-8")
+        html = html.replace(f"__ASSET_{index}__", asset_key)
+    key = snapshot_key(url)
+    store.put(key, html.encode("utf-8"), "text/html; charset=utf-8")
+    return key
+
+
+class SnapshotServer:
+    """
+    Статический сервер снимков в фоновом потоке.
+
+    Args:
+        store: Хранилище снимков.
+        host: Адрес для прослушивания.
+        port: Порт (0 — выбрать свободный).
+        placeholders: Отдавать заглушку для не снятых страниц /film/ и /series/.
+    """
+
+    def __init__(
+        self,
+        store: SnapshotStore,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        placeholders: bool = True,
+    ) -> None:
+        self.store: SnapshotStore = store
+        self.placeholders: bool = placeholders
+        self.request_count: int = 0
+        self.misses: List[str] = []
+        self._thread: Optional[threading.Thread] = None
+        self.httpd: ThreadingHTTPServer = ThreadingHTTPServer((host, port), _make_handler(self))
+        self.httpd.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        """
+        Базовый URL сервера, аналог KINOPOISK_UI_URL.
+        """
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self) -> "SnapshotServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "SnapshotServer":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    def handle(self, raw_path: str) -> Tuple[int, bytes, str]:
+        """
+        Найти снимок для запроса.
+
+        Returns:
+            tuple: Код ответа, тело, Content-Type.
+        """
+        self.request_count += 1
+        key = snapshot_key(raw_path)
+        found = self.store.get(key)
+        if found is not None:
+            return 200, found[0], found[1]
+        path = urlsplit(raw_path).path
+        if self.placeholders and path.startswith(("/film/", "/series/")):
+            return 200, _PLACEHOLDER_PAGE.format(path=path).encode("utf-8"), "text/html; charset=utf-8"
+        self.misses.append(key)
+        return 404, b"", "text/plain"
+
+
+def _make_handler(server: SnapshotServer) -> type:
+    """
+    Класс обработчика HTTP-запросов, привязанный к серверу снимков.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_GET(self) -> None:
+            status, body, content_type = server.handle(self.path)
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Cache-Control", "no-store")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+            pass
+
+    return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Снимки страниц Кинопоиска")
+    parser.add_argument("--dir", type=Path, default=None, help="каталог снимков; по умолчанию KINOPOISK_SNAPSHOT_DIR")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    capture = commands.add_parser("capture", help="снять главную страницу и страницы поиска")
+    capture.add_argument("--query", action="append", default=[], help="поисковый запрос (можно несколько)")
+    capture.add_argument("--no-main", action="store_true", help="не снимать главную страницу")
+
+    serve = commands.add_parser("serve", help="раздавать снимки")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8001)
+
+    args = parser.parse_args()
+    store = SnapshotStore(args.dir)
+
+    if args.command == "capture":
+        from utils.driver_factory import create_chrome_driver
+        from utils.network_filter import NetworkFilter
+
+        settings = get_settings()
+        urls = [] if args.no_main else [settings.base_ui_url]
+        urls += [settings.ui_search_url_template.format(query=query) for query in args.query]
+        driver = create_chrome_driver(
+            page_load_strategy=settings.ui_page_load_strategy,
+            network_filter=NetworkFilter(),
+            remote_url=settings.ui_remote_url,
+            profile_template=settings.ui_profile_template_dir,
+        )
+        session = requests.Session()
+        try:
+            for url in urls:
+                print(f"{url} -> {capture_page(driver, url, store, session)}")
+        finally:
+            driver.quit()
+            session.close()
+        return
+
+    server = SnapshotServer(store, host=args.host, port=args.port)
+    print(f"Снимки {store.root} доступны по адресу {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
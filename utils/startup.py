@@ -0,0 +1,233 @@
+"""
+Быстрый запуск pytest: отбор модулей по маркерам без импорта и замер запуска.
+
+При `pytest -m api` модули, в которых по исходному коду ни один тест не
+подходит под выражение -m, не импортируются вовсе: вместе с ними не
+загружаются selenium и PageObject. Маркеры читаются из AST модуля
+(`pytestmark` модуля и классов, декораторы `@pytest.mark.*`). Если
+маркеры нельзя определить статически (`pytest.param(..., marks=...)`,
+выражение -m с аргументами маркеров), в модуле не найдено ни одного теста
+или установленный pytest не даёт разобрать выражение -m, модуль
+собирается как обычно. Отбор касается только модулей из testpaths
+и python_files настроек pytest.
+
+StartupProfile раскладывает время запуска на загрузку интерпретатора,
+плагинов и conftest, чтение настроек и сбор каждого модуля тестов и
+пишет результат в reports/startup.json и временной ряд reports/startup.jsonl.
+"""
+
+import ast
+import json
+import os
+import sys
+import time
+from fnmatch import fnmatch
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+try:
+    # Разбор выражения -m — внутренний модуль pytest; без него отбор выключается
+    from _pytest.mark.expression import Expression
+except ImportError:  # pragma: no cover — другая версия pytest
+    Expression = None  # type: ignore[assignment,misc]
+
+# Модули, загрузку которых стоит видеть в замере: тяжёлые зависимости UI
+HEAVY_MODULES = ("selenium", "webdriver_manager", "pages")
+
+
+def _mark_name(node: ast.expr) -> Optional[str]:
+    """
+    Имя маркера из выражения `pytest.mark.name`, `mark.name` или их вызова.
+    """
+    if isinstance(node, ast.Call):
+        node = node.func
+    if isinstance(node, ast.Attribute):
+        owner = node.value
+        if isinstance(owner, ast.Attribute) and owner.attr == "mark":
+            return node.attr
+        if isinstance(owner, ast.Name) and owner.id == "mark":
+            return node.attr
+    return None
+
+
+def _marks_of(nodes: Iterable[ast.expr]) -> Set[str]:
+    return {name for name in map(_mark_name, nodes) if name}
+
+
+def _pytestmark(body: List[ast.stmt]) -> Set[str]:
+    marks: Set[str] = set()
+    for stmt in body:
+        if isinstance(stmt, (ast.Assign, ast.AnnAssign)):
+            targets = stmt.targets if isinstance(stmt, ast.Assign) else [stmt.target]
+            if any(isinstance(target, ast.Name) and target.id == "pytestmark" for target in targets):
+                value = stmt.value
+                marks |= _marks_of(value.elts if isinstance(value, (ast.List, ast.Tuple)) else [value])
+    return marks
+
+
+def marks_by_test(path: Path) -> Optional[Dict[str, Set[str]]]:
+    """
+    Маркеры каждого теста модуля по его исходному коду.
+
+    Args:
+        path: Файл модуля тестов.
+
+    Returns:
+        dict | None: Имя теста (`test_x` или `TestClass::test_x`) -> маркеры;
+        None, если маркеры нельзя определить без импорта модуля.
+    """
+    try:
+        tree = ast.parse(path.read_bytes(), filename=str(path))
+    except (OSError, SyntaxError, ValueError):
+        return None
+    for node in ast.walk(tree):
+        # Маркеры отдельных наборов параметров видны только после импорта
+        if isinstance(node, ast.Call) and any(keyword.arg == "marks" for keyword in node.keywords):
+            return None
+
+    module_marks = _pytestmark(tree.body)
+    tests: Dict[str, Set[str]] = {}
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name.startswith("test"):
+            tests[node.name] = module_marks | _marks_of(node.decorator_list)
+        elif isinstance(node, ast.ClassDef) and node.name.startswith("Test"):
+            class_marks = module_marks | _pytestmark(node.body) | _marks_of(node.decorator_list)
+            for item in node.body:
+                if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)) and item.name.startswith("test"):
+                    tests[f"{node.name}::{item.name}"] = class_marks | _marks_of(item.decorator_list)
+    return tests
+
+
+def static_marks(path: Path) -> Optional[List[Set[str]]]:
+    """
+    Маркеры каждого теста модуля по его исходному коду.
+
+    Returns:
+        list | None: Набор маркеров на каждый тест; None, если маркеры
+        нельзя определить без импорта модуля.
+    """
+    tests = marks_by_test(path)
+    return None if tests is None else list(tests.values())
+
+
+def may_select(path: Path, markexpr: str) -> bool:
+    """
+    Может ли выражение -m выбрать хотя бы один тест модуля.
+
+    Args:
+        path: Файл модуля тестов.
+        markexpr: Выражение -m.
+
+    Returns:
+        bool: False, только если по исходному коду в модуле есть тесты
+        и ни один из них не подходит.
+    """
+    if not markexpr or "(" in markexpr or Expression is None:
+        return True
+    tests = static_marks(path)
+    if not tests:
+        return True
+    try:
+        expression = Expression.compile(markexpr)
+        return any(expression.evaluate(lambda name, **kwargs: name in marks) for marks in tests)
+    except Exception:  # noqa: BLE001 — ошибку выражения покажет сам pytest
+        return True
+
+
+def is_test_module(path: Path, patterns: Iterable[str], roots: Iterable[Path] = ()) -> bool:
+    """
+    Подходит ли файл под python_files из настроек pytest.
+
+    Args:
+        path: Файл.
+        patterns: Шаблоны python_files.
+        roots: Каталоги testpaths; пусто — без ограничения по каталогу.
+
+    Returns:
+        bool: True, если файл — модуль тестов в одном из каталогов roots.
+    """
+    if path.suffix != ".py" or not any(fnmatch(path.name, pattern) for pattern in patterns):
+        return False
+    roots = list(roots)
+    return not roots or any(path.is_relative_to(root) for root in roots)
+
+
+def process_uptime() -> Optional[float]:
+    """
+    Сколько секунд назад запущен текущий процесс (Linux, точность 10 мс).
+
+    Returns:
+        float | None: Время с запуска процесса; None, если его не узнать.
+    """
+    try:
+        stat = Path("/proc/self/stat").read_text()
+        # Поле 22 — момент запуска в тиках с загрузки системы; имя процесса
+        # в скобках может содержать пробелы, поэтому считаем после ")"
+        started_ticks = int(stat.rsplit(")", 1)[1].split()[19])
+        return time.clock_gettime(time.CLOCK_BOOTTIME) - started_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class StartupProfile:
+    """
+    Разбивка времени запуска pytest: интерпретатор и плагины до загрузки
+    conftest, чтение настроек, сбор каждого модуля тестов (в основном —
+    импорт модуля и его зависимостей).
+    """
+
+    def __init__(self) -> None:
+        self.conftest_loaded_s: Optional[float] = process_uptime()
+        self.collection_started: Optional[float] = None
+        self.collection_s: Optional[float] = None
+        self.modules: Dict[str, float] = {}
+        self.skipped_modules: List[str] = []
+
+    def collection_start(self) -> None:
+        self.collection_started = time.perf_counter()
+
+    def module_collected(self, nodeid: str, seconds: float) -> None:
+        self.modules[nodeid] = round(seconds, 4)
+
+    def module_skipped(self, path: Path, root: Path) -> None:
+        try:
+            self.skipped_modules.append(path.relative_to(root).as_posix())
+        except ValueError:
+            self.skipped_modules.append(str(path))
+
+    def collection_finish(self) -> None:
+        if self.collection_started is not None:
+            self.collection_s = time.perf_counter() - self.collection_started
+
+    def to_dict(self) -> Dict[str, Any]:
+        from data import config
+
+        return {
+            "ts": round(time.time(), 3),
+            "conftest_loaded_s": _round(self.conftest_loaded_s),
+            "config_resolve_s": _round(config.resolve_time_s),
+            "collection_s": _round(self.collection_s),
+            "startup_s": _round(process_uptime()),
+            "modules_s": dict(sorted(self.modules.items(), key=lambda item: -item[1])),
+            "skipped_modules": sorted(self.skipped_modules),
+            "heavy_modules_loaded": [name for name in HEAVY_MODULES if name in sys.modules],
+        }
+
+    def write(self, report_path: Path, series_path: Optional[Path] = None) -> Dict[str, Any]:
+        """
+        Записать замер в JSON-файл и дописать строкой во временной ряд.
+
+        Returns:
+            dict: Записанный замер.
+        """
+        data = self.to_dict()
+        report_path.parent.mkdir(parents=True, exist_ok=True)
+        report_path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+        if series_path is not None:
+            with open(series_path, "a", encoding="utf-8") as fh:
+                fh.write(json.dumps(data, ensure_ascii=False) + "\n")
+        return data
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 4)
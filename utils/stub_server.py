@@ -0,0 +1,344 @@
+"""
+Локальный сервер-заглушка API Кинопоиска v1.4.
+
+Эмулирует эндпоинты /v1.4/movie и /v1.4/movie/search, которые использует
+KinopoiskApiClient: проверку x-api-key, фильтр по genres.name, пагинацию,
+выбор полей через selectFields, а также искусственные задержки и ошибки.
+Нужен для нагрузочных прогонов и бенчмарков клиента без лимитов
+настоящего API.
+
+Запуск:
+    python -m utils.stub_server --port 8000 --api-key test --latency 0.05
+
+Тесты направляются на заглушку переменными окружения:
+    KINOPOISK_API_URL=http://127.0.0.1:8000/v1.4 KINOPOISK_API_KEY=test pytest -m api
+"""
+
+import argparse
+import json
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+API_PREFIX = "/v1.4"
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 250
+
+GENRES: Tuple[str, ...] = (
+    "драма",
+    "комедия",
+    "фэнтези",
+    "боевик",
+    "мультфильм",
+    "фантастика",
+    "триллер",
+    "приключения",
+)
+
+# Фильмы, на которые опираются тесты из tests/test_api.py
+KNOWN_MOVIES: Tuple[Tuple[str, str, int, Tuple[str, ...]], ...] = (
+    ("Нэчжа", "Ne Zha", 2019, ("мультфильм", "фэнтези", "приключения")),
+    ("Нэчжа побеждает Царя драконов", "Ne Zha 2", 2025, ("мультфильм", "фэнтези")),
+    ("11", "11", 2006, ("драма",)),
+    ("11 друзей Оушена", "Ocean's Eleven", 2001, ("боевик", "комедия")),
+    ("Властелин колец: Братство Кольца", "The Lord of the Rings", 2001, ("фэнтези", "приключения")),
+)
+
+
+def build_movies(count: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    Сгенерировать детерминированный набор фильмов в формате API v1.4.
+
+    Args:
+        count: Общее число фильмов (не меньше числа известных фильмов).
+        seed: Зерно генератора для воспроизводимости.
+
+    Returns:
+        list: Документы фильмов.
+    """
+    rnd = random.Random(seed)
+    movies: List[Dict[str, Any]] = []
+    for index in range(max(count, len(KNOWN_MOVIES))):
+        if index < len(KNOWN_MOVIES):
+            name, alt_name, year, genres = KNOWN_MOVIES[index]
+        else:
+            name = f"Фильм {index}"
+            alt_name = f"Movie {index}"
+            year = rnd.randint(1950, 2025)
+            genres = tuple(rnd.sample(GENRES, rnd.randint(1, 3)))
+        movie_id = 1000 + index
+        movies.append(
+            {
+                "id": movie_id,
+                "name": name,
+                "alternativeName": alt_name,
+                "enName": alt_name,
+                "type": "movie",
+                "year": year,
+                "description": f"Описание фильма «{name}». " * 8,
+                "shortDescription": f"Короткое описание «{name}».",
+                "movieLength": rnd.randint(70, 180),
+                "rating": {"kp": round(rnd.uniform(4, 9), 3), "imdb": round(rnd.uniform(4, 9), 1)},
+                "votes": {"kp": rnd.randint(100, 900000), "imdb": rnd.randint(100, 900000)},
+                "genres": [{"name": genre} for genre in genres],
+                "countries": [{"name": rnd.choice(("США", "Россия", "Китай", "Франция"))}],
+                "poster": {
+                    "url": f"https://image.openmoviedb.com/kinopoisk-images/{movie_id}/orig",
+                    "previewUrl": f"https://image.openmoviedb.com/kinopoisk-images/{movie_id}/x1000",
+                },
+            }
+        )
+    return movies
+
+
+class StubApiServer:
+    """
+    Сервер-заглушка API Кинопоиска в фоновом потоке.
+
+    Args:
+        host: Адрес для прослушивания.
+        port: Порт (0 — выбрать свободный).
+        api_key: Единственный принимаемый токен x-api-key.
+        latency: Базовая задержка ответа, секунды.
+        jitter: Разброс задержки, секунды (равномерно ±jitter).
+        slow_rate: Доля медленных ответов — хвост распределения задержек.
+        slow_latency: Дополнительная задержка медленного ответа, секунды.
+        error_rate: Доля ответов 500.
+        throttle_rate: Доля ответов 429 с заголовком Retry-After.
+        movie_count: Размер набора фильмов.
+        seed: Зерно генератора данных и случайных ошибок.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        api_key: str = "stub-api-key",
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        slow_rate: float = 0.0,
+        slow_latency: float = 1.0,
+        error_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        movie_count: int = 1000,
+        seed: int = 0,
+    ) -> None:
+        self.api_key: str = api_key
+        self.latency: float = latency
+        self.jitter: float = jitter
+        self.slow_rate: float = slow_rate
+        self.slow_latency: float = slow_latency
+        self.error_rate: float = error_rate
+        self.throttle_rate: float = throttle_rate
+        self.movies: List[Dict[str, Any]] = build_movies(movie_count, seed)
+        self.request_count: int = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self.httpd: ThreadingHTTPServer = ThreadingHTTPServer((host, port), _make_handler(self))
+        self.httpd.daemon_threads = True
+
+    @property
+    def url(self) -> str:
+        """
+        Базовый URL API заглушки, аналог KINOPOISK_API_URL.
+        """
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}{API_PREFIX}"
+
+    def start(self) -> "StubApiServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self) -> "StubApiServer":
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    def _roll(self) -> Tuple[float, float]:
+        """
+        Случайные величины одного запроса: задержка и число для выбора ошибки.
+        """
+        with self._lock:
+            self.request_count += 1
+            delay = self.latency + self._random.uniform(-self.jitter, self.jitter)
+            if self.slow_rate and self._random.random() < self.slow_rate:
+                delay += self.slow_latency
+            return max(delay, 0.0), self._random.random()
+
+    def handle(
+        self, method: str, raw_path: str, headers: Dict[str, str]
+    ) -> Tuple[int, Dict[str, str], Dict[str, Any]]:
+        """
+        Обработать запрос и сформировать ответ.
+
+        Returns:
+            tuple: Код ответа, дополнительные заголовки, тело ответа.
+        """
+        delay, chance = self._roll()
+        if delay:
+            time.sleep(delay)
+
+        parts = urlsplit(raw_path)
+        path = parts.path.rstrip("/")
+        params = parse_qs(parts.query, keep_blank_values=True)
+
+        if path not in (f"{API_PREFIX}/movie", f"{API_PREFIX}/movie/search"):
+            return 404, {}, _error(404, "Not Found", f"Cannot {method} {parts.path}")
+        if headers.get("x-api-key") != self.api_key:
+            return 401, {}, _error(401, "Unauthorized", "В запросе не указан токен или он неверный")
+        if method != "GET":
+            return 405, {}, _error(405, "Method Not Allowed", f"Cannot {method} {parts.path}")
+
+        if chance < self.throttle_rate:
+            return 429, {"Retry-After": "1"}, _error(429, "Too Many Requests", "Превышен лимит запросов")
+        if chance < self.throttle_rate + self.error_rate:
+            return 500, {}, _error(500, "Internal Server Error", "Внутренняя ошибка сервера")
+
+        if path.endswith("/search"):
+            docs = self._search(params.get("query", [""])[0])
+        else:
+            docs = self._filter_by_genre(params.get("genres.name", []))
+        body = _paginate(docs, params)
+        select = [field for field in params.get("selectFields", []) if field]
+        if select:
+            body["docs"] = [{key: doc[key] for key in select if key in doc} for doc in body["docs"]]
+        return 200, {}, body
+
+    def _search(self, query: str) -> List[Dict[str, Any]]:
+        needle = query.strip().lower()
+        if not needle:
+            return self.movies
+        return [
+            movie
+            for movie in self.movies
+            if needle in movie["name"].lower() or needle in movie["alternativeName"].lower()
+        ]
+
+    def _filter_by_genre(self, genres: List[str]) -> List[Dict[str, Any]]:
+        wanted = {genre.lower() for genre in genres if genre}
+        if not wanted:
+            return self.movies
+        return [
+            movie
+            for movie in self.movies
+            if wanted.intersection(genre["name"] for genre in movie["genres"])
+        ]
+
+
+def _error(status: int, error: str, message: str) -> Dict[str, Any]:
+    return {"statusCode": status, "error": error, "message": message}
+
+
+def _int_param(params: Dict[str, List[str]], name: str, default: int) -> int:
+    try:
+        return int(params.get(name, [default])[0])
+    except (TypeError, ValueError):
+        return default
+
+
+def _paginate(docs: List[Dict[str, Any]], params: Dict[str, List[str]]) -> Dict[str, Any]:
+    """
+    Вырезать страницу выдачи и сформировать конверт ответа как в API v1.4.
+    """
+    limit = min(max(_int_param(params, "limit", DEFAULT_LIMIT), 1), MAX_LIMIT)
+    page = max(_int_param(params, "page", 1), 1)
+    start = (page - 1) * limit
+    return {
+        "docs": docs[start:start + limit],
+        "total": len(docs),
+        "limit": limit,
+        "page": page,
+        "pages": math.ceil(len(docs) / limit),
+    }
+
+
+def _make_handler(server: StubApiServer) -> type:
+    """
+    Класс обработчика HTTP-запросов, привязанный к экземпляру заглушки.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Заголовки и тело уходят отдельными записями: без TCP_NODELAY
+        # Nagle и отложенный ACK добавляют к каждому ответу ~40 мс
+        disable_nagle_algorithm = True
+
+        def _respond(self) -> None:
+            length = int(self.headers.get("Content-Length") or 0)
+            if length:
+                self.rfile.read(length)
+            headers = {name.lower(): value for name, value in self.headers.items()}
+            status, extra_headers, body = server.handle(self.command, self.path, headers)
+            payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(payload)))
+            for name, value in extra_headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(payload)
+
+        do_GET = _respond
+        do_POST = _respond
+
+        def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+            pass
+
+    return Handler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Локальная заглушка API Кинопоиска v1.4")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--api-key", default=None, help="по умолчанию — KINOPOISK_API_KEY из окружения")
+    parser.add_argument("--latency", type=float, default=0.0, help="базовая задержка, с")
+    parser.add_argument("--jitter", type=float, default=0.0, help="разброс задержки, с")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="доля медленных ответов")
+    parser.add_argument("--slow-latency", type=float, default=1.0, help="задержка медленного ответа, с")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="доля ответов 500")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="доля ответов 429")
+    parser.add_argument("--movies", type=int, default=1000, help="размер набора фильмов")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.api_key is None:
+        from data.config import get_settings
+
+        args.api_key = get_settings().api_key or "stub-api-key"
+
+    server = StubApiServer(
+        host=args.host,
+        port=args.port,
+        api_key=args.api_key,
+        latency=args.latency,
+        jitter=args.jitter,
+        slow_rate=args.slow_rate,
+        slow_latency=args.slow_latency,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        movie_count=args.movies,
+        seed=args.seed,
+    )
+    print(f"Заглушка API Кинопоиска слушает {server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,446 @@
+"""
+Ожидания элементов без опроса WebDriver.
+
+Вместо WebDriverWait, который раз в полсекунды заново ищет элемент,
+WaitEngine отправляет в браузер один асинхронный скрипт: он подписывается
+на изменения DOM через MutationObserver и возвращает элемент, как только
+условие выполнилось. Каждое ожидание учитывается в бюджете времени теста
+(WaitBudget) и в статистике по локаторам (WaitRecorder).
+"""
+
+import json
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Sequence, Tuple
+
+import allure
+from selenium.common.exceptions import JavascriptException, TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.remote.webdriver import WebDriver
+from selenium.webdriver.remote.webelement import WebElement
+
+from utils.metrics import StreamingHistogram
+
+Locator = Tuple[str, str]
+
+# Состояния элемента, которых умеет ждать WaitEngine
+STATE_PRESENT = "present"
+STATE_VISIBLE = "visible"
+STATE_CLICKABLE = "clickable"
+
+# Локаторы переводятся в CSS или XPath, которые понимает браузер
+_CSS_BY = {
+    By.CSS_SELECTOR: "{}",
+    By.TAG_NAME: "{}",
+    By.ID: '[id="{}"]',
+    By.NAME: '[name="{}"]',
+    By.CLASS_NAME: ".{}",
+}
+
+# Ждёт первый элемент любого из локаторов в нужном состоянии. Проверка
+# запускается только на пачки изменений DOM: узлов, атрибутов (в том числе
+# style и class, от которых зависит видимость) и текста
+_WAIT_SCRIPT = """
+const queries = arguments[0], state = arguments[1], timeoutMs = arguments[2];
+const done = arguments[arguments.length - 1];
+function find(query) {
+    if (query.xpath) {
+        const snapshot = document.evaluate(
+            query.selector, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+        const nodes = [];
+        for (let i = 0; i < snapshot.snapshotLength; i++) nodes.push(snapshot.snapshotItem(i));
+        return nodes;
+    }
+    return document.querySelectorAll(query.selector);
+}
+function isVisible(el) {
+    if (!el.getClientRects().length) return false;
+    const style = window.getComputedStyle(el);
+    return style.visibility !== "hidden" && style.display !== "none" && style.opacity !== "0";
+}
+function matches(el) {
+    if (state === "present") return true;
+    if (!isVisible(el)) return false;
+    return state !== "clickable" || !el.disabled;
+}
+function lookup() {
+    for (const query of queries) {
+        for (const el of find(query)) {
+            if (matches(el)) return el;
+        }
+    }
+    return null;
+}
+let finished = false, observer = null, timer = null;
+function finish(value) {
+    if (finished) return;
+    finished = true;
+    if (observer) observer.disconnect();
+    clearTimeout(timer);
+    done(value);
+}
+function check() {
+    const el = lookup();
+    if (el) finish(el);
+}
+check();
+if (!finished) {
+    observer = new MutationObserver(check);
+    observer.observe(document, {subtree: true, childList: true, attributes: true, characterData: true});
+    timer = setTimeout(() => finish(null), timeoutMs);
+}
+"""
+
+# Адрес и момент начала загрузки текущего документа: по ним ожидание
+# готовности отличает новую страницу от предыдущей
+_NAVIGATION_MARKER_SCRIPT = """
+return {href: location.href, timeOrigin: performance.timeOrigin};
+"""
+
+# Ждёт окончания разбора документа (DOMContentLoaded). Если передан маркер
+# документа до навигации (arguments[1]), сначала ждёт новую страницу: при
+# стратегии загрузки none скрипт может попасть ещё в старый документ —
+# тогда он ждёт смены адреса или прерывается выгрузкой документа
+_READY_SCRIPT = """
+const timeoutMs = arguments[0], previous = arguments[1];
+const done = arguments[arguments.length - 1];
+let finished = false, observer = null, timer = null;
+function finish(value) {
+    if (finished) return;
+    finished = true;
+    if (observer) observer.disconnect();
+    clearTimeout(timer);
+    done(value);
+}
+function isNew() {
+    return !previous || location.href !== previous.href || performance.timeOrigin !== previous.timeOrigin;
+}
+function check() {
+    if (!isNew()) return;
+    if (observer) observer.disconnect();
+    if (document.readyState !== "loading") finish(true);
+    else document.addEventListener("DOMContentLoaded", () => finish(true), {once: true});
+}
+timer = setTimeout(() => finish(false), timeoutMs);
+check();
+if (!finished && !isNew()) {
+    observer = new MutationObserver(check);
+    observer.observe(document, {subtree: true, childList: true});
+}
+"""
+
+# Ждёт, пока адрес страницы уйдёт с arguments[0]. При обычной навигации
+# документ выгружается и скрипт прерывается (см. WaitEngine.until_url_changes),
+# при навигации внутри одностраничного приложения адрес проверяется
+# на каждую пачку изменений DOM
+_URL_CHANGE_SCRIPT = """
+const url = arguments[0], timeoutMs = arguments[1];
+const done = arguments[arguments.length - 1];
+let finished = false, observer = null, timer = null;
+function finish(value) {
+    if (finished) return;
+    finished = true;
+    if (observer) observer.disconnect();
+    clearTimeout(timer);
+    done(value);
+}
+function check() {
+    if (location.href !== url) finish(true);
+}
+check();
+if (!finished) {
+    observer = new MutationObserver(check);
+    observer.observe(document, {subtree: true, childList: true});
+    timer = setTimeout(() => finish(false), timeoutMs);
+}
+"""
+
+
+# Ошибки, с которыми драйвер прерывает асинхронный скрипт при смене документа
+_NAVIGATION_ERRORS = (
+    "document unloaded",
+    "execution context was destroyed",
+    "cannot find context with specified id",
+    "inspected target navigated or closed",
+)
+
+
+def _is_navigation_error(exc: JavascriptException) -> bool:
+    """
+    Прерван ли скрипт выгрузкой документа, а не ошибкой в нём самом
+    (например, неверным селектором).
+    """
+    message = (exc.msg or "").lower()
+    return any(marker in message for marker in _NAVIGATION_ERRORS)
+
+
+def locator_to_selector(locator: Locator) -> Dict[str, Any]:
+    """
+    Перевести локатор Selenium в селектор для поиска на стороне страницы.
+
+    Args:
+        locator: Кортеж (By, locator_string).
+
+    Returns:
+        dict: {"selector": str, "xpath": bool}.
+    """
+    by, value = locator
+    if by == By.XPATH:
+        return {"selector": value, "xpath": True}
+    if by in _CSS_BY:
+        return {"selector": _CSS_BY[by].format(value), "xpath": False}
+    raise ValueError(f"Локатор {by} не поддерживается для поиска в браузере")
+
+
+class WaitBudget:
+    """
+    Общий лимит времени на все ожидания одного теста.
+
+    Args:
+        total: Лимит, секунды.
+    """
+
+    def __init__(self, total: float) -> None:
+        self.total: float = total
+        self.spent: float = 0.0
+
+    @property
+    def remaining(self) -> float:
+        return max(self.total - self.spent, 0.0)
+
+    def spend(self, seconds: float) -> None:
+        self.spent += seconds
+
+
+_current_budget: ContextVar[Optional[WaitBudget]] = ContextVar("_current_budget", default=None)
+
+
+@contextmanager
+def wait_budget(total: float) -> Iterator[WaitBudget]:
+    """
+    Ограничить суммарное время ожиданий внутри блока.
+
+    Args:
+        total: Лимит, секунды.
+    """
+    budget = WaitBudget(total)
+    token = _current_budget.set(budget)
+    try:
+        yield budget
+    finally:
+        _current_budget.reset(token)
+
+
+class _LocatorStats:
+    __slots__ = ("durations", "timeouts")
+
+    def __init__(self) -> None:
+        self.durations = StreamingHistogram()
+        self.timeouts: int = 0
+
+
+class WaitRecorder:
+    """
+    Время ожиданий по локаторам: помогает найти медленные селекторы.
+    """
+
+    def __init__(self) -> None:
+        self._locators: Dict[str, _LocatorStats] = {}
+        self._lock = threading.Lock()
+
+    def record(self, key: str, duration: float, timed_out: bool) -> None:
+        with self._lock:
+            stats = self._locators.get(key)
+            if stats is None:
+                stats = self._locators[key] = _LocatorStats()
+            stats.durations.add(duration)
+            if timed_out:
+                stats.timeouts += 1
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Сводка по локаторам, от самых затратных по суммарному времени, мс.
+        """
+        with self._lock:
+            ordered = sorted(self._locators.items(), key=lambda kv: kv[1].durations.total, reverse=True)
+            return {
+                key: {
+                    "total_ms": round(stats.durations.total * 1000, 2),
+                    "timeouts": stats.timeouts,
+                    "wait_ms": stats.durations.summary(scale=1000),
+                }
+                for key, stats in ordered
+            }
+
+    def report(self, path: Path) -> Dict[str, Any]:
+        """
+        Записать сводку в JSON-файл и приложить её к allure-отчёту.
+        """
+        summary = self.summary()
+        text = json.dumps(summary, ensure_ascii=False, indent=2)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding="utf-8")
+        allure.attach(text, name="Ожидания по локаторам", attachment_type=allure.attachment_type.JSON)
+        return summary
+
+
+# Статистика ожиданий процесса pytest
+wait_recorder = WaitRecorder()
+
+
+class WaitEngine:
+    """
+    Ожидание элементов через MutationObserver в браузере.
+
+    Args:
+        driver: WebDriver.
+        timeout: Таймаут одного ожидания, секунды. Фактический таймаут
+            не больше остатка бюджета теста (см. wait_budget).
+        recorder: Куда записывать время ожиданий.
+    """
+
+    def __init__(self, driver: WebDriver, timeout: float, recorder: WaitRecorder = wait_recorder) -> None:
+        self.driver: WebDriver = driver
+        self.timeout: float = timeout
+        self.recorder: WaitRecorder = recorder
+
+    def _limit(self, timeout: Optional[float]) -> Tuple[float, Optional[WaitBudget]]:
+        limit = self.timeout if timeout is None else timeout
+        budget = _current_budget.get()
+        if budget is not None:
+            if not budget.remaining:
+                raise TimeoutException(f"Бюджет ожиданий теста ({budget.total:.0f} с) исчерпан")
+            limit = min(limit, budget.remaining)
+        return limit, budget
+
+    def until(
+        self,
+        locators: Sequence[Locator],
+        state: str = STATE_PRESENT,
+        timeout: Optional[float] = None,
+    ) -> WebElement:
+        """
+        Дождаться первого элемента любого из локаторов в заданном состоянии.
+
+        Args:
+            locators: Локаторы, проверяемые по порядку.
+            state: present | visible | clickable.
+            timeout: Переопределить таймаут ожидания, секунды.
+
+        Returns:
+            WebElement: Найденный элемент.
+
+        Raises:
+            TimeoutException: Элемент не появился за отведённое время.
+            JavascriptException: Ошибка в скрипте ожидания, например
+                неверный селектор.
+        """
+        limit, budget = self._limit(timeout)
+        queries = [locator_to_selector(locator) for locator in locators]
+        key = f"{state}: " + " | ".join(f"{by}={value}" for by, value in locators)
+
+        started = time.perf_counter()
+        element: Optional[WebElement] = None
+        navigation: Optional[JavascriptException] = None
+        while True:
+            remaining = limit - (time.perf_counter() - started)
+            if remaining <= 0:
+                break
+            try:
+                element = self.driver.execute_async_script(_WAIT_SCRIPT, queries, state, int(remaining * 1000))
+                break
+            except JavascriptException as exc:
+                # Страница сменилась во время ожидания — ждём уже на новой
+                if not _is_navigation_error(exc):
+                    raise
+                navigation = exc
+        elapsed = time.perf_counter() - started
+        if budget is not None:
+            budget.spend(elapsed)
+        self.recorder.record(key, elapsed, element is None)
+        if element is None:
+            raise TimeoutException(f"За {limit:.1f} с не дождались элемента ({key})") from navigation
+        return element
+
+    def navigation_marker(self) -> Dict[str, Any]:
+        """
+        Адрес и performance.timeOrigin текущего документа — снимаются
+        перед навигацией и передаются в until_document_ready.
+
+        Returns:
+            dict: {"href": str, "timeOrigin": float}.
+        """
+        return self.driver.execute_script(_NAVIGATION_MARKER_SCRIPT)
+
+    def until_document_ready(
+        self,
+        timeout: Optional[float] = None,
+        previous: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """
+        Дождаться окончания разбора документа (DOMContentLoaded).
+
+        Args:
+            timeout: Переопределить таймаут ожидания, секунды.
+            previous: Маркер документа до навигации (navigation_marker):
+                готовность считается только у документа, отличного от него.
+
+        Raises:
+            TimeoutException: Документ не разобран за отведённое время.
+        """
+        limit, budget = self._limit(timeout)
+        started = time.perf_counter()
+        ready = False
+        while True:
+            remaining = limit - (time.perf_counter() - started)
+            if remaining <= 0:
+                break
+            try:
+                ready = self.driver.execute_async_script(_READY_SCRIPT, int(remaining * 1000), previous)
+                break
+            except JavascriptException as exc:
+                # Старый документ выгружен — проверяем уже новый
+                if not _is_navigation_error(exc):
+                    raise
+        elapsed = time.perf_counter() - started
+        if budget is not None:
+            budget.spend(elapsed)
+        self.recorder.record("document: DOMContentLoaded", elapsed, not ready)
+        if not ready:
+            raise TimeoutException(f"За {limit:.1f} с документ не загрузился")
+
+    def until_url_changes(self, url: str, timeout: Optional[float] = None) -> None:
+        """
+        Дождаться ухода со страницы с адресом url (после клика по ссылке).
+
+        Args:
+            url: Адрес страницы до навигации.
+            timeout: Переопределить таймаут ожидания, секунды.
+
+        Raises:
+            TimeoutException: Адрес не сменился за отведённое время.
+            JavascriptException: Ошибка в скрипте ожидания.
+        """
+        limit, budget = self._limit(timeout)
+        started = time.perf_counter()
+        changed = False
+        while True:
+            remaining = limit - (time.perf_counter() - started)
+            if remaining <= 0:
+                break
+            try:
+                changed = self.driver.execute_async_script(_URL_CHANGE_SCRIPT, url, int(remaining * 1000))
+                break
+            except JavascriptException as exc:
+                # Документ выгружен — навигация началась, проверяем уже новый
+                if not _is_navigation_error(exc):
+                    raise
+        elapsed = time.perf_counter() - started
+        if budget is not None:
+            budget.spend(elapsed)
+        self.recorder.record("navigation: url change", elapsed, not changed)
+        if not changed:
+            raise TimeoutException(f"За {limit:.1f} с страница {url} не сменилась")